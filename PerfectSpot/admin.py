@@ -1,15 +1,21 @@
+import os
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ERROR_FLAG, IGNORED_PARAMS, PAGE_VAR, SEARCH_VAR
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Event, Interest, Review, OrganizationProxy, IndividualUserProxy
+from .models import CustomUser, Event, Interest, Job, Review, OrganizationProxy, IndividualUserProxy
 from django import forms
 from django.shortcuts import render, redirect
 from django.urls import path
 from django.contrib import messages
-import csv
-from io import TextIOWrapper
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, JsonResponse
+from django.utils import timezone
 from django.utils.html import format_html
 from django.urls import reverse
 
+from PerfectSpot import exporters, importers, jobs
+
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
     list_display = ('username', 'email', 'user_type', 'is_email_verified','is_org_verified', 'is_staff')
@@ -40,69 +46,104 @@ class CustomUserAdmin(UserAdmin):
 
 admin.site.register(CustomUser, CustomUserAdmin)
 
+def export_action(dataset, fmt, source):
+    """
+    An admin action streaming `dataset` for the selected rows, which are
+    passed to exporters.export_queryset() as `source` ("events"/"reviews").
+    """
+    def action(modeladmin, request, queryset):
+        rows = exporters.export_queryset(dataset, **{source: queryset})
+        filename = f"{dataset}-{timezone.now():%Y%m%d-%H%M%S}"
+        return exporters.streaming_response(dataset, fmt, rows, filename)
+    action.__name__ = f"export_{dataset}_{fmt}"
+    what = f"selected {source}" if dataset == source else f"{dataset} of selected {source}"
+    action.short_description = f"Export {what} as {fmt.upper()}"
+    action.allowed_permissions = ('view',)
+    return action
+
+
+def _selection(request, queryset):
+    """
+    The action's selection as jobs.selected() rebuilds it: the ticked ids,
+    which are at most a page, or for "select all" the changelist's filters
+    and search term rather than every id in the table.
+    """
+    if request.POST.get('select_across') != '1':
+        return {'ids': list(queryset.values_list('pk', flat=True))}
+    ignored = (*IGNORED_PARAMS, PAGE_VAR, ERROR_FLAG)
+    return {
+        'all': True,
+        'filters': {key: value for key, value in request.GET.items() if key not in ignored},
+        'search': request.GET.get(SEARCH_VAR, ''),
+    }
+
+
+def queued_export_action(dataset, fmt, source):
+    """
+    Like export_action(), but for selections too big to stream within a
+    request: queues an export job whose file is downloaded from JobAdmin.
+    """
+    def action(modeladmin, request, queryset):
+        params = {'dataset': dataset, 'format': fmt, 'source': source,
+                  'selection': _selection(request, queryset)}
+        job = jobs.enqueue(Job.EXPORT, params=params, user=request.user)
+        modeladmin.message_user(request, format_html(
+            'Export queued as job #{}. <a href="{}">Download it from the job list</a> once it is done.',
+            job.pk, reverse('admin:PerfectSpot_job_changelist'),
+        ))
+    action.__name__ = f"queue_export_{dataset}_{fmt}"
+    what = f"selected {source}" if dataset == source else f"{dataset} of selected {source}"
+    action.short_description = f"Export {what} as {fmt.upper()} in the background"
+    action.allowed_permissions = ('view',)
+    return action
+
+
 @admin.register(Event)
 class EventAdmin(admin.ModelAdmin):
-    list_display = ('title', 'creator', 'date', 'location', 'is_promoted')
+    list_display = ('title', 'creator', 'date', 'location', 'is_promoted', 'attendees_count')
     list_filter = ('is_promoted', 'date')
     search_fields = ('title', 'location', 'creator__username')
+    actions = [
+        export_action('events', 'csv', 'events'),
+        export_action('events', 'ndjson', 'events'),
+        export_action('attendees', 'csv', 'events'),
+        export_action('attendees', 'ndjson', 'events'),
+        export_action('reviews', 'csv', 'events'),
+        export_action('reviews', 'ndjson', 'events'),
+        queued_export_action('events', 'csv', 'events'),
+        queued_export_action('attendees', 'csv', 'events'),
+        queued_export_action('reviews', 'csv', 'events'),
+    ]
 
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
             path('import-csv/', self.admin_site.admin_view(self.import_csv), name='event_import_csv'),
+            path('import-csv/report/<uuid:report_id>/', self.admin_site.admin_view(self.import_report),
+                 name='event_import_report'),
         ]
         return custom_urls + urls
 
     def import_csv(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
         if request.method == "POST":
             form = CsvImportForm(request.POST, request.FILES)
             if form.is_valid():
-                csv_file = TextIOWrapper(request.FILES['csv_file'].file, encoding='utf-8')
-                reader = csv.DictReader(csv_file)
-
-                expected_columns = ['title', 'description', 'location', 'date', 'creator', 'is_promoted']
-                missing_columns = [col for col in expected_columns if col not in reader.fieldnames]
-
-                if missing_columns:
-                    messages.error(request, f"Missing columns: {', '.join(missing_columns)}")
+                upload = request.FILES['csv_file']
+                try:
+                    importers.read_header(upload.file)
+                except importers.CsvFormatError as e:
+                    messages.error(request, str(e))
                     return redirect("..")
-                
-                success_count = 0
-                
-                for row in reader:
-                    try:
-                        creator = CustomUser.objects.get(username=row['creator'])
-                    except CustomUser.DoesNotExist:
-                        messages.error(request, f"Error on row {reader.line_num}: User '{row['creator']}' does not exist.")
-                        continue
-                        
-                    try:
-                        from datetime import datetime
-                        parsed_date = datetime.strptime(row['date'], "%Y-%m-%d %H:%M")
-
-                        is_promoted = row.get('is_promoted', '').strip().lower() in ['true', '1']
-                        
-                        Event.objects.create(
-                            title=row['title'],
-                            description=row['description'],
-                            location=row['location'],
-                            date=parsed_date,  # YYYY-MM-DD HH:MM
-                            creator=creator,  # Must be an existing user
-                            is_promoted=is_promoted
-                        )
-                        success_count += 1
-
-                    except ValueError as ve:
-                        messages.error(request, f"Row {reader.line_num}: Date or value error – {ve}")
-                        continue
-                    except KeyError as ke:
-                        messages.error(request, f"Row {reader.line_num}: Missing required field – {ke}")
-                        continue
-                    except Exception as e:
-                        messages.error(request, f"Row {reader.line_num}: Unexpected error – {e}")
-                        continue
-                    
-                self.message_user(request, f"Successfully imported {success_count} events.")
+
+                # Large files would outlast the request; a worker
+                # (`manage.py run_jobs`) imports it in the background.
+                job = jobs.enqueue(Job.IMPORT_EVENTS, input_file=upload, user=request.user)
+                self.message_user(request, format_html(
+                    'Import queued as job #{}. <a href="{}">Follow its progress</a>.',
+                    job.pk, reverse('admin:PerfectSpot_job_changelist'),
+                ))
                 return redirect("..")
         else:
             form = CsvImportForm()
@@ -114,6 +155,15 @@ class EventAdmin(admin.ModelAdmin):
         }
         return render(request, "admin/csv_form.html", context)
 
+    def import_report(self, request, report_id):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        path = importers.report_path(report_id)
+        if not path.exists():
+            raise Http404("This import report no longer exists.")
+        return FileResponse(open(path, 'rb'), as_attachment=True, content_type='text/csv',
+                            filename=f'event-import-errors-{report_id}.csv')
+
     def changelist_view(self, request, extra_context=None):
         if extra_context is None:
             extra_context = {}
@@ -121,11 +171,87 @@ class EventAdmin(admin.ModelAdmin):
         extra_context['upload_link'] = reverse('admin:event_import_csv')
         return super().changelist_view(request, extra_context=extra_context)
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Read-only view of background jobs; the changelist polls status_view()."""
+    list_display = ('id', 'kind', 'status_display', 'progress_display', 'created_by', 'created_at',
+                    'report_link', 'output_link')
+    list_filter = ('status', 'kind')
+    readonly_fields = [field.name for field in Job._meta.fields]
+
+    # Refreshed in place by the changelist's polling script
+    def status_display(self, obj):
+        return format_html('<span class="job-status" data-job="{}" data-status="{}">{}</span>',
+                           obj.pk, obj.status, obj.get_status_display())
+    status_display.short_description = "Status"
+
+    def progress_display(self, obj):
+        return format_html('<span class="job-progress" data-job="{}">{}</span>', obj.pk, self._progress(obj))
+    progress_display.short_description = "Progress"
+
+    @staticmethod
+    def _progress(obj):
+        text = f"{obj.rows_processed} rows, {obj.error_count} errors"
+        return f"{text} – {obj.message}" if obj.message else text
+
+    def report_link(self, obj):
+        if obj.report_id is None:
+            return "-"
+        return format_html('<a href="{}">Error report</a>',
+                           reverse('admin:event_import_report', args=[obj.report_id]))
+    report_link.short_description = "Report"
+
+    def output_link(self, obj):
+        if not obj.output_file:
+            return "-"
+        return format_html('<a href="{}">Download</a>', reverse('admin:job_output', args=[obj.pk]))
+    output_link.short_description = "Output"
+
+    def get_urls(self):
+        return [
+            path('status/', self.admin_site.admin_view(self.status_view), name='job_status'),
+            path('<int:pk>/output/', self.admin_site.admin_view(self.output_view), name='job_output'),
+        ] + super().get_urls()
+
+    def output_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        job = Job.objects.filter(pk=pk).first()
+        if job is None or not job.output_file or not job.output_file.storage.exists(job.output_file.name):
+            raise Http404("This job has no output file.")
+        return FileResponse(job.output_file.open('rb'), as_attachment=True,
+                            filename=os.path.basename(job.output_file.name))
+
+    def status_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk.isdigit()]
+        return JsonResponse({
+            str(job.pk): {
+                "status": job.status,
+                "status_display": job.get_status_display(),
+                "progress": self._progress(job),
+            }
+            for job in Job.objects.filter(pk__in=ids[:100])
+        })
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     list_display = ('event', 'reviewer', 'rating', 'created_at')
     list_filter = ('rating', 'created_at')
     search_fields = ('reviewer__username', 'event__title')
+    actions = [
+        export_action('reviews', 'csv', 'reviews'),
+        export_action('reviews', 'ndjson', 'reviews'),
+        queued_export_action('reviews', 'csv', 'reviews'),
+    ]
 
 class OrganizationAdmin(UserAdmin):
     model = OrganizationProxy
@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
+
+
+def restore_event_fts(sender, using, **kwargs):
+    from PerfectSpot.search import install_event_fts
+    install_event_fts(connections[using])
 
 
 class PerfectspotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'PerfectSpot'
+
+    def ready(self):
+        from PerfectSpot import signals  # noqa: F401  (registers receivers)
+        post_migrate.connect(restore_event_fts, sender=self)
+
+        from PerfectSpot.sqlite_tuning import tune_sqlite_connection
+        connection_created.connect(tune_sqlite_connection)
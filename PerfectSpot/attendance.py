@@ -0,0 +1,158 @@
+"""
+RSVP writes and seat inventory.
+
+Each call is a few indexed single-row statements; the event's attendee list
+is never loaded. Seats are taken with a conditional UPDATE on the event's
+attendees_count ("add one if there is still room"), which the database
+applies atomically, so concurrent RSVPs can never oversell an event. Users
+who don't get a seat join a FIFO waitlist and are promoted as seats free up.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from PerfectSpot.models import Attendance, Event, WaitlistEntry
+from PerfectSpot.signals import bump, touch
+
+ATTENDING = "attending"
+WAITLISTED = "waitlisted"
+NOT_ATTENDING = "not_attending"
+
+
+def is_attending(event, user):
+    return Attendance.objects.filter(event_id=event.pk, user_id=user.pk).exists()
+
+
+def is_full(event):
+    return event.capacity is not None and event.attendees_count >= event.capacity
+
+
+def _take_seat(event_id):
+    """Claims one seat if any are left. True when the seat is ours."""
+    has_room = Q(capacity__isnull=True) | Q(attendees_count__lt=F('capacity'))
+    return Event.objects.filter(pk=event_id).filter(has_room).update(
+        attendees_count=F('attendees_count') + 1, **touch(Event)
+    ) == 1
+
+
+def _release_seat(event_id):
+    bump(Event.objects.filter(pk=event_id), 'attendees_count', -1)
+
+
+def _seat(event, user_id, status=Attendance.CONFIRMED, source=Attendance.FREE):
+    """
+    Inserts the attendance row for a seat we already hold. Returns False (and
+    hands the seat back) if the user turned out to be attending already.
+    """
+    try:
+        with transaction.atomic():
+            Attendance.objects.create(
+                event_id=event.pk, user_id=user_id, event_date=event.date,
+                status=status, source=source,
+            )
+    except IntegrityError:
+        _release_seat(event.pk)
+        return False
+    return True
+
+
+def _join(event, user, source):
+    # Write first: taking the seat before any read means the transaction
+    # holds the write lock from its first statement, so it queues behind
+    # other writers instead of deadlocking with them on a read->write
+    # upgrade (SQLite), and the seat check is never based on a stale read.
+    if not _take_seat(event.pk):
+        if is_attending(event, user):
+            return ATTENDING
+        WaitlistEntry.objects.get_or_create(event_id=event.pk, user_id=user.pk)
+        return WAITLISTED
+    if _seat(event, user.pk, source=source):
+        WaitlistEntry.objects.filter(event_id=event.pk, user_id=user.pk).delete()
+    return ATTENDING
+
+
+def claim_paid_seat(event, user):
+    """
+    Seats a user who has already paid (source STRIPE). Unlike a free RSVP
+    it never waitlists: returns False when the event is full, so the caller
+    can refund the payment. True if the user holds a seat afterwards.
+    """
+    with transaction.atomic():
+        if not _take_seat(event.pk):
+            return is_attending(event, user)
+        if _seat(event, user.pk, source=Attendance.STRIPE):
+            WaitlistEntry.objects.filter(event_id=event.pk, user_id=user.pk).delete()
+    return True
+
+
+def _leave(event, user):
+    if Attendance.objects.filter(event_id=event.pk, user_id=user.pk).delete()[0]:
+        _release_seat(event.pk)
+        promote_waitlist(event)
+    else:
+        WaitlistEntry.objects.filter(event_id=event.pk, user_id=user.pk).delete()
+    return NOT_ATTENDING
+
+
+def promote_waitlist(event):
+    """
+    Moves waiting users into free seats, oldest entry first, until the
+    event is full or the waitlist is empty. Returns the promoted user ids.
+    Call it whenever seats may have opened up (a cancellation, a capacity
+    increase).
+    """
+    promoted = []
+    with transaction.atomic():
+        while _take_seat(event.pk):
+            entry = (
+                WaitlistEntry.objects.filter(event_id=event.pk)
+                .order_by('created_at', 'id')
+                .values_list('id', 'user_id')
+                .first()
+            )
+            if entry is None:
+                _release_seat(event.pk)
+                break
+            entry_id, user_id = entry
+            # Deleting the entry is how we claim it; if a concurrent promoter
+            # got there first, give the seat back and look again.
+            if not WaitlistEntry.objects.filter(pk=entry_id).delete()[0]:
+                _release_seat(event.pk)
+                continue
+            if _seat(event, user_id, status=Attendance.PROMOTED):
+                promoted.append(user_id)
+    return promoted
+
+
+def waitlist_position(event, user):
+    """1-based place in the queue, or None if the user isn't waiting."""
+    entry = WaitlistEntry.objects.filter(event_id=event.pk, user_id=user.pk).first()
+    if entry is None:
+        return None
+    ahead = WaitlistEntry.objects.filter(event_id=event.pk).filter(
+        Q(created_at__lt=entry.created_at) | Q(created_at=entry.created_at, id__lt=entry.id)
+    ).count()
+    return ahead + 1
+
+
+def set_attendance(event, user, attending=None, source=Attendance.FREE):
+    """
+    Makes `user` attend (attending=True), stop attending (False) or flip
+    their current state (None). A user who is waitlisted counts as "in"
+    for toggling, so a second tap leaves the waitlist. `source` records how
+    a new seat was obtained (free RSVP or Stripe).
+
+    Returns (state, attendees_count) where state is ATTENDING, WAITLISTED
+    or NOT_ATTENDING.
+    """
+    if attending is None:
+        attending = not (
+            is_attending(event, user)
+            or WaitlistEntry.objects.filter(event_id=event.pk, user_id=user.pk).exists()
+        )
+    with transaction.atomic():
+        state = _join(event, user, source) if attending else _leave(event, user)
+        # A primary-key read of the counter, not a COUNT(*) over attendees.
+        event.attendees_count = (
+            Event.objects.filter(pk=event.pk).values_list('attendees_count', flat=True).get()
+        )
+    return state, event.attendees_count
@@ -0,0 +1,383 @@
+"""
+API benchmarks, used by `manage.py benchmark_api` and BenchmarkTestCase.
+
+Every route in PerfectSpot/urls.py is either listed in ENDPOINTS or skipped
+with a reason in SKIPPED (uncovered_routes() finds the rest). Each endpoint
+is requested through the test client a number of times; the report records
+p50/p95 latency, the query count and the response size, and an endpoint
+fails when it runs more queries than its budget or its p95 goes over its
+threshold.
+
+Budgets are per request, independent of the dataset size: a list that
+grows a query per row (N+1) shows up however small the data is. The
+cache is cleared before each endpoint, so the first request builds its
+cached page and the budget covers the cold path.
+
+Requests that write are run in a transaction that is rolled back, so every
+iteration sees the same data.
+"""
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.test import Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, reverse
+from django.utils import timezone
+from django.views.static import serve
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from PerfectSpot import attendance
+from PerfectSpot.models import Event, FriendRequest, Review
+from PerfectSpot.stats import percentile
+from PerfectSpot.views.calendar import feed_token
+
+User = get_user_model()
+
+PASSWORD = "benchmark-password"
+
+# The dataset `benchmark_api` seeds by default (seed_data options)
+DATASET = {
+    "users": 5000,
+    "events": 5000,
+    "attendances": 50000,
+    "friendships": 20000,
+    "friend_requests": 5000,
+    "reviews": 20000,
+}
+
+# Routes that aren't benchmarked, and why
+SKIPPED = {
+    "events/<int:pk>/create-checkout-session/": "calls the Stripe API",
+    "events/<int:pk>/confirm-checkout/": "calls the Stripe API",
+    "google-signin": "verifies the ID token with Google",
+}
+
+
+class Endpoint:
+    """
+    One request to benchmark. `args`, `query` and `data` are callables
+    taking the fixtures (see prepare()), as ids are only known once the
+    dataset is seeded. `as_user` names the fixture the request is sent as
+    (None: anonymous).
+    """
+
+    def __init__(self, name, route, queries, p95_ms, method="get", args=None, query=None,
+                 data=None, as_user="viewer", multipart=False, status=200):
+        self.name = name
+        self.route = route
+        self.queries = queries
+        self.p95_ms = p95_ms
+        self.method = method
+        self.args = args or (lambda f: [])
+        self.query = query
+        self.data = data
+        self.as_user = as_user
+        self.multipart = multipart
+        self.status = status
+
+    @property
+    def writes(self):
+        return self.method not in ("get", "head", "options")
+
+    def path(self, fixtures):
+        path = reverse(self.route, args=self.args(fixtures))
+        return f"{path}?{self.query(fixtures)}" if self.query else path
+
+
+def _event(f):
+    return [f["event"].pk]
+
+
+def _own_event(f):
+    return [f["own_event"].pk]
+
+
+def _other(f):
+    return [f["other"].pk]
+
+
+# name, route, query budget, p95 threshold in ms (on the DATASET above)
+ENDPOINTS = [
+    # Password hashing (PBKDF2) dominates these two.
+    Endpoint("signup", "signup", 2, 1500, method="post", as_user=None, status=201,
+             data=lambda f: {"username": "benchmark.signup", "email": "signup@example.com",
+                             "password": PASSWORD, "user_type": "individual"}),
+    Endpoint("signin", "signin", 1, 1500, method="post", as_user=None,
+             data=lambda f: {"username": f["viewer"].username, "password": PASSWORD}),
+
+    Endpoint("event_list", "create_event", 3, 50),
+    Endpoint("event_list_title", "create_event", 3, 50,
+             query=lambda f: f"title={f['event'].title[:3]}"),
+    Endpoint("event_search", "create_event", 3, 50,
+             query=lambda f: f"q={f['event'].title.split()[0]}"),
+    Endpoint("event_create", "create_event", 3, 50, method="post", multipart=True, status=201,
+             data=lambda f: {"title": "Benchmark event", "description": "Created by benchmark_api",
+                             "location": "Warsaw, Poland", "latitude": "52.2297",
+                             "longitude": "21.0122", "date": f["future"].isoformat()}),
+    Endpoint("event_detail", "delete_event", 3, 50, args=_event),
+    Endpoint("event_delete", "delete_event", 12, 100, method="delete", args=_own_event),
+    Endpoint("event_edit", "edit_event", 11, 50, method="patch", multipart=True, args=_own_event,
+             data=lambda f: {"title": "Renamed by benchmark_api", "capacity": "500"}),
+    Endpoint("event_promote", "promote_event", 4, 50, method="patch", as_user="organizer",
+             args=lambda f: [f["org_event"].pk]),
+    Endpoint("event_rsvp", "rsvp-event", 10, 50, method="post", args=_event,
+             data=lambda f: {"attending": True}),
+    Endpoint("events_nearby", "nearby_events", 2, 100,
+             query=lambda f: f"lat={f['event'].latitude}&lng={f['event'].longitude}&radius_km=50"),
+    Endpoint("events_nearby_bbox", "nearby_events", 2, 100,
+             query=lambda f: "bbox=51,18,53,22"),
+    Endpoint("event_clusters", "event_clusters", 3, 150,
+             query=lambda f: "bbox=49,14,55,24&zoom=6"),
+    Endpoint("event_sync", "event_sync", 3, 50),
+    Endpoint("my_events", "my_events", 2, 50),
+    Endpoint("calendar_feed_link", "calendar_feed_link", 1, 50),
+    Endpoint("calendar_feed", "calendar_feed", 3, 50, as_user=None,
+             args=lambda f: [f["feed_token"]]),
+
+    Endpoint("review_list", "list_reviews", 2, 50, args=_event),
+    Endpoint("review_add", "add_review", 3, 50, method="post", args=_event, status=201,
+             data=lambda f: {"rating": 4, "comment": "Benchmark review"}),
+    Endpoint("review_edit", "edit_review", 4, 50, method="put",
+             args=lambda f: [f["review"].event_id, f["review"].pk],
+             data=lambda f: {"rating": 5, "comment": "Edited benchmark review"}),
+    Endpoint("review_delete", "delete_review", 3, 50, method="delete", status=204,
+             args=lambda f: [f["review"].event_id, f["review"].pk]),
+
+    Endpoint("friendship_status", "friendship-status", 8, 50, args=_other),
+    Endpoint("friendship_status_compact", "friendship-status", 10, 50, args=_other,
+             query=lambda f: "compact=1"),
+    Endpoint("unfriend", "unfriend", 10, 50, method="delete", args=lambda f: [f["friend"].pk]),
+    Endpoint("my_friends", "my-friends", 2, 50),
+    Endpoint("user_search", "user-search", 4, 50,
+             query=lambda f: f"q={f['other'].username[:3]}"),
+    Endpoint("user_profile", "user-profile-api", 6, 50, args=_other),
+    Endpoint("user_profile_compact", "user-profile-api", 8, 50, args=_other,
+             query=lambda f: "compact=1"),
+    Endpoint("connections_friends", "user-connections", 3, 50,
+             args=lambda f: [f["other"].pk, "friends"]),
+    Endpoint("connections_incoming", "user-connections", 3, 50,
+             args=lambda f: [f["viewer"].pk, "incoming"]),
+    Endpoint("connections_outgoing", "user-connections", 3, 50,
+             args=lambda f: [f["viewer"].pk, "outgoing"]),
+
+    Endpoint("api_root", "api-root", 1, 50),
+    Endpoint("friend_requests", "friend-request-list", 4, 50),
+    Endpoint("friend_request_send", "friend-request-list", 3, 50, method="post", status=201,
+             data=lambda f: {"to_user": f["stranger"].pk}),
+    Endpoint("friend_request_detail", "friend-request-detail", 3, 50,
+             args=lambda f: [f["incoming"].pk]),
+    Endpoint("friend_request_accept", "friend-request-accept", 12, 50, method="post",
+             args=lambda f: [f["incoming"].pk]),
+    Endpoint("friend_request_decline", "friend-request-decline", 3, 50, method="post",
+             args=lambda f: [f["incoming"].pk]),
+    Endpoint("friend_request_cancel", "friend-request-cancel", 4, 50, method="post",
+             args=lambda f: [f["outgoing"].pk]),
+
+    Endpoint("async_event_list", "async_event_list", 3, 50),
+    Endpoint("async_event_detail", "async_event_detail", 3, 50, args=_event),
+    Endpoint("async_review_list", "async_review_list", 2, 50, args=_event),
+    Endpoint("async_user_search", "async_user_search", 4, 50,
+             query=lambda f: f"q={f['other'].username[:3]}"),
+    Endpoint("async_user_profile", "async_user_profile", 6, 50, args=_other),
+]
+
+
+def route_keys(patterns=None, prefix=""):
+    """The name (or, if unnamed, the pattern) of every route in PerfectSpot/urls.py."""
+    if patterns is None:
+        from PerfectSpot import urls
+        patterns = urls.urlpatterns
+    keys = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            keys |= route_keys(pattern.url_patterns, prefix + str(pattern.pattern))
+        elif pattern.callback is not serve:  # static() media files in DEBUG
+            keys.add(pattern.name or prefix + str(pattern.pattern))
+    return keys
+
+
+def uncovered_routes():
+    covered = {endpoint.route for endpoint in ENDPOINTS} | set(SKIPPED)
+    return sorted(route_keys() - covered)
+
+
+def prepare():
+    """
+    Picks the users and rows the endpoints are called with from the seeded
+    data, creating the few that may be missing. The viewer is the
+    individual with the most friends, so list endpoints see a full page.
+    """
+    viewer = User.objects.filter(user_type=User.INDIVIDUAL).order_by("-friends_count", "id").first()
+    viewer.set_password(PASSWORD)
+    viewer.save(update_fields=["password"])
+    other = User.objects.exclude(pk=viewer.pk).order_by("-friends_count", "id").first()
+    organizer = User.objects.filter(user_type=User.ORGANIZATION).order_by("-events_count", "id").first()
+    future = timezone.now() + timedelta(days=30)
+
+    event = (
+        Event.objects.exclude(creator=viewer)
+        .annotate(n=Count("review")).order_by("-n", "id").first()
+    )
+    own_event = Event.objects.filter(creator=viewer).order_by("-attendees_count", "id").first()
+    if own_event is None:
+        own_event = Event.objects.create(title="Benchmark own event", description="",
+                                         location="Warsaw, Poland", date=future, creator=viewer)
+    # Deleting it should cascade through attendance and reviews whatever the data.
+    if not own_event.attendances.exists():
+        attendance.set_attendance(own_event, other, True)
+    if not Review.objects.filter(event=own_event).exists():
+        Review.objects.create(event=own_event, reviewer=other, rating=4, comment="Benchmark review")
+    org_event = Event.objects.filter(creator=organizer).order_by("id").first()
+    if org_event is None:
+        org_event = Event.objects.create(title="Benchmark promoted event", description="",
+                                         location="Warsaw, Poland", date=future, creator=organizer)
+
+    friend = viewer.friends.order_by("id").first()
+    if friend is None:
+        friend = other
+        viewer.friends.add(friend)
+        friend.friends.add(viewer)
+
+    related = Q(pk=viewer.pk) | Q(friends=viewer) | Q(sent_requests__to_user=viewer) \
+        | Q(received_requests__from_user=viewer)
+    strangers = User.objects.exclude(pk__in=User.objects.filter(related).values("pk")).order_by("id")
+    stranger, sender, recipient = list(strangers[:3])
+
+    incoming = FriendRequest.objects.filter(to_user=viewer).order_by("id").first()
+    if incoming is None:
+        incoming = FriendRequest.objects.create(from_user=sender, to_user=viewer)
+    outgoing = FriendRequest.objects.filter(from_user=viewer).order_by("id").first()
+    if outgoing is None:
+        outgoing = FriendRequest.objects.create(from_user=viewer, to_user=recipient)
+
+    review = Review.objects.create(event=event, reviewer=viewer, rating=3, comment="Benchmark review")
+
+    return {
+        "viewer": viewer,
+        "other": other,
+        "organizer": organizer,
+        "friend": friend,
+        "stranger": stranger,
+        "event": event,
+        "own_event": own_event,
+        "org_event": org_event,
+        "review": review,
+        "incoming": incoming,
+        "outgoing": outgoing,
+        "feed_token": feed_token(viewer),
+        "future": future,
+    }
+
+
+@contextmanager
+def _rolled_back():
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+def _client(user):
+    if user is None:
+        return Client()
+    return Client(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+
+def _send(client, endpoint, path, fixtures):
+    send = getattr(client, endpoint.method)
+    if endpoint.data is None:
+        return send(path)
+    data = endpoint.data(fixtures)
+    if not endpoint.multipart:
+        return send(path, data, content_type="application/json")
+    if endpoint.method == "post":
+        return send(path, data)
+    # Only post() encodes multipart bodies itself.
+    return send(path, encode_multipart(BOUNDARY, data), content_type=MULTIPART_CONTENT)
+
+
+def measure(endpoint, fixtures, iterations, client=None):
+    """Requests `endpoint` `iterations` times; returns its report entry."""
+    client = client or _client(fixtures[endpoint.as_user] if endpoint.as_user else None)
+    path = endpoint.path(fixtures)
+    timings, queries, size, statuses = [], [], 0, set()
+    cache.clear()
+    for _ in range(iterations):
+        with ExitStack() as stack:
+            if endpoint.writes:
+                stack.enter_context(_rolled_back())
+            captured = [stack.enter_context(CaptureQueriesContext(connections[alias]))
+                        for alias in connections]
+            started = time.perf_counter()
+            response = _send(client, endpoint, path, fixtures)
+            body = b"".join(response.streaming_content) if response.streaming else response.content
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(sum(len(capture) for capture in captured))
+        size = len(body)
+        statuses.add(response.status_code)
+
+    return {
+        "route": endpoint.route,
+        "method": endpoint.method.upper(),
+        "path": path,
+        "status": sorted(statuses),
+        "iterations": iterations,
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "max_ms": round(max(timings), 2),
+        "queries": max(queries),
+        "queries_cached": queries[-1],
+        "bytes": size,
+        "budget": {"queries": endpoint.queries, "p95_ms": endpoint.p95_ms},
+    }
+
+
+def violations(endpoint, result, latency_factor=1.0):
+    """
+    What `result` breaks of `endpoint`'s budget. latency_factor scales the
+    p95 threshold; None skips the latency check, for runs too short or on
+    machines too noisy for wall-clock numbers to mean much (the test suite).
+    """
+    problems = []
+    if result["status"] != [endpoint.status]:
+        problems.append(f"status {result['status']} (expected {endpoint.status})")
+    if result["queries"] > endpoint.queries:
+        problems.append(f"{result['queries']} queries (budget {endpoint.queries})")
+    if latency_factor is not None and result["p95_ms"] > endpoint.p95_ms * latency_factor:
+        threshold = endpoint.p95_ms * latency_factor
+        problems.append(f"p95 {result['p95_ms']:.1f} ms (threshold {threshold:.0f} ms)")
+    return problems
+
+
+def run(iterations=20, names=None, latency_factor=1.0, on_result=None):
+    """
+    Benchmarks ENDPOINTS (or those in `names`) against the current
+    database, which should already be seeded. Returns the report.
+    """
+    fixtures = prepare()
+    endpoints = [e for e in ENDPOINTS if not names or e.name in names]
+    results = {}
+    for endpoint in endpoints:
+        result = measure(endpoint, fixtures, iterations)
+        result["violations"] = violations(endpoint, result, latency_factor)
+        results[endpoint.name] = result
+        if on_result:
+            on_result(endpoint.name, result)
+    return {
+        "generated_at": timezone.now().isoformat(),
+        "iterations": iterations,
+        "latency_factor": latency_factor,
+        "rows": {
+            "users": User.objects.count(),
+            "events": Event.objects.count(),
+            "reviews": Review.objects.count(),
+        },
+        "endpoints": results,
+        "skipped": SKIPPED,
+        "failed": sorted(name for name, result in results.items() if result["violations"]),
+    }
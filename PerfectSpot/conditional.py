@@ -0,0 +1,40 @@
+"""
+HTTP conditional GET helpers (ETag / Last-Modified).
+
+A view computes its validators with one cheap query, asks not_modified()
+whether the client's copy is still current, and only renders the body when
+it isn't. Unchanged resources then cost that single query and a 304.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Quoted ETag from any values that together identify a version."""
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def not_modified(request, etag=None, last_modified=None):
+    """
+    Returns a 304 (or 412) response when the request's If-None-Match /
+    If-Modified-Since headers match, otherwise None.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validators(response, etag=None, last_modified=None, vary=()):
+    """
+    Adds the validators to a response (including a 304). Personalized
+    resources should pass vary=('Authorization',) so shared caches keep
+    one copy per user.
+    """
+    if vary:
+        patch_vary_headers(response, vary)
+    if etag:
+        response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,139 @@
+"""
+Streaming CSV / NDJSON exports of events, attendees and reviews, used by
+the admin actions (EventAdmin, ReviewAdmin) and `manage.py export_data`.
+
+Rows come from values_list().iterator(), so neither the queryset cache nor
+model instances are built and memory stays flat however many rows there
+are. Output is yielded in blocks of lines rather than one line at a time,
+which keeps per-chunk overhead down for StreamingHttpResponse and files.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from PerfectSpot.models import Attendance, Event, Review
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+CHUNK_SIZE = 2000
+
+# dataset -> (model, [(column, values_list field)], ordering)
+DATASETS = {
+    'events': (Event, [
+        ('id', 'id'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('location', 'location'),
+        ('date', 'date'),
+        ('creator', 'creator__username'),
+        ('is_promoted', 'is_promoted'),
+        ('latitude', 'latitude'),
+        ('longitude', 'longitude'),
+        ('capacity', 'capacity'),
+        ('attendees_count', 'attendees_count'),
+    ], ('date', 'id')),
+    'attendees': (Attendance, [
+        ('event_id', 'event_id'),
+        ('event_title', 'event__title'),
+        ('user_id', 'user_id'),
+        ('username', 'user__username'),
+        ('email', 'user__email'),
+        ('status', 'status'),
+        ('source', 'source'),
+        ('joined_at', 'created_at'),
+    ], ('event_id', 'created_at', 'id')),
+    'reviews': (Review, [
+        ('id', 'id'),
+        ('event_id', 'event_id'),
+        ('event_title', 'event__title'),
+        ('reviewer', 'reviewer__username'),
+        ('rating', 'rating'),
+        ('comment', 'comment'),
+        ('created_at', 'created_at'),
+    ], ('event_id', 'id')),
+}
+
+
+# Spreadsheets run a cell starting with one of these as a formula.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_safe(value):
+    """
+    Quotes user-entered text that a spreadsheet would evaluate. CSV only:
+    NDJSON is read by programs, not spreadsheets, and stays raw.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(dataset, events=None, reviews=None):
+    """
+    The rows of `dataset`, optionally limited to the given event / review
+    querysets (e.g. an admin action's selection).
+    """
+    model, columns, ordering = DATASETS[dataset]
+    qs = model.objects.all()
+    if dataset == 'events' and events is not None:
+        qs = events
+    elif dataset == 'attendees' and events is not None:
+        qs = qs.filter(event__in=events.values('pk'))
+    elif dataset == 'reviews' and reviews is not None:
+        qs = reviews
+    elif dataset == 'reviews' and events is not None:
+        qs = qs.filter(event__in=events.values('pk'))
+    return qs.order_by(*ordering).values_list(*[field for _, field in columns])
+
+
+def stream(dataset, fmt, queryset, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Yields the export as text blocks of up to chunk_size rows, calling
+    on_chunk(rows) with each block's row count once it has been taken.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    names = [name for name, _ in DATASETS[dataset][1]]
+    rows = queryset.iterator(chunk_size=chunk_size)
+
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(names)
+
+        def encode(row):
+            return writer.writerow([_csv_safe(value) for value in row])
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+
+        def encode(row):
+            return encoder.encode(dict(zip(names, row))) + '\n'
+
+    block = []
+    for row in rows:
+        block.append(encode(row))
+        if len(block) >= chunk_size:
+            yield ''.join(block)
+            if on_chunk:
+                on_chunk(len(block))
+            block = []
+    if block:
+        yield ''.join(block)
+        if on_chunk:
+            on_chunk(len(block))
+
+
+def streaming_response(dataset, fmt, queryset, filename):
+    response = StreamingHttpResponse(stream(dataset, fmt, queryset), content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -0,0 +1,70 @@
+from django.db.models import Q
+
+from PerfectSpot.models import FriendRequest
+
+NONE = "none"
+SELF = "self"
+FRIENDS = "friends"
+SENT = "sent"
+RECEIVED = "received"
+
+
+def _queries(viewer, candidate_ids):
+    others = candidate_ids - {viewer.id}
+    friend_ids = viewer.friends.filter(id__in=others).values_list('id', flat=True)
+    pending = FriendRequest.objects.filter(
+        Q(from_user=viewer, to_user_id__in=others) | Q(to_user=viewer, from_user_id__in=others)
+    ).values_list('id', 'from_user_id', 'to_user_id')
+    return friend_ids, pending
+
+
+def _statuses(viewer, candidate_ids, friend_ids, pending):
+    sent, received = {}, {}
+    for request_id, from_id, to_id in pending:
+        if from_id == viewer.id:
+            sent[to_id] = request_id
+        else:
+            received[from_id] = request_id
+
+    statuses = {}
+    for cid in candidate_ids:
+        if cid == viewer.id:
+            statuses[cid] = (SELF, None)
+        elif cid in friend_ids:
+            statuses[cid] = (FRIENDS, None)
+        elif cid in sent:
+            statuses[cid] = (SENT, sent[cid])
+        elif cid in received:
+            statuses[cid] = (RECEIVED, received[cid])
+        else:
+            statuses[cid] = (NONE, None)
+    return statuses
+
+
+def resolve_friendship_statuses(viewer, candidate_ids):
+    """
+    Relationship between `viewer` and each candidate, resolved with two
+    set-based queries no matter how many candidates there are.
+
+    Returns {candidate_id: (status, request_id)}, where request_id is the
+    pending FriendRequest for "sent"/"received" and None otherwise.
+    """
+    candidate_ids = set(candidate_ids)
+    if not viewer or not viewer.is_authenticated:
+        return {cid: (NONE, None) for cid in candidate_ids}
+
+    friend_ids, pending = _queries(viewer, candidate_ids)
+    return _statuses(viewer, candidate_ids, set(friend_ids), list(pending))
+
+
+async def aresolve_friendship_statuses(viewer, candidate_ids):
+    """resolve_friendship_statuses() for async views."""
+    candidate_ids = set(candidate_ids)
+    if not viewer or not viewer.is_authenticated:
+        return {cid: (NONE, None) for cid in candidate_ids}
+
+    friend_ids, pending = _queries(viewer, candidate_ids)
+    return _statuses(
+        viewer, candidate_ids,
+        {fid async for fid in friend_ids}, [row async for row in pending],
+    )
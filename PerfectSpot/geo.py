@@ -0,0 +1,196 @@
+"""
+Geohash helpers used to index Event coordinates.
+
+A geohash interleaves longitude/latitude bits into a base32 string, so every
+prefix names a rectangular cell and nearby points share prefixes. Storing the
+hash in an indexed column lets "what is inside this box" be answered with a
+handful of string range scans, which works on any backend including SQLite.
+"""
+import math
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+
+EVENT_GEOHASH_PRECISION = 9  # ~5m x 5m cells
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Sorts after every base32 character, so [prefix, prefix + END) spans all
+# hashes beginning with prefix.
+END = '~'
+
+
+def encode(latitude, longitude, precision=EVENT_GEOHASH_PRECISION):
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars = []
+    bits, bit_count = 0, 0
+    even = True  # geohash starts with a longitude bit
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def decode_bbox(geohash):
+    """Returns (min_lat, min_lng, max_lat, max_lng) of the cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                if bit:
+                    lng_lo = mid
+                else:
+                    lng_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lng_lo, lat_hi, lng_hi
+
+
+def cell_size(precision):
+    """Returns (lat_degrees, lng_degrees) covered by a cell at this precision."""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def _cells_along(lo, hi, step, origin):
+    start = math.floor((lo - origin) / step)
+    end = math.floor((hi - origin) / step)
+    return [origin + (i + 0.5) * step for i in range(start, end + 1)]
+
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng, precision):
+    """All geohash cells of the given precision that intersect the box."""
+    lat_step, lng_step = cell_size(precision)
+    lat_centers = _cells_along(max(min_lat, -90.0), min(max_lat, 90.0 - 1e-12), lat_step, -90.0)
+    lng_centers = _cells_along(max(min_lng, -180.0), min(max_lng, 180.0 - 1e-12), lng_step, -180.0)
+    return sorted({
+        encode(lat, lng, precision)
+        for lat in lat_centers
+        for lng in lng_centers
+    })
+
+
+def choose_precision(min_lat, min_lng, max_lat, max_lng, max_cells=32, max_precision=EVENT_GEOHASH_PRECISION):
+    """Finest precision whose covering of the box stays within max_cells."""
+    best = 1
+    for precision in range(1, max_precision + 1):
+        lat_step, lng_step = cell_size(precision)
+        rows = math.floor((max_lat + 90) / lat_step) - math.floor((min_lat + 90) / lat_step) + 1
+        cols = math.floor((max_lng + 180) / lng_step) - math.floor((min_lng + 180) / lng_step) + 1
+        if rows * cols > max_cells:
+            break
+        best = precision
+    return best
+
+
+def precision_for_zoom(zoom, cluster_px=64, tile_px=256):
+    """
+    Geohash precision whose cells are roughly cluster_px wide on a web-map
+    at the given zoom level (the world is tile_px * 2**zoom pixels wide).
+    """
+    target_degrees = 360.0 / (1 << zoom) * cluster_px / tile_px
+    for precision in range(1, EVENT_GEOHASH_PRECISION + 1):
+        if cell_size(precision)[1] <= target_degrees:
+            return precision
+    return EVENT_GEOHASH_PRECISION
+
+
+def _successor(prefix):
+    """The smallest string that sorts after every hash starting with prefix."""
+    while prefix and prefix[-1] == BASE32[-1]:
+        prefix = prefix[:-1]
+    if not prefix:
+        return END
+    return prefix[:-1] + BASE32[_DECODE[prefix[-1]] + 1]
+
+
+def prefix_ranges(prefixes):
+    """
+    Turns a list of cell prefixes into merged half-open [lo, hi) string
+    ranges. Neighbouring cells are often adjacent in geohash order, so this
+    usually collapses a covering into just a few index range scans.
+    """
+    ranges = []
+    for prefix in sorted(prefixes):
+        hi = _successor(prefix)
+        if ranges and ranges[-1][1] >= prefix:
+            ranges[-1][1] = max(ranges[-1][1], hi)
+        else:
+            ranges.append([prefix, hi])
+    return [tuple(r) for r in ranges]
+
+
+def radius_bboxes(latitude, longitude, radius_km):
+    """
+    Bounding boxes around a circle, latitudes clamped to the poles. A circle
+    crossing the ±180° meridian gets two boxes, one on each side, since a
+    single box would need min_lng > max_lng.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = math.cos(math.radians(latitude))
+    dlng = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DEGREE_LAT * cos_lat))
+    min_lat, max_lat = max(-90.0, latitude - dlat), min(90.0, latitude + dlat)
+    west, east = longitude - dlng, longitude + dlng
+    if east - west >= 360.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+    if west < -180.0:
+        return [(min_lat, west + 360.0, max_lat, 180.0), (min_lat, -180.0, max_lat, east)]
+    if east > 180.0:
+        return [(min_lat, west, max_lat, 180.0), (min_lat, -180.0, max_lat, east - 360.0)]
+    return [(min_lat, west, max_lat, east)]
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def haversine_expression(latitude, longitude, lat_field='latitude', lng_field='longitude'):
+    """Database expression for the distance in km from a fixed point to each row."""
+    phi1 = math.radians(latitude)
+    dphi = Radians(F(lat_field)) - phi1
+    dlmb = Radians(F(lng_field)) - math.radians(longitude)
+    a = (
+        Power(Sin(dphi / 2), 2)
+        + math.cos(phi1) * Cos(Radians(F(lat_field))) * Power(Sin(dlmb / 2), 2)
+    )
+    # Least() guards asin() against rounding pushing its argument past 1
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0)), output_field=FloatField())
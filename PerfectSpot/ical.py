@@ -0,0 +1,85 @@
+"""
+Minimal iCalendar (RFC 5545) writer for event feeds.
+
+render_calendar() is a generator, so a feed can be streamed straight from a
+queryset iterator without building the whole document in memory.
+"""
+from datetime import timezone as dt_timezone
+
+PRODID = '-//GatherSpot//Events//EN'
+UID_DOMAIN = 'gatherspot'
+
+# RFC 5545 §3.1: content lines are folded at 75 octets
+_LINE_LIMIT = 75
+
+
+def escape_text(value):
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+        .replace('\r', '\\n')
+    )
+
+
+def fold(line):
+    """Splits a content line into CRLF-terminated chunks of at most 75 octets."""
+    encoded = line.encode()
+    if len(encoded) <= _LINE_LIMIT:
+        return line + '\r\n'
+    chunks = []
+    limit = _LINE_LIMIT
+    while encoded:
+        cut = min(limit, len(encoded))
+        # don't split a multi-byte UTF-8 sequence
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        chunks.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        limit = _LINE_LIMIT - 1  # continuation lines start with a space
+    return '\r\n '.join(chunks) + '\r\n'
+
+
+def format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def event_lines(event, url=None):
+    yield 'BEGIN:VEVENT'
+    yield f'UID:event-{event.pk}@{UID_DOMAIN}'
+    yield f'DTSTAMP:{format_datetime(event.updated_at)}'
+    yield f'LAST-MODIFIED:{format_datetime(event.updated_at)}'
+    yield f'DTSTART:{format_datetime(event.date)}'
+    yield f'SUMMARY:{escape_text(event.title)}'
+    if event.description:
+        yield f'DESCRIPTION:{escape_text(event.description)}'
+    if event.location:
+        yield f'LOCATION:{escape_text(event.location)}'
+    if event.latitude is not None and event.longitude is not None:
+        yield f'GEO:{event.latitude:.6f};{event.longitude:.6f}'
+    if url:
+        yield f'URL:{url}'
+    yield 'END:VEVENT'
+
+
+def render_calendar(events, name, url_for=None):
+    """
+    Yields a VCALENDAR containing `events`, one chunk per event.
+    url_for(event), if given, supplies each event's URL property.
+    """
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ]
+    yield ''.join(fold(line) for line in header)
+    for event in events:
+        url = url_for(event) if url_for else None
+        yield ''.join(fold(line) for line in event_lines(event, url))
+    yield fold('END:VCALENDAR')
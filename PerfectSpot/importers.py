@@ -0,0 +1,235 @@
+"""
+Bulk CSV import of events (EventAdmin's "Import CSV").
+
+The upload is read one row at a time and written in chunks: one in_bulk()
+lookup resolves a chunk's creators and one bulk_create() inserts it, each
+chunk in its own transaction. bulk_create skips Event.save() and the
+post_save signals, so the geohash, the creators' events_count and the
+public listing cache are taken care of here.
+
+Rows that can't be imported don't stop the import; they are written, with
+their line number and the reason, to an ErrorReport the admin can download.
+"""
+import csv
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from io import TextIOWrapper
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from PerfectSpot import public_cache
+from PerfectSpot.models import CustomUser, Event
+from PerfectSpot.signals import bump, invalidate_cache
+
+REQUIRED_COLUMNS = ['title', 'description', 'location', 'date', 'creator', 'is_promoted']
+DATE_FORMAT = '%Y-%m-%d %H:%M'
+CHUNK_SIZE = 1000
+
+
+class CsvFormatError(Exception):
+    """The file as a whole can't be imported (e.g. required columns are missing)."""
+
+
+def report_path(report_id):
+    return Path(settings.IMPORT_REPORT_DIR) / f'{report_id}.csv'
+
+
+class ErrorReport:
+    """
+    Rejected rows as CSV: the line number, the reason, then the row as
+    uploaded, so it can be fixed and imported again. The file is only
+    created once there is something to put in it.
+
+    A resumed import (jobs.py) passes the report_id and offset it recorded
+    with its last committed chunk; anything written after that is dropped.
+    """
+
+    def __init__(self, fieldnames, report_id=None, offset=0):
+        self.fieldnames = ['line', 'error', *fieldnames]
+        self.count = 0
+        self.report_id = report_id
+        self._offset = offset
+        self._file = None
+        self._writer = None
+
+    def add(self, line, row, error):
+        if self._writer is None:
+            self._open()
+        self._writer.writerow({**row, 'line': line, 'error': error})
+        self.count += 1
+
+    def _open(self):
+        if self.report_id is None:
+            self.report_id = uuid.uuid4()
+        path = report_path(self.report_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self._offset and path.exists():
+            self._file = open(path, 'r+', newline='', encoding='utf-8')
+            self._file.truncate(self._offset)
+            self._file.seek(self._offset)
+            self._writer = csv.DictWriter(self._file, self.fieldnames, extrasaction='ignore')
+        else:
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, self.fieldnames, extrasaction='ignore')
+            self._writer.writeheader()
+
+    @property
+    def offset(self):
+        """Size of the report so far, flushed to disk."""
+        if self._file is None:
+            return self._offset
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def read_header(binary_file):
+    """Checks the header row without consuming the file; raises CsvFormatError."""
+    position = binary_file.tell()
+    line = binary_file.readline().decode('utf-8-sig', errors='replace')
+    binary_file.seek(position)
+    fieldnames = next(csv.reader([line]), [])
+    missing = [column for column in REQUIRED_COLUMNS if column not in fieldnames]
+    if missing:
+        raise CsvFormatError(f"Missing columns: {', '.join(missing)}")
+    return fieldnames
+
+
+def import_events(binary_file, chunk_size=CHUNK_SIZE, start=0, report_id=None, report_offset=0,
+                  on_chunk=None):
+    """
+    Imports events from an uploaded CSV file object (opened in binary mode).
+    Returns (imported_count, ErrorReport). Raises CsvFormatError if the
+    header is missing required columns.
+
+    To resume an interrupted import, pass start (data rows already done)
+    and the report_id / report_offset it had reached. on_chunk(rows_done,
+    imported, rejected, report) runs inside each chunk's transaction, so
+    progress it saves commits or rolls back together with the chunk.
+    """
+    reader = csv.DictReader(TextIOWrapper(binary_file, encoding='utf-8-sig', newline=''))
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise CsvFormatError(f"Missing columns: {', '.join(missing)}")
+
+    report = ErrorReport(reader.fieldnames, report_id, report_offset)
+    imported = 0
+    rows_done = start
+    try:
+        for _ in islice(reader, start):
+            pass
+        while True:
+            # line_num is read after each row, so it's the row's (last) line
+            chunk = [(reader.line_num, row) for row in islice(reader, chunk_size)]
+            if not chunk:
+                break
+            rows_done += len(chunk)
+            imported += _import_chunk(chunk, report, rows_done, on_chunk)
+    finally:
+        report.close()
+    return imported, report
+
+
+def _import_chunk(chunk, report, rows_done, on_chunk):
+    creators = CustomUser.objects.in_bulk(
+        {(row.get('creator') or '').strip() for _, row in chunk}, field_name='username'
+    )
+    events, accepted, rejected = [], [], []
+    for line, row in chunk:
+        try:
+            events.append(_build_event(row, creators))
+        except ValueError as e:
+            rejected.append((line, row, str(e)))
+        else:
+            accepted.append((line, row))
+
+    imported = 0
+    with transaction.atomic():
+        if events:
+            try:
+                with transaction.atomic():
+                    _insert(events)
+                imported = len(events)
+            except DatabaseError as e:
+                rejected += [(line, row, f"Not imported, its chunk failed: {e}") for line, row in accepted]
+                rejected.sort(key=lambda item: item[0])
+        for line, row, error in rejected:
+            report.add(line, row, error)
+        if on_chunk is not None:
+            on_chunk(rows_done, imported, len(rejected), report)
+    return imported
+
+
+def _insert(events):
+    Event.objects.bulk_create(events)
+    # What count_created_event() would have done, one UPDATE per
+    # distinct number of new events rather than one per event.
+    by_delta = defaultdict(list)
+    for creator_id, delta in Counter(event.creator_id for event in events).items():
+        by_delta[delta].append(creator_id)
+    for delta, creator_ids in by_delta.items():
+        bump(CustomUser.objects.filter(pk__in=creator_ids), 'events_count', delta)
+    invalidate_cache(public_cache.EVENTS)
+
+
+def _build_event(row, creators):
+    """An unsaved Event for one CSV row; raises ValueError explaining a bad row."""
+    def value(column):
+        return row.get(column) or ''
+
+    username = value('creator').strip()
+    creator = creators.get(username)
+    if creator is None:
+        raise ValueError(f"User '{username}' does not exist.")
+
+    try:
+        date = datetime.strptime(value('date').strip(), DATE_FORMAT)
+    except ValueError:
+        raise ValueError(f"Invalid date '{value('date')}', expected YYYY-MM-DD HH:MM.")
+    if settings.USE_TZ:
+        date = timezone.make_aware(date)
+
+    event = Event(
+        title=value('title'),
+        description=value('description'),
+        location=value('location'),
+        date=date,
+        creator=creator,
+        is_promoted=value('is_promoted').strip().lower() in ('true', '1', 'yes'),
+        latitude=_number(row, 'latitude', float),
+        longitude=_number(row, 'longitude', float),
+        capacity=_number(row, 'capacity', int),
+    )
+    if event.latitude is not None and not -90 <= event.latitude <= 90:
+        raise ValueError("latitude: must be between -90 and 90.")
+    if event.longitude is not None and not -180 <= event.longitude <= 180:
+        raise ValueError("longitude: must be between -180 and 180.")
+    event.fill_derived_fields()
+
+    try:
+        # creator is already known to exist; validating it would cost a query per row
+        event.clean_fields(exclude=['creator'])
+    except ValidationError as e:
+        raise ValueError('; '.join(
+            f"{field}: {' '.join(messages)}" for field, messages in e.message_dict.items()
+        ))
+    return event
+
+
+def _number(row, column, kind):
+    raw = (row.get(column) or '').strip()
+    if not raw:
+        return None
+    try:
+        return kind(raw)
+    except ValueError:
+        raise ValueError(f"{column}: '{raw}' is not a valid number.")
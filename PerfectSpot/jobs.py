@@ -0,0 +1,187 @@
+"""
+Database-backed background jobs, for admin work too slow for a request.
+
+The admin enqueues a Job row; `manage.py run_jobs` claims queued jobs and
+runs the task registered for their kind. There is no broker: claiming is a
+conditional UPDATE on the job row, so any number of workers can share the
+table without running a job twice.
+
+Tasks report progress through the job row inside the same transaction as
+the work itself (see import_events_task), which is what makes a crashed
+job resumable: once its heartbeat is older than JOB_STALE_SECONDS, the
+next worker claims it again and continues from job.checkpoint. Claiming
+and running read from the primary only, since a checkpoint read from a
+lagging replica would repeat work.
+"""
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib import admin
+from django.db.models import F, Q
+from django.utils import timezone
+
+from PerfectSpot import exporters, importers, routing
+from PerfectSpot.models import Event, Job, Review
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(kind):
+    """Registers the function that runs jobs of `kind`; it receives the Job."""
+    def register(func):
+        TASKS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, params=None, input_file=None, user=None):
+    job = Job(kind=kind, params=params or {}, created_by=user)
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file, save=False)
+    job.save()
+    return job
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next(worker=None):
+    """
+    Marks the oldest runnable job as running for this worker and returns it,
+    or None if there is nothing to do. Runnable means queued, or running
+    with a heartbeat older than JOB_STALE_SECONDS (its worker died).
+    """
+    stale = timezone.now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    runnable = Q(status=Job.QUEUED) | Q(status=Job.RUNNING, heartbeat_at__lt=stale)
+    with routing.use_primary():
+        for job in Job.objects.filter(runnable).order_by('created_at', 'id')[:10]:
+            now = timezone.now()
+            # Only one worker's UPDATE can still match status and heartbeat.
+            claimed = Job.objects.filter(
+                runnable, pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at
+            ).update(
+                status=Job.RUNNING, worker=worker or worker_name(), attempts=F('attempts') + 1,
+                started_at=job.started_at or now, heartbeat_at=now,
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+    return None
+
+
+def run(job):
+    """Runs a claimed job to completion, recording the outcome on the row."""
+    with routing.use_primary():
+        if job.attempts > settings.JOB_MAX_ATTEMPTS:
+            _finish(job, Job.FAILED, f"Gave up after {job.attempts - 1} attempts.")
+            return
+        try:
+            message = TASKS[job.kind](job)
+        except Exception as e:
+            logger.exception("Job %s failed", job.pk)
+            _finish(job, Job.FAILED, f"{type(e).__name__}: {e}")
+        else:
+            _finish(job, Job.SUCCEEDED, message or '')
+
+
+def _finish(job, status, message):
+    if job.input_file:
+        # Nothing reads the upload once the job is over, whatever the outcome.
+        job.input_file.delete(save=False)
+    Job.objects.filter(pk=job.pk).update(
+        status=status, message=message, finished_at=timezone.now(), input_file='',
+    )
+    job.refresh_from_db()
+
+
+def record_progress(job, rows, succeeded=0, errors=0, **checkpoint):
+    """Adds one chunk's counts to the job and moves its checkpoint and heartbeat."""
+    Job.objects.filter(pk=job.pk).update(
+        rows_processed=rows,
+        rows_succeeded=F('rows_succeeded') + succeeded,
+        error_count=F('error_count') + errors,
+        checkpoint={**job.checkpoint, 'rows': rows, **checkpoint},
+        heartbeat_at=timezone.now(),
+    )
+
+
+@task(Job.IMPORT_EVENTS)
+def import_events_task(job):
+    checkpoint = job.checkpoint
+
+    def on_chunk(rows_done, imported, rejected, report):
+        if report.report_id is not None and job.report_id is None:
+            job.report_id = report.report_id
+            Job.objects.filter(pk=job.pk).update(report_id=report.report_id)
+        record_progress(job, rows_done, imported, rejected, report_offset=report.offset)
+
+    with job.input_file.open('rb') as f:
+        importers.import_events(
+            f,
+            chunk_size=job.params.get('chunk_size', importers.CHUNK_SIZE),
+            start=checkpoint.get('rows', 0),
+            report_id=job.report_id,
+            report_offset=checkpoint.get('report_offset', 0),
+            on_chunk=on_chunk,
+        )
+    job.refresh_from_db()
+    return f"Imported {job.rows_succeeded} events, {job.error_count} rows rejected."
+
+
+SOURCES = {'events': Event, 'reviews': Review}
+
+
+def selected(model, selection):
+    """
+    The queryset an admin selection stands for: {"ids": [...]} for ticked
+    rows, or {"all": true, "filters": {...}, "search": "..."} for every row
+    matching the changelist's filters and search box.
+    """
+    qs = model.objects.all()
+    if 'ids' in selection:
+        return qs.filter(pk__in=selection['ids'])
+    qs = qs.filter(**selection.get('filters', {}))
+    if selection.get('search'):
+        model_admin = admin.site._registry[model]
+        qs, may_have_duplicates = model_admin.get_search_results(None, qs, selection['search'])
+        if may_have_duplicates:
+            qs = qs.distinct()
+    return qs
+
+
+@task(Job.EXPORT)
+def export_task(job):
+    """
+    Writes an exporters dataset to a file under JOB_FILES_DIR. params:
+    dataset, format, and optionally source ("events"/"reviews") with an
+    admin selection (see selected()) to export only those rows. An export
+    can't resume half-way, so a retried job starts the file over.
+    """
+    params = job.params
+    dataset, fmt = params['dataset'], params.get('format', 'csv')
+    source = params.get('source')
+    limit = {source: selected(SOURCES[source], params['selection'])} if source else {}
+    rows = exporters.export_queryset(dataset, **limit)
+    Job.objects.filter(pk=job.pk).update(rows_processed=0, rows_succeeded=0)
+    written = 0
+
+    def on_chunk(count):
+        nonlocal written
+        written += count
+        record_progress(job, written, count)
+
+    storage = job.output_file.storage
+    name = f"output/{dataset}-job{job.pk}.{fmt}"
+    os.makedirs(os.path.dirname(storage.path(name)), exist_ok=True)
+    with open(storage.path(name), 'w', newline='', encoding='utf-8') as out:
+        out.writelines(exporters.stream(
+            dataset, fmt, rows, params.get('chunk_size', exporters.CHUNK_SIZE), on_chunk=on_chunk,
+        ))
+    Job.objects.filter(pk=job.pk).update(output_file=name)
+    return f"Exported {written} {dataset} rows."
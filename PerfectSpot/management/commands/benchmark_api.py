@@ -0,0 +1,81 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from PerfectSpot import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every API endpoint against a freshly seeded test database: p50/p95 "
+        "latency, query count and response size, written as JSON. Fails when an "
+        "endpoint goes over its query budget or latency threshold (PerfectSpot/benchmarks.py)."
+    )
+
+    def add_arguments(self, parser):
+        for option, default in benchmarks.DATASET.items():
+            parser.add_argument(f"--{option.replace('_', '-')}", type=int, default=default,
+                                help=f"Rows seeded by seed_data (default: {default})")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+        parser.add_argument("--iterations", type=int, default=20,
+                            help="Requests per endpoint (default: 20)")
+        parser.add_argument("--endpoint", action="append", dest="endpoints",
+                            help="Only this endpoint (repeatable), e.g. --endpoint event_list")
+        parser.add_argument("--latency-factor", type=float, default=1.0,
+                            help="Multiplies every latency threshold, for slower machines (default: 1)")
+        parser.add_argument("--output", default="benchmark.json",
+                            help="Report file (default: benchmark.json)")
+
+    def handle(self, *args, **options):
+        unknown = set(options["endpoints"] or []) - {e.name for e in benchmarks.ENDPOINTS}
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+        uncovered = benchmarks.uncovered_routes()
+        if uncovered:
+            self.stdout.write(self.style.WARNING(
+                f"Routes with no benchmark: {', '.join(uncovered)}"
+            ))
+
+        # The numbers have to come from the same data every run, so the
+        # benchmark seeds (and then drops) the test database, never the real one.
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            self.stdout.write("→ Seeding the test database...")
+            call_command(
+                "seed_data", seed=options["seed"], stdout=StringIO(),
+                **{option: options[option] for option in benchmarks.DATASET},
+            )
+            self.stdout.write(f"{'endpoint':<28}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'bytes':>10}")
+            report = benchmarks.run(
+                iterations=options["iterations"],
+                names=options["endpoints"],
+                latency_factor=options["latency_factor"],
+                on_result=self._print_result,
+            )
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        report["seed"] = options["seed"]
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(f"→ Report written to {options['output']}.")
+
+        if report["failed"]:
+            raise CommandError(f"Over budget: {', '.join(report['failed'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"→ All {len(report['endpoints'])} endpoints within budget."
+        ))
+
+    def _print_result(self, name, result):
+        line = (f"{name:<28}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}"
+                f"{result['queries']:>9}{result['bytes']:>10}")
+        if result["violations"]:
+            line = self.style.ERROR(f"{line}  {'; '.join(result['violations'])}")
+        self.stdout.write(line)
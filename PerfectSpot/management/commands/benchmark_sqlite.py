@@ -0,0 +1,130 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from PerfectSpot.sqlite_tuning import apply_pragmas
+
+# SQLite's own defaults, as Django connects without SQLITE_PRAGMAS
+# (Python's sqlite3 module waits 5 s for locks).
+BASELINE = {'journal_mode': 'delete', 'synchronous': 'full', 'busy_timeout': 5000}
+
+SCHEMA = """
+    CREATE TABLE event (
+        id INTEGER PRIMARY KEY, title TEXT, date TEXT,
+        capacity INTEGER, attendees_count INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX event_date_id_idx ON event(date, id);
+    CREATE TABLE attendance (
+        id INTEGER PRIMARY KEY, event_id INTEGER, user_id INTEGER,
+        UNIQUE (user_id, event_id)
+    );
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure SQLite throughput with concurrent readers (listing pages) and "
+        "writers (RSVPs), with default settings and with SQLITE_PRAGMAS"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=8)
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+        parser.add_argument("--events", type=int, default=2000, help="Events seeded into the scratch database")
+
+    def handle(self, *args, **options):
+        runs = [("default", BASELINE), ("tuned", settings.SQLITE_PRAGMAS)]
+        self.stdout.write(
+            f"{options['readers']} readers, {options['writers']} writers, "
+            f"{options['seconds']:g}s per run\n"
+        )
+        self.stdout.write(f"{'config':<10}{'reads/s':>10}{'writes/s':>10}{'locked':>9}")
+        for name, pragmas in runs:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "bench.sqlite3")
+                self._seed(path, pragmas, options["events"])
+                reads, writes, locked = self._run(path, pragmas, options)
+            seconds = options["seconds"]
+            self.stdout.write(f"{name:<10}{reads / seconds:>10.0f}{writes / seconds:>10.0f}{locked:>9}")
+
+    def _connect(self, path, pragmas):
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves, as Django does
+        conn = sqlite3.connect(path, timeout=0, isolation_level=None, check_same_thread=False)
+        apply_pragmas(conn.cursor(), pragmas)
+        return conn
+
+    def _seed(self, path, pragmas, count):
+        conn = self._connect(path, pragmas)
+        conn.executescript(SCHEMA)
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT INTO event (title, date, capacity) VALUES (?, ?, ?)",
+            [(f"Event {i}", f"2030-01-{1 + i % 28:02d} {i % 24:02d}:00", 100) for i in range(count)],
+        )
+        conn.execute("COMMIT")
+        conn.close()
+
+    def _run(self, path, pragmas, options):
+        stop = time.monotonic() + options["seconds"]
+        counts = {"reads": 0, "writes": 0, "locked": 0}
+        lock = threading.Lock()
+        start = threading.Barrier(options["readers"] + options["writers"])
+
+        def tally(key):
+            with lock:
+                counts[key] += 1
+
+        def reader():
+            conn = self._connect(path, pragmas)
+            start.wait()
+            while time.monotonic() < stop:
+                cursor = random.choice(["2030-01-05", "2030-01-15", "2030-01-25"])
+                try:
+                    conn.execute(
+                        "SELECT id, title, date, attendees_count FROM event "
+                        "WHERE date > ? ORDER BY date, id LIMIT 50", [cursor]
+                    ).fetchall()
+                    tally("reads")
+                except sqlite3.OperationalError:
+                    tally("locked")
+            conn.close()
+
+        def writer(worker):
+            conn = self._connect(path, pragmas)
+            user_id = worker * 10_000_000
+            start.wait()
+            while time.monotonic() < stop:
+                user_id += 1
+                event_id = random.randint(1, options["events"])
+                try:
+                    # Same shape as attendance.set_attendance(): take a seat
+                    # with a conditional UPDATE, then insert the attendance row.
+                    conn.execute("BEGIN")
+                    seat = conn.execute(
+                        "UPDATE event SET attendees_count = attendees_count + 1 "
+                        "WHERE id = ? AND attendees_count < capacity", [event_id]
+                    )
+                    if seat.rowcount:
+                        conn.execute("INSERT INTO attendance (event_id, user_id) VALUES (?, ?)", [event_id, user_id])
+                    conn.execute("COMMIT")
+                    tally("writes")
+                except sqlite3.OperationalError:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    tally("locked")
+            conn.close()
+
+        threads = [threading.Thread(target=reader) for _ in range(options["readers"])]
+        threads += [threading.Thread(target=writer, args=(i,)) for i in range(options["writers"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts["reads"], counts["writes"], counts["locked"]
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from PerfectSpot import exporters
+from PerfectSpot.models import Event
+
+
+class Command(BaseCommand):
+    help = "Stream events (with attendee counts), attendee lists or reviews as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(exporters.DATASETS))
+        parser.add_argument("--format", choices=sorted(exporters.FORMATS), default="csv")
+        parser.add_argument("--event", type=int, action="append", dest="events",
+                            help="Only this event (repeatable), e.g. to answer \"who attended X\"")
+        parser.add_argument("--output", help="File to write (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=exporters.CHUNK_SIZE,
+                            help=f"Rows fetched and written per block (default: {exporters.CHUNK_SIZE})")
+
+    def handle(self, *args, **options):
+        events = Event.objects.filter(pk__in=options["events"]) if options["events"] else None
+        rows = exporters.export_queryset(options["dataset"], events=events)
+        blocks = exporters.stream(options["dataset"], options["format"], rows, options["chunk_size"])
+
+        if options["output"]:
+            with open(options["output"], "w", newline="", encoding="utf-8") as out:
+                out.writelines(blocks)
+            self.stderr.write(self.style.SUCCESS(f"→ Wrote {options['output']}."))
+        else:
+            # Every block already ends in a newline, so write() adds none
+            for block in blocks:
+                self.stdout.write(block)
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from PerfectSpot.stats import percentile
+
+
+async def fetch(url, token=None, timeout=10.0):
+    """One GET over a fresh connection; returns the status code."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Connection: close"]
+    if token:
+        lines.append(f"Authorization: Bearer {token}")
+
+    async def exchange():
+        reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=parts.scheme == "https")
+        try:
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            await reader.read()  # drain the body; the server closes the connection
+        finally:
+            writer.close()
+        return int(status_line.split()[1])
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test an endpoint served by WSGI against its /api/async/ twin served "
+        "by ASGI, at increasing concurrency. Both servers must already be running."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi-url", required=True,
+                            help="e.g. http://127.0.0.1:8000/api/events/")
+        parser.add_argument("--asgi-url", required=True,
+                            help="e.g. http://127.0.0.1:8001/api/async/events/")
+        parser.add_argument("--concurrency", default="1,8,32,128",
+                            help="Comma-separated numbers of requests kept in flight (default: 1,8,32,128)")
+        parser.add_argument("--requests", type=int, default=500,
+                            help="Requests per target and concurrency level (default: 500)")
+        parser.add_argument("--token", help="JWT access token sent as a Bearer Authorization header")
+        parser.add_argument("--timeout", type=float, default=10.0,
+                            help="Seconds before a request counts as an error (default: 10)")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers")
+        if any(level < 1 for level in levels) or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive")
+
+        targets = [("wsgi", options["wsgi_url"]), ("asgi", options["asgi_url"])]
+        self.stdout.write(f"{options['requests']} requests per run\n")
+        self.stdout.write(f"{'target':<8}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        for level in levels:
+            for name, url in targets:
+                elapsed, latencies, errors = asyncio.run(
+                    self._run(url, level, options["requests"], options["token"], options["timeout"])
+                )
+                if latencies:
+                    p50 = f"{percentile(latencies, 50) * 1000:.1f}"
+                    p95 = f"{percentile(latencies, 95) * 1000:.1f}"
+                else:
+                    p50 = p95 = "-"
+                self.stdout.write(
+                    f"{name:<8}{level:>6}{len(latencies) / elapsed:>10.0f}{p50:>10}{p95:>10}{errors:>8}"
+                )
+        self.stdout.write(self.style.SUCCESS("→ Done."))
+
+    async def _run(self, url, concurrency, total, token, timeout):
+        latencies, errors = [], 0
+        remaining = total
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    status = await fetch(url, token, timeout)
+                except (OSError, asyncio.TimeoutError, ValueError, IndexError):
+                    errors += 1
+                    continue
+                if status >= 400:
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+        return time.perf_counter() - started, latencies, errors
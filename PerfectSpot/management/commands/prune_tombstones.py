@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from PerfectSpot.models import EventTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete event tombstones older than the sync cursor retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+                            help="Keep tombstones this many days (default: SYNC_TOMBSTONE_RETENTION_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=5000,
+                            help="Rows deleted per statement (default: 5000)")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        removed = 0
+        while True:
+            ids = list(
+                EventTombstone.objects.filter(deleted_at__lt=cutoff)
+                .order_by("deleted_at", "id")
+                .values_list("id", flat=True)[:options["batch_size"]]
+            )
+            if not ids:
+                break
+            removed += EventTombstone.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"→ Removed {removed} tombstones older than {cutoff:%Y-%m-%d}."))
@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from PerfectSpot.models import CustomUser, Event
+
+
+class Command(BaseCommand):
+    help = "Recompute friends_count, events_count and attendees_count and fix any that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Rows recomputed per transaction (default: 1000)")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        friends = CustomUser.friends.through
+        attendees = Event.attendees.through
+
+        fixed_users = self._repair(
+            CustomUser, batch_size,
+            {
+                "friends_count": lambda ids: self._grouped(friends, "from_customuser_id", ids),
+                "events_count": lambda ids: self._grouped(Event, "creator_id", ids),
+            },
+        )
+        self.stdout.write(self.style.SUCCESS(f"→ Repaired counters on {fixed_users} users."))
+
+        fixed_events = self._repair(
+            Event, batch_size,
+            {"attendees_count": lambda ids: self._grouped(attendees, "event_id", ids)},
+        )
+        self.stdout.write(self.style.SUCCESS(f"→ Repaired counters on {fixed_events} events."))
+
+    @staticmethod
+    def _grouped(model, key, ids):
+        rows = (
+            model.objects.filter(**{f"{key}__in": ids})
+            .values(key)
+            .annotate(n=Count("*"))
+            .values_list(key, "n")
+        )
+        return dict(rows)
+
+    def _repair(self, model, batch_size, counters):
+        """
+        Walks the table in primary-key order, one short transaction per
+        batch, so live traffic is never blocked for long.
+        """
+        fields = list(counters)
+        fixed = 0
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    model.objects.select_for_update()
+                    .filter(pk__gt=last_pk)
+                    .order_by("pk")
+                    .only("pk", *fields)[:batch_size]
+                )
+                if not batch:
+                    break
+                ids = [obj.pk for obj in batch]
+                actual = {field: compute(ids) for field, compute in counters.items()}
+
+                stale = []
+                for obj in batch:
+                    changed = False
+                    for field in fields:
+                        value = actual[field].get(obj.pk, 0)
+                        if getattr(obj, field) != value:
+                            setattr(obj, field, value)
+                            changed = True
+                    if changed:
+                        stale.append(obj)
+                if stale:
+                    model.objects.bulk_update(stale, fields)
+                fixed += len(stale)
+                last_pk = ids[-1]
+        return fixed
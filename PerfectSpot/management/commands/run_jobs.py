@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from PerfectSpot import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (CSV imports, ...) from the database queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Exit when the queue is empty instead of waiting for more jobs")
+        parser.add_argument("--poll", type=float, default=2.0,
+                            help="Seconds between checks of an empty queue (default: 2)")
+
+    def handle(self, *args, **options):
+        worker = jobs.worker_name()
+        self.stdout.write(f"→ Worker {worker} started.")
+        try:
+            while True:
+                job = jobs.claim_next(worker)
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+                    continue
+                self.stdout.write(f"→ Running {job}...")
+                jobs.run(job)
+                style = self.style.SUCCESS if job.status == job.SUCCEEDED else self.style.ERROR
+                self.stdout.write(style(f"→ {job}: {job.message}"))
+        except KeyboardInterrupt:
+            # A job interrupted mid-chunk is resumed by the next worker once stale.
+            self.stdout.write("→ Stopped.")
@@ -1,99 +1,291 @@
-from django.core.management.base import BaseCommand
-from django.contrib.auth import get_user_model
-from django.utils import timezone
-from datetime import timedelta
+import multiprocessing
 import random
+import time
+from datetime import datetime, time as dt_time, timedelta
 
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
 from faker import Faker
-from PerfectSpot.models import Event
+
+from PerfectSpot import public_cache
+from PerfectSpot.models import Attendance, Event, FriendRequest, Review
 
 User = get_user_model()
 
+# Text is drawn from pools generated once per run: Faker is far too slow to
+# call per row at millions of rows, and pools keep every chunk reproducible.
+POOL_SIZE = 500
+
+# Settings shared by the chunk generators, filled in by _init_worker()
+PLAN = {}
+
 
 class Command(BaseCommand):
-    help = "Seed the database with random users, events (in Poland), and random attendance"
+    help = (
+        "Seed the database with random users, events (in Poland), attendance, friendships, "
+        "friend requests and reviews. Rows are bulk-inserted in chunks; the same --seed "
+        "produces the same data (dates are relative to today)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--events", type=int, default=100)
+        parser.add_argument("--attendances", type=int, default=500,
+                            help="About this many RSVPs, spread over the events (default: 500)")
+        parser.add_argument("--friendships", type=int, default=100)
+        parser.add_argument("--friend-requests", type=int, default=50)
+        parser.add_argument("--reviews", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+        parser.add_argument("--chunk-size", type=int, default=5000,
+                            help="Rows generated and inserted per transaction (default: 5000)")
+        parser.add_argument("--workers", type=int, default=1,
+                            help="Processes inserting chunks in parallel; PostgreSQL/MySQL only (default: 1)")
+        parser.add_argument("--password", default="password123",
+                            help="Password of every seeded user (hashed once)")
 
     def handle(self, *args, **options):
-        faker = Faker()
-        NUM_USERS = 50
-        NUM_EVENTS = 100
-
-        # --- 1) Create random users ---
-        users = []
-        self.stdout.write("Deleting any existing users/events...")
-        # (Uncomment below if you want to wipe data completely each run)
-        # Event.objects.all().delete()
-        # User.objects.exclude(is_superuser=True).delete()  # keep superuser if exists
-
-        self.stdout.write("Creating users...")
-        for _ in range(NUM_USERS):
-            utype = random.choice(["individual", "organization"])
-            username = faker.unique.user_name()
-            email = faker.unique.email()
-            password = "password123"
-
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=password,
-                user_type=utype
-            )
-            if utype == "organization":
-                user.organization_name = faker.company()
-                user.is_org_verified = random.choice([True, False])
-                user.save()
-
-            users.append(user)
-
-        self.stdout.write(self.style.SUCCESS(f"→ Created {len(users)} users."))
-
-        # --- 2) Create random events ---
-        events = []
-        self.stdout.write("Creating events...")
-        for _ in range(NUM_EVENTS):
-            title = faker.sentence(nb_words=4)
-            description = faker.paragraph(nb_sentences=3)
-            location = f"{faker.city()}, Poland"
-
-            # Poland’s approximate bounding box:
-            latitude = round(random.uniform(49.0, 55.0), 6)
-            longitude = round(random.uniform(14.0, 24.0), 6)
-
-            # Random date: mix of past and future
-            event_date = timezone.now() + timedelta(days=random.randint(-10, 60))
-
-            creator = random.choice(users)
-            is_promoted = (creator.user_type == "organization") and random.choice([True, False])
-
-            image_url = faker.image_url(width=640, height=480)
-
-            event = Event.objects.create(
-                title=title,
-                description=description,
-                location=location,
-                date=event_date,
-                creator=creator,
-                is_promoted=is_promoted,
-                latitude=latitude,
-                longitude=longitude,
-                image_url=image_url
-            )
-            events.append(event)
-
-        self.stdout.write(self.style.SUCCESS(f"→ Created {len(events)} events in Poland."))
-
-        # --- 3) Randomly assign attendees to each event ---
-        self.stdout.write("Assigning attendees to events...")
-        for event in events:
-            # Choose a random number of attendees between 0 and 10
-            num_attendees = random.randint(0, 10)
-            # Pick that many distinct users, excluding the creator
-            possible_attendees = [u for u in users if u != event.creator]
-            attendees_sample = random.sample(possible_attendees,
-                                             min(len(possible_attendees), num_attendees))
-            for attendee in attendees_sample:
-                event.attendees.add(attendee)
-            event.save()
-
-        self.stdout.write(self.style.SUCCESS("→ Random attendance assignment complete."))
+        if options["users"] < 2 and (options["attendances"] or options["friendships"]
+                                     or options["friend_requests"]):
+            raise CommandError("At least 2 users are needed for attendance and friendships")
+        if options["events"] and not options["users"]:
+            raise CommandError("Events need at least one user as creator")
+
+        plan = {
+            "seed": options["seed"],
+            "chunk_size": options["chunk_size"],
+            "password": make_password(options["password"]),
+            "today": timezone.make_aware(datetime.combine(timezone.localdate(), dt_time(12))),
+            # Explicit primary keys: chunks know every id up front and can be
+            # inserted in any order, by any worker.
+            "user_start": (User.objects.aggregate(n=Max("id"))["n"] or 0) + 1,
+            "users": options["users"],
+            "event_start": (Event.objects.aggregate(n=Max("id"))["n"] or 0) + 1,
+            "events": options["events"],
+            "attendances_per_event": options["attendances"] / options["events"] if options["events"] else 0,
+            "pools": _pools(options["seed"]),
+        }
+
+        # The last item counts the phase's rows for the report, where chunks
+        # can't: random pairs may repeat across chunks, or already exist.
+        phases = [
+            ("users", options["users"], _users_chunk, None),
+            ("events and attendance", options["events"], _events_chunk, None),
+            ("friendships", options["friendships"], _friendships_chunk,
+             lambda: User.friends.through.objects.count() // 2),
+            ("friend requests", options["friend_requests"], _friend_requests_chunk,
+             FriendRequest.objects.count),
+            ("reviews", options["reviews"], _reviews_chunk, None),
+        ]
+        workers = options["workers"]
+        if workers > 1 and connection.vendor == "sqlite":
+            # Parallel writers would only queue on SQLite's database lock.
+            self.stdout.write("SQLite allows a single writer; seeding with 1 worker.")
+            workers = 1
+        pool = None
+        if workers > 1:
+            # Forked workers must not share the parent's database connection.
+            connections.close_all()
+            pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(plan,))
+        _init_worker(plan)
+        try:
+            for name, total, generate, count_rows in phases:
+                started = time.monotonic()
+                before = count_rows() if count_rows else 0
+                chunks = [(start, min(plan["chunk_size"], total - start))
+                          for start in range(0, total, plan["chunk_size"])]
+                results = pool.starmap(generate, chunks) if pool else [generate(*chunk) for chunk in chunks]
+                created = count_rows() - before if count_rows else sum(results)
+                elapsed = time.monotonic() - started
+                self.stdout.write(self.style.SUCCESS(
+                    f"→ Created {created} {name} in {elapsed:.1f}s."
+                ))
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        with connection.cursor() as cursor:
+            # Postgres sequences don't see explicitly inserted ids.
+            for sql in connection.ops.sequence_reset_sql(no_style(), [User, Event]):
+                cursor.execute(sql)
+
+        # bulk_create skips the signals that maintain the counters and the cache.
+        call_command("repair_counters", batch_size=5000, stdout=self.stdout)
+        public_cache.invalidate(public_cache.EVENTS)
         self.stdout.write(self.style.SUCCESS("Database seed complete."))
+
+
+def _pools(seed):
+    faker = Faker()
+    faker.seed_instance(seed)
+    return {
+        "first_names": [faker.first_name() for _ in range(POOL_SIZE)],
+        "last_names": [faker.last_name() for _ in range(POOL_SIZE)],
+        "companies": [faker.company() for _ in range(POOL_SIZE)],
+        "titles": [faker.sentence(nb_words=4) for _ in range(POOL_SIZE)],
+        "paragraphs": [faker.paragraph(nb_sentences=3) for _ in range(POOL_SIZE)],
+        "cities": [faker.city() for _ in range(POOL_SIZE)],
+        "image_urls": [faker.image_url(width=640, height=480) for _ in range(POOL_SIZE)],
+        "comments": [faker.sentence(nb_words=12) for _ in range(POOL_SIZE)],
+    }
+
+
+def _init_worker(plan):
+    if not apps.ready:  # spawned (not forked) worker
+        django.setup()
+    PLAN.clear()
+    PLAN.update(plan)
+
+
+def _rng(phase, start):
+    # One stream per chunk, so the data doesn't depend on --workers.
+    return random.Random(f"{PLAN['seed']}:{phase}:{start}")
+
+
+def _is_organization(user_id):
+    # Derived from the id so event chunks know it without a query.
+    return user_id % 2 == 0
+
+
+def _random_user(rng):
+    return PLAN["user_start"] + rng.randrange(PLAN["users"])
+
+
+def _users_chunk(start, count):
+    rng, pools = _rng("users", start), PLAN["pools"]
+    users = []
+    for i in range(start, start + count):
+        pk = PLAN["user_start"] + i
+        first, last = rng.choice(pools["first_names"]), rng.choice(pools["last_names"])
+        username = f"{first}.{last}{pk}".lower()
+        organization = _is_organization(pk)
+        users.append(User(
+            id=pk,
+            username=username,
+            username_lower=username,  # save() isn't called
+            email=f"{username}@example.com",
+            password=PLAN["password"],
+            first_name=first,
+            last_name=last,
+            user_type=User.ORGANIZATION if organization else User.INDIVIDUAL,
+            organization_name=rng.choice(pools["companies"]) if organization else None,
+            is_org_verified=organization and rng.random() < 0.5,
+        ))
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+    return len(users)
+
+
+def _events_chunk(start, count):
+    rng, pools = _rng("events", start), PLAN["pools"]
+    events, attendances = [], []
+    for i in range(start, start + count):
+        creator_id = _random_user(rng)
+        capacity = rng.choice([None, None, 20, 50, 200])
+        event = Event(
+            id=PLAN["event_start"] + i,
+            title=rng.choice(pools["titles"]),
+            description=rng.choice(pools["paragraphs"]),
+            location=f"{rng.choice(pools['cities'])}, Poland",
+            # Poland's approximate bounding box
+            latitude=round(rng.uniform(49.0, 55.0), 6),
+            longitude=round(rng.uniform(14.0, 24.0), 6),
+            # A mix of past and future events
+            date=PLAN["today"] + timedelta(days=rng.randint(-10, 60), minutes=15 * rng.randrange(48)),
+            creator_id=creator_id,
+            is_promoted=_is_organization(creator_id) and rng.random() < 0.5,
+            image_url=rng.choice(pools["image_urls"]),
+            capacity=capacity,
+        )
+        event.fill_derived_fields()  # save() isn't called
+        events.append(event)
+
+        wanted = rng.randint(0, round(2 * PLAN["attendances_per_event"]))
+        wanted = min(wanted, PLAN["users"] - 1, capacity if capacity is not None else wanted)
+        attendees = {_random_user(rng) for _ in range(wanted)} - {creator_id}
+        attendances.extend(
+            Attendance(event_id=event.id, user_id=user_id, event_date=event.date)
+            for user_id in sorted(attendees)
+        )
+    with transaction.atomic():
+        Event.objects.bulk_create(events)
+        Attendance.objects.bulk_create(attendances, batch_size=PLAN["chunk_size"])
+    return len(events)
+
+
+def _pairs(rng, count):
+    pairs = set()
+    for _ in range(count):
+        a, b = _random_user(rng), _random_user(rng)
+        if a != b:
+            pairs.add((min(a, b), max(a, b)))
+    return sorted(pairs)
+
+
+def _friend_pairs(pairs):
+    """The (low, high) pairs among `pairs` that are already friends."""
+    friends = User.friends.through.objects.filter(from_customuser_id__in={a for a, _ in pairs})
+    return set(friends.values_list("from_customuser_id", "to_customuser_id"))
+
+
+def _requested_pairs(pairs):
+    """The (low, high) pairs among `pairs` with a friend request either way."""
+    ids = {a for a, _ in pairs}
+    requests = FriendRequest.objects.filter(Q(from_user_id__in=ids) | Q(to_user_id__in=ids))
+    return {(min(a, b), max(a, b)) for a, b in requests.values_list("from_user_id", "to_user_id")}
+
+
+def _friendships_chunk(start, count):
+    friends = User.friends.through
+    rows = []
+    with transaction.atomic():
+        pairs = _pairs(_rng("friendships", start), count)
+        taken = _friend_pairs(pairs)
+        for a, b in pairs:
+            if (a, b) not in taken:
+                rows.append(friends(from_customuser_id=a, to_customuser_id=b))
+                rows.append(friends(from_customuser_id=b, to_customuser_id=a))
+        # A parallel worker may have inserted the same pair meanwhile.
+        friends.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows) // 2
+
+
+def _friend_requests_chunk(start, count):
+    rng = _rng("friend_requests", start)
+    requests = []
+    with transaction.atomic():
+        pairs = _pairs(rng, count)
+        # No requests between friends, and at most one per pair whichever way.
+        taken = _friend_pairs(pairs) | _requested_pairs(pairs)
+        for a, b in pairs:
+            # Drawn for every pair, so the directions don't depend on what exists.
+            forward = rng.random() < 0.5
+            if (a, b) not in taken:
+                requests.append(FriendRequest(from_user_id=a, to_user_id=b) if forward
+                                else FriendRequest(from_user_id=b, to_user_id=a))
+        FriendRequest.objects.bulk_create(requests, ignore_conflicts=True)
+    return len(requests)
+
+
+def _reviews_chunk(start, count):
+    rng, pools = _rng("reviews", start), PLAN["pools"]
+    reviews = [
+        Review(
+            event_id=PLAN["event_start"] + rng.randrange(PLAN["events"]),
+            reviewer_id=_random_user(rng),
+            rating=rng.randint(1, 5),
+            comment=rng.choice(pools["comments"]),
+        )
+        for _ in range(count if PLAN["events"] else 0)
+    ]
+    with transaction.atomic():
+        Review.objects.bulk_create(reviews)
+    return len(reviews)
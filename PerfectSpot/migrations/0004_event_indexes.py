@@ -0,0 +1,31 @@
+# Generated by Django 4.2.20 on 2026-10-18 00:36
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PerfectSpot', '0003_alter_customuser_user_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='event_images/'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['is_promoted', 'date', 'id'], name='event_promoted_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(django.db.models.functions.text.Lower('title'), name='event_title_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.20 on 2026-10-18 00:38
+
+from django.db import migrations, models
+
+from PerfectSpot import geo
+
+
+def backfill_geohash(apps, schema_editor):
+    Event = apps.get_model('PerfectSpot', 'Event')
+    batch = []
+    located = Event.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for event in located.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        event.geohash = geo.encode(event.latitude, event.longitude)
+        batch.append(event)
+        if len(batch) >= 2000:
+            Event.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        Event.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PerfectSpot', '0004_event_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
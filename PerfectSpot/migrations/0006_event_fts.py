@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from PerfectSpot import search
+
+
+def create_event_fts(apps, schema_editor):
+    search.install_event_fts(schema_editor.connection)
+
+
+def drop_event_fts(apps, schema_editor):
+    search.uninstall_event_fts(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PerfectSpot', '0005_event_geohash'),
+    ]
+
+    operations = [
+        # SQLite only; a no-op on other backends, which fall back to icontains.
+        migrations.RunPython(create_event_fts, drop_event_fts),
+    ]
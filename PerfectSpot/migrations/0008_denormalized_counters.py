@@ -0,0 +1,55 @@
+# Generated by Django 4.2.20 on 2026-10-18 00:45
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count_of(through, group_field, **filters):
+    counts = (
+        through.objects.filter(**filters)
+        .values(group_field)
+        .annotate(n=Count('*'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    CustomUser = apps.get_model('PerfectSpot', 'CustomUser')
+    Event = apps.get_model('PerfectSpot', 'Event')
+    CustomUser.objects.update(
+        friends_count=_count_of(
+            CustomUser.friends.through, 'from_customuser', from_customuser=OuterRef('pk')
+        ),
+        events_count=_count_of(Event, 'creator', creator=OuterRef('pk')),
+    )
+    Event.objects.update(
+        attendees_count=_count_of(Event.attendees.through, 'event', event=OuterRef('pk')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PerfectSpot', '0007_customuser_username_lower_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='events_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='friends_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='attendees_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
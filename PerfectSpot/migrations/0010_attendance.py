@@ -0,0 +1,112 @@
+# Generated by Django 4.2.20 on 2026-10-18 01:12
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+
+def copy_attendees(apps, schema_editor):
+    """
+    Copies the old auto-created m2m rows into Attendance, one short
+    transaction per batch so writers are only ever blocked briefly. The
+    original join time was never stored, so created_at starts at "now".
+    """
+    Event = apps.get_model('PerfectSpot', 'Event')
+    Attendance = apps.get_model('PerfectSpot', 'Attendance')
+    OldAttendee = Event.attendees.through
+    now = timezone.now()
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                OldAttendee.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'event_id', 'customuser_id', 'event__date')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            Attendance.objects.bulk_create(
+                [
+                    Attendance(
+                        event_id=event_id, user_id=user_id, event_date=event_date,
+                        created_at=now, updated_at=now,
+                    )
+                    for _, event_id, user_id, event_date in rows
+                ],
+                ignore_conflicts=True,
+            )
+        last_id = rows[-1][0]
+
+
+def copy_attendees_back(apps, schema_editor):
+    Event = apps.get_model('PerfectSpot', 'Event')
+    Attendance = apps.get_model('PerfectSpot', 'Attendance')
+    OldAttendee = Event.attendees.through
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Attendance.objects.filter(id__gt=last_id)
+                .order_by('id')
+                .values_list('id', 'event_id', 'user_id')[:BATCH_SIZE]
+            )
+            if not rows:
+                break
+            OldAttendee.objects.bulk_create(
+                [OldAttendee(event_id=event_id, customuser_id=user_id) for _, event_id, user_id in rows],
+                ignore_conflicts=True,
+            )
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+    # Each copy batch commits on its own instead of holding one long
+    # transaction over both tables.
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('PerfectSpot', '0009_event_capacity_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('confirmed', 'Confirmed'), ('promoted', 'Promoted from waitlist')], default='confirmed', max_length=20)),
+                ('source', models.CharField(choices=[('free', 'Free RSVP'), ('stripe', 'Stripe checkout')], default='free', max_length=20)),
+                ('event_date', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to='PerfectSpot.event')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendances', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['user', 'event_date'], name='attendance_user_date_idx'),
+                    models.Index(fields=['event', 'created_at'], name='attendance_event_joined_idx'),
+                ],
+                'unique_together': {('user', 'event')},
+            },
+        ),
+        migrations.RunPython(copy_attendees, copy_attendees_back),
+        # Point Event.attendees at the new table and drop the old one. Django
+        # can't AlterField an m2m onto a through model, so the state and the
+        # schema change are spelled out separately.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RemoveField(model_name='event', name='attendees'),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='event',
+                    name='attendees',
+                    field=models.ManyToManyField(blank=True, related_name='attending_events', through='PerfectSpot.Attendance', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.20 on 2026-10-18 02:15
+
+from django.db import migrations, models
+
+
+def backfill_username_lower(apps, schema_editor):
+    CustomUser = apps.get_model('PerfectSpot', 'CustomUser')
+    batch = []
+    for user in CustomUser.objects.only('id', 'username').iterator(chunk_size=2000):
+        user.username_lower = user.username.lower()
+        batch.append(user)
+        if len(batch) >= 2000:
+            CustomUser.objects.bulk_update(batch, ['username_lower'])
+            batch = []
+    if batch:
+        CustomUser.objects.bulk_update(batch, ['username_lower'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PerfectSpot', '0014_job'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='user_username_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='username_lower',
+            field=models.CharField(default='', editable=False, max_length=300),
+        ),
+        migrations.RunPython(backfill_username_lower, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['username_lower'], name='user_username_lower_idx'),
+        ),
+    ]
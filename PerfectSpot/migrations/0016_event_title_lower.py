@@ -0,0 +1,40 @@
+# Generated by Django 4.2.20 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+def backfill_title_lower(apps, schema_editor):
+    Event = apps.get_model('PerfectSpot', 'Event')
+    batch = []
+    for event in Event.objects.only('id', 'title').iterator(chunk_size=2000):
+        event.title_lower = event.title.lower()
+        batch.append(event)
+        if len(batch) >= 2000:
+            Event.objects.bulk_update(batch, ['title_lower'])
+            batch = []
+    if batch:
+        Event.objects.bulk_update(batch, ['title_lower'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PerfectSpot', '0015_customuser_username_lower'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='event',
+            name='event_title_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='title_lower',
+            field=models.CharField(default='', editable=False, max_length=510),
+        ),
+        migrations.RunPython(backfill_title_lower, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['title_lower'], name='event_title_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.20 on 2026-10-18 02:19
+
+import PerfectSpot.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('PerfectSpot', '0016_event_title_lower'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='output_file',
+            field=models.FileField(blank=True, storage=PerfectSpot.models.job_storage, upload_to='output/'),
+        ),
+        migrations.AlterField(
+            model_name='job',
+            name='kind',
+            field=models.CharField(choices=[('import_events', 'Import events from CSV'), ('export', 'Export (CSV / NDJSON)')], max_length=50),
+        ),
+    ]
@@ -1,9 +1,35 @@
+import os
+
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
+from django.utils import timezone
+
+from PerfectSpot import geo
+
+
+class CounterFieldsMixin:
+    """
+    Denormalized counters are only ever changed with F() updates (see
+    signals.py). Saving a whole instance would write back whatever stale
+    value it was loaded with, so plain save() leaves them out unless they are
+    named in update_fields explicitly.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            skip = set(self.counter_fields) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname not in skip and f.name not in skip
+            ]
+        super().save(*args, **kwargs)
 
 
-class CustomUser(AbstractUser):
+class CustomUser(CounterFieldsMixin, AbstractUser):
     INDIVIDUAL = 'individual'
     ORGANIZATION = 'organization'
     USER_TYPE_CHOICES = [
@@ -25,20 +51,58 @@ class CustomUser(AbstractUser):
         help_text="Admin-approved verification of organization documents"
     )
 
+    # username.lower() for prefix search; filled in save(). Stored rather
+    # than indexed as LOWER(username) because SQLite's LOWER() is ASCII-only.
+    # (Longer than username: lower() can lengthen a string, e.g. "İ".)
+    username_lower = models.CharField(max_length=300, default='', editable=False)
+
     friends = models.ManyToManyField('self', blank=True, symmetrical=True)
     interests = models.ManyToManyField("Interest", blank=True)
 
+    # Maintained by signals.py; repair with `manage.py repair_counters`
+    friends_count = models.PositiveIntegerField(default=0, editable=False)
+    events_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('friends_count', 'events_count')
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # case-insensitive username prefix search (friend search box)
+            models.Index(fields=['username_lower'], name='user_username_lower_idx'),
+        ]
+
     def __str__(self):
         return self.username
+
+    def save(self, *args, **kwargs):
+        self.username_lower = self.username.lower()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'username' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'username_lower'}
+        super().save(*args, **kwargs)
     
 class Interest(models.Model):
     name = models.CharField(max_length=50)
     def __str__(self):
         return self.name 
 
+class EventQuerySet(models.QuerySet):
+    def with_viewer_state(self, user):
+        """
+        Annotates whether `user` is attending, so EventSerializer can render
+        a list without a query per row.
+        """
+        if user is not None and user.is_authenticated:
+            attending = Attendance.objects.filter(event_id=OuterRef('pk'), user_id=user.id)
+            return self.annotate(viewer_attending=Exists(attending))
+        return self.annotate(viewer_attending=Value(False))
+
+
 # event model roughly
-class Event(models.Model):
+class Event(CounterFieldsMixin, models.Model):
     title = models.CharField(max_length=255)
+    # title.lower() for prefix search, filled in save() (see
+    # CustomUser.username_lower for why it is stored)
+    title_lower = models.CharField(max_length=510, default='', editable=False)
     description = models.TextField()
     location = models.CharField(max_length=255)
     date = models.DateTimeField()
@@ -46,6 +110,8 @@ class Event(models.Model):
     is_promoted = models.BooleanField(default=False)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # Derived from latitude/longitude in save(); indexed for map lookups
+    geohash = models.CharField(max_length=12, blank=True, default='', db_index=True, editable=False)
     image_url = models.URLField(max_length=500, null=True, blank=True)
     image = models.ImageField(
         upload_to="event_images/",
@@ -53,11 +119,147 @@ class Event(models.Model):
         blank=True
     )
 
-    attendees = models.ManyToManyField('CustomUser', blank=True, related_name='attending_events')
+    attendees = models.ManyToManyField(
+        'CustomUser', through='Attendance', blank=True, related_name='attending_events'
+    )
+    capacity = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text="Maximum number of attendees; leave empty for unlimited"
+    )
+    # Maintained by signals.py; repair with `manage.py repair_counters`
+    attendees_count = models.PositiveIntegerField(default=0, editable=False)
+    counter_fields = ('attendees_count',)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the home-screen listing
+            models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+            models.Index(fields=['is_promoted', 'date', 'id'], name='event_promoted_date_idx'),
+            # case-insensitive title prefix search
+            models.Index(fields=['title_lower'], name='event_title_lower_idx'),
+            # incremental sync: "changed since (updated_at, id)"
+            models.Index(fields=['updated_at', 'id'], name='event_updated_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def fill_derived_fields(self):
+        # Also called directly by paths that bypass save(), e.g. bulk_create.
+        self.title_lower = self.title.lower()
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+
+    def save(self, *args, **kwargs):
+        self.fill_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {'latitude', 'longitude'} & update_fields:
+                update_fields.add('geohash')
+            if 'title' in update_fields:
+                update_fields.add('title_lower')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
+class EventTombstone(models.Model):
+    """
+    Left behind when an event is deleted, so clients syncing incrementally
+    learn to drop it. Pruned after SYNC_TOMBSTONE_RETENTION_DAYS.
+    """
+    event_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_sync_idx'),
+        ]
+
+    def __str__(self):
+        return f"Event {self.event_id} deleted at {self.deleted_at}"
+
+class Attendance(models.Model):
+    """
+    One user holding a seat at one event (the Event.attendees through table).
+
+    event_date copies Event.date so a user's calendar is a single range scan
+    on (user, event_date); signals.py keeps it in step when an event moves.
+    """
+    CONFIRMED = 'confirmed'
+    PROMOTED = 'promoted'
+    STATUS_CHOICES = [
+        (CONFIRMED, 'Confirmed'),
+        (PROMOTED, 'Promoted from waitlist'),
+    ]
+    FREE = 'free'
+    STRIPE = 'stripe'
+    SOURCE_CHOICES = [
+        (FREE, 'Free RSVP'),
+        (STRIPE, 'Stripe checkout'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='attendances')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='attendances')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=CONFIRMED)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=FREE)
+    event_date = models.DateTimeField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'event')
+        indexes = [
+            # "my upcoming events"
+            models.Index(fields=['user', 'event_date'], name='attendance_user_date_idx'),
+            # who joined an event, in order
+            models.Index(fields=['event', 'created_at'], name='attendance_event_joined_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} attending {self.event}"
+
+class WaitlistEntry(models.Model):
+    """A user queued for a full event; promoted first-in, first-out."""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='waitlist')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='waitlisted_events')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('event', 'user')
+        indexes = [
+            models.Index(fields=['event', 'created_at', 'id'], name='waitlist_fifo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} waiting for {self.event}"
+
+
+class StripeCheckout(models.Model):
+    """
+    A paid Stripe checkout session that has been confirmed. session_id is
+    unique, so each payment seats (or is refunded) at most once.
+    """
+    SEATED = 'seated'
+    REFUNDED = 'refunded'
+    OUTCOME_CHOICES = [
+        (SEATED, 'Seated'),
+        (REFUNDED, 'Refunded (sold out)'),
+    ]
+
+    session_id = models.CharField(max_length=255, unique=True)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='checkouts')
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='checkouts')
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES, default=SEATED)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.session_id} ({self.outcome})"
+
 # review model roughly
 class Review(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
@@ -65,6 +267,7 @@ class Review(models.Model):
     rating = models.PositiveSmallIntegerField()
     comment = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.reviewer.username} - {self.event.title}"
@@ -110,4 +313,84 @@ class FriendRequest(models.Model):
         unique_together = ('from_user', 'to_user')
 
     def __str__(self):
-        return f"{self.from_user} → {self.to_user}"
\ No newline at end of file
+        return f"{self.from_user} → {self.to_user}"
+
+
+class JobFileStorage(FileSystemStorage):
+    """
+    Job uploads and exports are files only staff should see, so they live
+    under JOB_FILES_DIR rather than MEDIA_ROOT. Read on use, so tests can
+    override the setting.
+    """
+
+    @property
+    def base_location(self):
+        return settings.JOB_FILES_DIR
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+
+def job_storage():
+    return JobFileStorage()
+
+
+class Job(models.Model):
+    """
+    A long-running admin task (e.g. a CSV import), run by `manage.py
+    run_jobs` instead of inside the admin request. See jobs.py.
+
+    checkpoint holds whatever the task needs to resume: it is saved in the
+    same transaction as each chunk of work, so a worker that dies picks up
+    after the last committed chunk.
+    """
+    IMPORT_EVENTS = 'import_events'
+    EXPORT = 'export'
+    KIND_CHOICES = [
+        (IMPORT_EVENTS, 'Import events from CSV'),
+        (EXPORT, 'Export (CSV / NDJSON)'),
+    ]
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    params = models.JSONField(default=dict, blank=True)
+    # Deleted once the job is over; output_file is what the job produced
+    input_file = models.FileField(storage=job_storage, upload_to='input/', blank=True)
+    output_file = models.FileField(storage=job_storage, upload_to='output/', blank=True)
+    created_by = models.ForeignKey(CustomUser, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='jobs')
+
+    # Progress, updated as each chunk commits
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_succeeded = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    checkpoint = models.JSONField(default=dict, blank=True)
+    report_id = models.UUIDField(null=True, blank=True)
+    message = models.TextField(blank=True)
+
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # the worker's "next job" lookup
+            models.Index(fields=['status', 'created_at'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
@@ -0,0 +1,120 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor.")
+    if not isinstance(values, list):
+        raise InvalidCursor("Malformed cursor.")
+    return values
+
+
+class KeysetPaginator:
+    """
+    Keyset ("seek") pagination over a fixed, unique ordering such as
+    ('date', 'id'). Each page is fetched with a WHERE clause built from the
+    last row of the previous page, so the cost of a page depends only on the
+    page size and never on how deep the client has scrolled.
+
+    Fields may be prefixed with '-' for descending order. The last field
+    must be unique (normally 'id') so the ordering is total.
+    """
+
+    def __init__(self, ordering=('date', 'id'), page_size=None, max_page_size=None):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size or settings.API_PAGE_SIZE
+        self.max_page_size = max_page_size or settings.API_MAX_PAGE_SIZE
+
+    @staticmethod
+    def _params(request):
+        # DRF requests have query_params; plain Django (async) views use GET
+        return getattr(request, 'query_params', request.GET)
+
+    def get_page_size(self, request):
+        raw = self._params(request).get('page_size')
+        if not raw:
+            return self.page_size
+        try:
+            size = int(raw)
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def _field_names(self):
+        return [f.lstrip('-') for f in self.ordering]
+
+    def _seek_filter(self, model, values):
+        names = self._field_names()
+        if len(values) != len(names):
+            raise InvalidCursor("Cursor does not match this listing.")
+
+        try:
+            parsed = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(names, values)
+            ]
+        except Exception:
+            raise InvalidCursor("Malformed cursor.")
+
+        # (a, b, c) > (x, y, z)  ⇔  a > x  OR  (a = x AND b > y)  OR ...
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{names[i]}__{lookup}': parsed[i]})
+            for j in range(i):
+                step &= Q(**{names[j]: parsed[j]})
+            condition |= step
+        return condition
+
+    def cursor_for(self, obj):
+        return encode_cursor([getattr(obj, name) for name in self._field_names()])
+
+    def _page_queryset(self, queryset, request, cursor, size):
+        if cursor is None:
+            cursor = self._params(request).get('cursor')
+        if size is None:
+            size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self._seek_filter(queryset.model, decode_cursor(cursor)))
+        # Fetch one extra row to know whether another page exists.
+        return queryset[:size + 1], size
+
+    def _split(self, items, size):
+        next_cursor = None
+        if len(items) > size:
+            items = items[:size]
+            next_cursor = self.cursor_for(items[-1])
+        return items, next_cursor
+
+    def paginate(self, queryset, request, cursor=None, size=None):
+        """
+        Returns (items, next_cursor). next_cursor is None on the last page.
+        Raises InvalidCursor if the supplied cursor can't be decoded.
+
+        cursor and size default to the request's ?cursor= and ?page_size=.
+        """
+        queryset, size = self._page_queryset(queryset, request, cursor, size)
+        return self._split(list(queryset), size)
+
+    async def apaginate(self, queryset, request, cursor=None, size=None):
+        """paginate() for async views, fetching the page with async iteration."""
+        queryset, size = self._page_queryset(queryset, request, cursor, size)
+        return self._split([obj async for obj in queryset], size)
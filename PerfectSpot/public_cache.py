@@ -0,0 +1,97 @@
+"""
+Versioned cache for public API payloads.
+
+Some responses (the event listing, an event's reviews) are the same for
+every viewer apart from a couple of personalized fields. Their viewer-free
+"base" is cached under a key that embeds a per-namespace version number;
+signals.py bumps the version whenever the underlying rows change, which
+orphans every old entry at once without having to know which keys exist.
+Views then overlay the viewer's own fields (is_owner, is_attending) on top
+of the cached base.
+
+Entries are built from the primary database. Invalidation happens on
+commit, so a replica that hasn't caught up yet would otherwise store the
+old rows under the new version and serve them until PUBLIC_CACHE_TIMEOUT.
+
+Uses the "default" cache (see CACHES in settings.py): local memory unless a
+shared backend is configured.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from PerfectSpot import routing
+
+PREFIX = 'public'
+
+EVENTS = 'events'
+
+
+def reviews_namespace(event_id):
+    return f'reviews:{event_id}'
+
+
+def _version_key(namespace):
+    return f'{PREFIX}:version:{namespace}'
+
+
+def version(namespace):
+    key = _version_key(namespace)
+    current = cache.get(key)
+    if current is None:
+        # Seed from the clock rather than 1: if the version key is evicted
+        # while old entries survive, a restarted counter could hit them.
+        cache.add(key, time.time_ns(), timeout=None)
+        current = cache.get(key)
+    return current
+
+
+async def aversion(namespace):
+    key = _version_key(namespace)
+    current = await cache.aget(key)
+    if current is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        current = await cache.aget(key)
+    return current
+
+
+def invalidate(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # No version yet (or it was evicted): the next read seeds a new one.
+        pass
+
+
+def _entry_key(namespace, current_version, parts):
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'{PREFIX}:{namespace}:{current_version}:{digest}'
+
+
+def get_or_build(namespace, parts, build, timeout=None):
+    """
+    Returns the cached payload for (namespace, parts), calling build() to
+    produce and store it on a miss. parts must identify everything the
+    payload depends on besides the namespace's data (query parameters,
+    host, ...).
+    """
+    key = _entry_key(namespace, version(namespace), parts)
+    payload = cache.get(key)
+    if payload is None:
+        with routing.use_primary():
+            payload = build()
+        cache.set(key, payload, settings.PUBLIC_CACHE_TIMEOUT if timeout is None else timeout)
+    return payload
+
+
+async def aget_or_build(namespace, parts, abuild, timeout=None):
+    """get_or_build() for async views; abuild is a coroutine function."""
+    key = _entry_key(namespace, await aversion(namespace), parts)
+    payload = await cache.aget(key)
+    if payload is None:
+        with routing.use_primary():
+            payload = await abuild()
+        await cache.aset(key, payload, settings.PUBLIC_CACHE_TIMEOUT if timeout is None else timeout)
+    return payload
@@ -0,0 +1,112 @@
+"""
+Read-replica routing.
+
+ReplicaRouter sends reads to the aliases in settings.DATABASE_REPLICAS and
+everything else to "default". Reads stay on the primary when they can't
+tolerate replication lag:
+
+- inside a transaction on the primary (read-modify-write code paths);
+- for the whole of a non-GET/HEAD/OPTIONS request;
+- for REPLICA_STICKY_SECONDS after a client's own successful write, so a
+  user sees their changes on the next screen (read-your-writes).
+
+Clients are told apart by a hash of their Authorization header; the pin is
+kept in the default cache so every worker sees it when that cache is shared.
+"""
+import contextvars
+import hashlib
+import random
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_use_primary = contextvars.ContextVar('use_primary', default=False)
+
+
+@contextmanager
+def use_primary():
+    """Routes every read in the block to the primary."""
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def _pin_key(request):
+    auth = request.META.get('HTTP_AUTHORIZATION')
+    if not auth:
+        return None
+    return 'primary-pin:' + hashlib.sha256(auth.encode()).hexdigest()
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or _use_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication.
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPinMiddleware:
+    """Keeps unsafe requests, and the same client's reads right after them, on the primary."""
+
+    # Async-capable so the async views (views/async_views.py) aren't pushed
+    # through a thread hop by this middleware under ASGI.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        key = _pin_key(request)
+        pinned = request.method not in SAFE_METHODS or (key is not None and cache.get(key))
+        token = _use_primary.set(bool(pinned))
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400 and key is not None:
+            cache.set(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        key = _pin_key(request)
+        pinned = request.method not in SAFE_METHODS or (key is not None and await cache.aget(key))
+        token = _use_primary.set(bool(pinned))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _use_primary.reset(token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400 and key is not None:
+            await cache.aset(key, True, settings.REPLICA_STICKY_SECONDS)
+        return response
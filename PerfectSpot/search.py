@@ -0,0 +1,200 @@
+"""
+Full-text search over events.
+
+On SQLite the events are indexed by an FTS5 external-content table that
+triggers keep in sync with PerfectSpot_event, so search is an inverted-index
+lookup ranked by bm25 instead of a LIKE scan. Other backends fall back to a
+plain icontains filter.
+"""
+import re
+
+from django.db import connection, connections, router
+from django.db.models import Case, Q, When
+from django.db.models.functions import Length
+
+from PerfectSpot.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+EVENT_TABLE = 'PerfectSpot_event'
+FTS_TABLE = 'PerfectSpot_event_fts'
+
+# Column weights for bm25(): a hit in the title outranks one in the location,
+# which outranks one in the description.
+FTS_WEIGHTS = (10.0, 1.0, 3.0)
+
+_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ai" AFTER INSERT ON "{EVENT_TABLE}" BEGIN
+            INSERT INTO "{FTS_TABLE}"(rowid, title, description, location)
+            VALUES (new.id, new.title, new.description, new.location);
+        END""",
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ad" AFTER DELETE ON "{EVENT_TABLE}" BEGIN
+            INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, title, description, location)
+            VALUES ('delete', old.id, old.title, old.description, old.location);
+        END""",
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_au"
+        AFTER UPDATE OF title, description, location ON "{EVENT_TABLE}" BEGIN
+            INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}", rowid, title, description, location)
+            VALUES ('delete', old.id, old.title, old.description, old.location);
+            INSERT INTO "{FTS_TABLE}"(rowid, title, description, location)
+            VALUES (new.id, new.title, new.description, new.location);
+        END""",
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_MAX_CHAR = chr(0x10FFFF)
+_SURROGATES = (0xD800, 0xDFFF)
+
+
+def prefix_bounds(prefix):
+    """
+    Half-open [lo, hi) range covering every string that starts with the
+    lower-cased prefix; hi is None when there is no upper bound. Filtering
+    a column of str.lower()-ed text on this range can use its index, unlike
+    LIKE/istartswith.
+    """
+    lo = prefix.lower()
+    stem = lo.rstrip(_MAX_CHAR)
+    if not stem:
+        return lo, None
+    following = ord(stem[-1]) + 1
+    if _SURROGATES[0] <= following <= _SURROGATES[1]:
+        # lone surrogates can't be encoded for the database
+        following = _SURROGATES[1] + 1
+    return lo, stem[:-1] + chr(following)
+
+
+def prefix_filter(field, prefix):
+    """
+    Q for rows whose `field` starts with `prefix`, case-insensitively.
+
+    `field` must hold the text lower-cased in Python (e.g. username_lower):
+    SQLite's LOWER() only folds ASCII, so a range on LOWER(col) would miss
+    names like "Łukasz".
+    """
+    lo, hi = prefix_bounds(prefix)
+    q = Q(**{f'{field}__gte': lo})
+    if hi is not None:
+        q &= Q(**{f'{field}__lt': hi})
+    return q
+
+
+def prefix_ranking(field, prefix):
+    """
+    order_by() terms for prefix_filter() matches: the exact match first,
+    then shorter (closer) completions, then alphabetically. Ranking in SQL
+    rather than after the LIMIT keeps a short match from being cut off by
+    longer ones that sort before it.
+    """
+    return [Case(When(**{field: prefix.lower()}, then=0), default=1), Length(field), field]
+
+
+def fts_available(conn=connection):
+    return conn.vendor == 'sqlite'
+
+
+def install_event_fts(conn=connection):
+    """
+    Creates the FTS table and its sync triggers if they are missing, and
+    rebuilds the index when anything had to be (re)created.
+
+    Django's SQLite schema editor rebuilds a table (dropping its triggers)
+    for most ALTERs, so this also runs after every migrate to restore them.
+    """
+    if not fts_available(conn):
+        return False
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+            [f'{FTS_TABLE}%'],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = ({FTS_TABLE} | set(_TRIGGERS)) - existing
+        if not missing:
+            return False
+
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS "{FTS_TABLE}" USING fts5(
+                title, description, location,
+                content='{EVENT_TABLE}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )""")
+        for sql in _TRIGGERS.values():
+            cursor.execute(sql)
+        cursor.execute(f"""INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES ('rebuild')""")
+    return True
+
+
+def uninstall_event_fts(conn=connection):
+    if not fts_available(conn):
+        return
+    with conn.cursor() as cursor:
+        for name in _TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+        cursor.execute(f'DROP TABLE IF EXISTS "{FTS_TABLE}"')
+
+
+def to_match_query(text):
+    """
+    Turns free text into a safe FTS5 query: every word must match, the last
+    one as a prefix so results update while the user is still typing.
+    Returns '' when the text has no searchable words.
+    """
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return ''
+    quoted = ['"%s"' % t.replace('"', '""') for t in tokens]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_event_ids(text, limit, cursor=None, promoted=None):
+    """
+    Returns (ids, next_cursor) for one page of events matching `text`, best
+    match first. The cursor is a keyset on (bm25 score, id), so later pages
+    cost the same as the first.
+    """
+    match = to_match_query(text)
+    if not match:
+        return [], None
+
+    where = ['1 = 1']
+    params = [match]
+    if promoted is not None:
+        where.append('e.is_promoted = %s')
+        params.append(promoted)
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            score, last_id = float(values[0]), int(values[1])
+        except (IndexError, TypeError, ValueError):
+            raise InvalidCursor("Cursor does not match this listing.")
+        where.append('(hits.score > %s OR (hits.score = %s AND hits.id > %s))')
+        params += [score, score, last_id]
+
+    weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+    sql = f"""
+        SELECT hits.id, hits.score FROM (
+            SELECT rowid AS id, bm25("{FTS_TABLE}", {weights}) AS score
+            FROM "{FTS_TABLE}" WHERE "{FTS_TABLE}" MATCH %s
+        ) AS hits
+        JOIN "{EVENT_TABLE}" e ON e.id = hits.id
+        WHERE {' AND '.join(where)}
+        ORDER BY hits.score, hits.id
+        LIMIT %s
+    """
+    params.append(limit + 1)
+    # Raw SQL bypasses the ORM, so ask the router where reads should go.
+    from PerfectSpot.models import Event
+    with connections[router.db_for_read(Event)].cursor() as db:
+        db.execute(sql, params)
+        rows = db.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1][1], rows[-1][0]])
+    return [row[0] for row in rows], next_cursor
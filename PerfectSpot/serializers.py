@@ -1,5 +1,6 @@
 from django.contrib.auth import authenticate
 from .models import CustomUser, Event, FriendRequest, Review
+from .friendship import resolve_friendship_statuses
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
@@ -46,20 +47,33 @@ class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = ['id', 'title', 'description', 'location', 'date', 'is_promoted','latitude',
-                  'longitude','image_url','is_owner','attendees_count', 'is_attending', 'image']
+                  'longitude','image_url','is_owner','attendees_count', 'is_attending', 'image',
+                  'capacity']
         # 'creator' typically is set automatically from the request.user, so we might
         # not expose it as a writeable field here (depending on your logic).
 
     def create(self, validated_data):
         # The 'creator' should be the logged-in user, so we handle that in the view.
         return super().create(validated_data)
+
+    def validate_capacity(self, value):
+        # Seats already taken can't be revoked by shrinking the event.
+        if self.instance is not None and value is not None and value < self.instance.attendees_count:
+            raise serializers.ValidationError(
+                f"Capacity can't be lower than the {self.instance.attendees_count} people already attending."
+            )
+        return value
     
+    # Prefers the annotation added by Event.objects.with_viewer_state(); the
+    # query below is only a fallback for instances loaded some other way.
     def get_is_attending(self, obj):
+        if hasattr(obj, 'viewer_attending'):
+            return obj.viewer_attending
         user = self.context['request'].user
         return user.is_authenticated and obj.attendees.filter(id=user.id).exists()
 
     def get_attendees_count(self, obj):
-        return obj.attendees.count()
+        return obj.attendees_count
 
     def get_is_owner(self, obj):
         """
@@ -73,6 +87,13 @@ class EventSerializer(serializers.ModelSerializer):
 
 
 
+class NearbyEventSerializer(EventSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+
+    class Meta(EventSerializer.Meta):
+        fields = EventSerializer.Meta.fields + ['distance_km']
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     reviewer = serializers.StringRelatedField(read_only=True)
 
@@ -107,23 +128,14 @@ class SearchResultUserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'status']
 
     def get_status(self, obj):
-        request = self.context.get('request')
-        if not request or not request.user or not request.user.is_authenticated:
-            return "none"
-
-        user = request.user
-
-        if obj == user:
-            return "self"
-
-        if user.friends.filter(id=obj.id).exists():
-            return "friends"
-        if FriendRequest.objects.filter(from_user=user, to_user=obj).exists():
-            return "sent"
-        if FriendRequest.objects.filter(from_user=obj, to_user=user).exists():
-            return "received"
-
-        return "none"
+        # Views listing many users pass statuses resolved in bulk via
+        # context["friendship_statuses"]; otherwise resolve just this row.
+        statuses = self.context.get('friendship_statuses')
+        if statuses is None or obj.id not in statuses:
+            request = self.context.get('request')
+            viewer = request.user if request else None
+            statuses = resolve_friendship_statuses(viewer, [obj.id])
+        return statuses[obj.id][0]
     
 class FriendDataResponseSerializer(serializers.ModelSerializer):
     login = serializers.SerializerMethodField()
@@ -146,4 +158,4 @@ class FriendDataResponseSerializer(serializers.ModelSerializer):
         return obj.username
 
     def get_events_count(self, obj):
-        return obj.events.count()
\ No newline at end of file
+        return obj.events_count
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""
+Keeps the denormalized counters (CustomUser.friends_count/events_count,
+Event.attendees_count) in step with the rows they count, and retires cached
+public payloads (public_cache.py) when the data behind them changes.
+
+Every change is a relative F() update issued in the same transaction as the
+write that caused it, so concurrent requests can't lose increments. Paths
+that bypass signals (bulk_create, raw SQL) must adjust counters themselves;
+`manage.py repair_counters` recomputes them from scratch.
+"""
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from PerfectSpot import public_cache
+from PerfectSpot.models import Attendance, CustomUser, Event, EventTombstone, Review
+
+
+def touch(model):
+    """
+    Extra update() kwargs that refresh the model's updated_at, if it has one.
+    Counters are part of what clients cache, so changing one has to move the
+    row's ETag/Last-Modified like any other edit.
+    """
+    if any(f.name == 'updated_at' for f in model._meta.concrete_fields):
+        return {'updated_at': timezone.now()}
+    return {}
+
+
+def bump(queryset, field, delta):
+    """Adds delta to `field` on every row of queryset, never going below zero."""
+    if delta:
+        queryset.update(**{field: Greatest(F(field) + delta, 0)}, **touch(queryset.model))
+
+
+@receiver(post_save, sender=Event)
+def count_created_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump(CustomUser.objects.filter(pk=instance.creator_id), 'events_count', 1)
+
+
+@receiver(post_save, sender=Event)
+def move_attendance_dates(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # Attendance.event_date mirrors Event.date for the per-user calendar index.
+    if created or raw or (update_fields is not None and 'date' not in update_fields):
+        return
+    Attendance.objects.filter(event_id=instance.pk).exclude(event_date=instance.date).update(
+        event_date=instance.date
+    )
+
+
+@receiver(post_delete, sender=Event)
+def count_deleted_event(sender, instance, **kwargs):
+    bump(CustomUser.objects.filter(pk=instance.creator_id), 'events_count', -1)
+
+
+@receiver(post_delete, sender=Event)
+def bury_deleted_event(sender, instance, **kwargs):
+    # Any delete path (API, admin, a cascading user delete) must reach
+    # syncing clients, so this hangs off the signal rather than the view.
+    EventTombstone.objects.create(event_id=instance.pk)
+
+
+@receiver(pre_delete)
+def uncount_deleted_user(sender, instance, **kwargs):
+    # Deleting a user cascades straight through the m2m tables without
+    # m2m_changed, so take them off their events and friends first.
+    # No sender filter: the admin deletes through the proxy models too.
+    if not isinstance(instance, CustomUser):
+        return
+    bump(Event.objects.filter(attendees=instance), 'attendees_count', -1)
+    bump(CustomUser.objects.filter(friends=instance), 'friends_count', -1)
+
+
+def _existing_targets(sender, instance, reverse, pk_set, source, target):
+    """Which of pk_set are really linked to instance (remove() accepts strangers)."""
+    if reverse:
+        source, target = target, source
+    return set(
+        sender.objects.filter(**{f'{source}_id': instance.pk, f'{target}_id__in': pk_set})
+        .values_list(f'{target}_id', flat=True)
+    )
+
+
+def _fill_event_dates(instance, reverse, pk_set):
+    # event.attendees.add() inserts Attendance rows without event_date
+    links = Attendance.objects.filter(event_date__isnull=True)
+    if reverse:
+        links = links.filter(user_id=instance.pk, event_id__in=pk_set)
+    else:
+        links = links.filter(event_id=instance.pk, user_id__in=pk_set)
+    links.update(event_date=Subquery(Event.objects.filter(pk=OuterRef('event_id')).values('date')[:1]))
+
+
+@receiver(m2m_changed, sender=Attendance)
+def count_attendees(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_remove':
+        instance._removed_ids = _existing_targets(sender, instance, reverse, pk_set, 'event', 'user')
+        return
+    if action == 'pre_clear':
+        column = 'event_id' if reverse else 'user_id'
+        owner = 'user_id' if reverse else 'event_id'
+        instance._removed_ids = set(
+            sender.objects.filter(**{owner: instance.pk}).values_list(column, flat=True)
+        )
+        return
+
+    if action == 'post_add':
+        changed, delta = pk_set, 1
+        if changed:
+            _fill_event_dates(instance, reverse, changed)
+    elif action in ('post_remove', 'post_clear'):
+        changed, delta = instance.__dict__.pop('_removed_ids', set()), -1
+    else:
+        return
+    if not changed:
+        return
+
+    if reverse:
+        # user.attending_events.add(*events): one more attendee on each event
+        bump(Event.objects.filter(pk__in=changed), 'attendees_count', delta)
+    else:
+        bump(Event.objects.filter(pk=instance.pk), 'attendees_count', delta * len(changed))
+        instance.attendees_count = max(instance.attendees_count + delta * len(changed), 0)
+
+
+@receiver(m2m_changed, sender=CustomUser.friends.through)
+def count_friends(sender, instance, action, pk_set, **kwargs):
+    # friends is symmetrical: Django writes both directions but only signals
+    # once, with instance on one side and pk_set on the other.
+    if action == 'pre_remove':
+        instance._removed_ids = _existing_targets(
+            sender, instance, False, pk_set, 'from_customuser', 'to_customuser'
+        )
+        return
+    if action == 'pre_clear':
+        instance._removed_ids = set(
+            sender.objects.filter(from_customuser_id=instance.pk).values_list('to_customuser_id', flat=True)
+        )
+        return
+
+    if action == 'post_add':
+        changed, delta = pk_set, 1
+    elif action in ('post_remove', 'post_clear'):
+        changed, delta = instance.__dict__.pop('_removed_ids', set()), -1
+    else:
+        return
+    if not changed:
+        return
+
+    bump(CustomUser.objects.filter(pk=instance.pk), 'friends_count', delta * len(changed))
+    bump(CustomUser.objects.filter(pk__in=changed), 'friends_count', delta)
+    instance.friends_count = max(instance.friends_count + delta * len(changed), 0)
+
+
+# Cached public payloads. Attendance changes matter because attendees_count
+# is part of the cached listing.
+
+def invalidate_cache(namespace):
+    """Retires a public_cache namespace; for writes that bypass the signals too."""
+    public_cache.invalidate(namespace)
+    # Again once committed: a request that missed the cache in between may
+    # have rebuilt the entry from the pre-commit rows.
+    transaction.on_commit(lambda: public_cache.invalidate(namespace))
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+@receiver(m2m_changed, sender=Attendance)
+def invalidate_event_listing(sender, action=None, **kwargs):
+    if action is None or action.startswith('post_'):
+        invalidate_cache(public_cache.EVENTS)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_event_reviews(sender, instance, **kwargs):
+    invalidate_cache(public_cache.reviews_namespace(instance.event_id))
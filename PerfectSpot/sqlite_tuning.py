@@ -0,0 +1,37 @@
+"""
+Connection-level tuning for the SQLite backend (settings.SQLITE_PRAGMAS).
+
+With the default rollback journal a writer locks out every reader for the
+length of its transaction, which under concurrent RSVPs surfaces as
+"database is locked". WAL lets readers proceed alongside the single writer,
+and busy_timeout makes a blocked writer wait instead of failing at once.
+"""
+from django.conf import settings
+
+# journal_mode first: it decides whether the others (mmap, synchronous)
+# apply to a WAL or a rollback-journal database.
+ORDER = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size')
+
+
+def pragma_statements(pragmas):
+    names = sorted(pragmas, key=lambda name: ORDER.index(name) if name in ORDER else len(ORDER))
+    for name in names:
+        if not name.isidentifier():
+            raise ValueError(f"Invalid PRAGMA name: {name!r}")
+        value = pragmas[name]
+        if not isinstance(value, int) and not str(value).isidentifier():
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+        yield f'PRAGMA {name} = {value}'
+
+
+def apply_pragmas(cursor, pragmas):
+    for statement in pragma_statements(pragmas):
+        cursor.execute(statement)
+
+
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """connection_created receiver; see PerfectspotConfig.ready()."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
@@ -0,0 +1,8 @@
+"""Small statistics helpers shared by `loadtest` and the API benchmarks."""
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
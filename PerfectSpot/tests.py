@@ -1,9 +1,32 @@
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
 from django.urls import reverse
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 from django.contrib.auth import get_user_model
-
-from PerfectSpot.models import Event, Review
+from django.db import connection, connections as db_connections
+from django.test import LiveServerTestCase, RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+from django.db.models import F
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from PerfectSpot import (attendance, benchmarks, geo, importers, jobs, public_cache, routing, search,
+                         sqlite_tuning, stats)
+from PerfectSpot.models import Attendance, Event, EventTombstone, FriendRequest, Job, Review, StripeCheckout
+from rest_framework_simplejwt.tokens import RefreshToken
 
 CustomUser = get_user_model()
 
@@ -548,3 +571,1494 @@ class ReviewTestCase(APITestCase):
         self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Review.objects.filter(pk=review_id).exists())
 
+
+
+class EventPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='pager', password='pagerpass')
+        self.list_url = reverse('create_event')
+        # Several events share a timestamp so the id tie-breaker is exercised
+        for i in range(7):
+            Event.objects.create(
+                title=f"Event {i}", description="D", location="L",
+                date=f"2025-06-{10 + i // 2:02d}T12:00:00Z", creator=self.user
+            )
+
+    def test_cursor_walks_all_events_once(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'page_size': 3}
+            if cursor:
+                params['cursor'] = cursor
+            resp = self.client.get(self.list_url, params)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen.extend(ev['id'] for ev in resp.data['data'])
+            cursor = resp.data['pagination']['next_cursor']
+            if not cursor:
+                break
+
+        expected = list(Event.objects.order_by('date', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_title_prefix_is_case_insensitive(self):
+        Event.objects.create(title="Jazz Night", description="D", location="L",
+                             date="2025-07-01T20:00:00Z", creator=self.user)
+        resp = self.client.get(self.list_url, {'title': 'jAZ'})
+        self.assertEqual([ev['title'] for ev in resp.data['data']], ["Jazz Night"])
+
+    def test_title_prefix_non_ascii(self):
+        event = Event.objects.create(title="Łódź Design Festival", description="D", location="L",
+                                     date="2025-07-01T20:00:00Z", creator=self.user)
+        for prefix in ('Łódź', 'łÓDŹ'):
+            resp = self.client.get(self.list_url, {'title': prefix})
+            self.assertEqual([ev['id'] for ev in resp.data['data']], [event.id], prefix)
+
+        # renaming keeps the stored lower-cased title in step
+        event.title = "Żagle"
+        event.save(update_fields=['title'])
+        self.assertEqual(self.client.get(self.list_url, {'title': 'żag'}).data['data'][0]['id'], event.id)
+
+    def test_invalid_cursor_rejected(self):
+        resp = self.client.get(self.list_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(resp.data['success'])
+
+
+class EventQueryCountTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='counter', password='counterpass')
+        self.others = [
+            CustomUser.objects.create_user(username=f'guest{i}', password='guestpass')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def _add_events(self, n):
+        for i in range(n):
+            event = Event.objects.create(title=f"E{i}", description="D", location="L",
+                                         date="2025-06-15T14:00:00Z", creator=self.user)
+            event.attendees.add(*self.others)
+            if i % 2:
+                event.attendees.add(self.user)
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('create_event'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), resp.data['data']
+
+    def test_list_query_count_is_constant(self):
+        self._add_events(2)
+        small, _ = self._count_list_queries()
+        self._add_events(10)
+        large, data = self._count_list_queries()
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(data), 12)
+        self.assertTrue(all(ev['attendees_count'] in (3, 4) for ev in data))
+        self.assertEqual(sum(ev['is_attending'] for ev in data), 6)
+
+
+class NearbyEventsTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='mapper', password='mapperpass')
+        self.url = reverse('nearby_events')
+        places = {
+            "Warsaw Centre": (52.2297, 21.0122),
+            "Warsaw Praga": (52.2500, 21.0350),
+            "Krakow": (50.0647, 19.9450),
+            "Berlin": (52.5200, 13.4050),
+        }
+        for title, (lat, lng) in places.items():
+            Event.objects.create(title=title, description="D", location="L",
+                                 date="2025-06-15T14:00:00Z", creator=self.user,
+                                 latitude=lat, longitude=lng)
+        Event.objects.create(title="Nowhere", description="D", location="L",
+                             date="2025-06-15T14:00:00Z", creator=self.user)
+
+    def test_geohash_is_maintained(self):
+        event = Event.objects.get(title="Krakow")
+        self.assertTrue(event.geohash.startswith("u2yh"))
+        event.latitude, event.longitude = 52.52, 13.405
+        event.save(update_fields=['latitude', 'longitude'])
+        event.refresh_from_db()
+        self.assertTrue(event.geohash.startswith("u33d"))
+        self.assertEqual(Event.objects.get(title="Nowhere").geohash, "")
+
+    def test_radius_sorted_by_distance(self):
+        resp = self.client.get(self.url, {'lat': 52.2300, 'lng': 21.0100, 'radius_km': 10})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        titles = [ev['title'] for ev in resp.data['data']]
+        self.assertEqual(titles, ["Warsaw Centre", "Warsaw Praga"])
+        self.assertLess(resp.data['data'][0]['distance_km'], 1)
+
+    def test_radius_across_the_antimeridian(self):
+        for title, lng in [("Fiji east", 179.95), ("Fiji west", -179.95), ("Far", -178.0)]:
+            Event.objects.create(title=title, description="D", location="L", date="2025-06-15T14:00:00Z",
+                                 creator=self.user, latitude=-17.0, longitude=lng)
+        for lng in (179.99, -179.99):
+            resp = self.client.get(self.url, {'lat': -17.0, 'lng': lng, 'radius_km': 20})
+            titles = [ev['title'] for ev in resp.data['data']]
+            expected = ["Fiji east", "Fiji west"] if lng > 0 else ["Fiji west", "Fiji east"]
+            self.assertEqual(titles, expected, lng)
+
+        (east_side, west_side) = geo.radius_bboxes(0.0, 179.9, 50)
+        self.assertEqual(east_side[3], 180.0)
+        self.assertEqual(west_side[1], -180.0)
+        self.assertTrue(east_side[1] < east_side[3] and west_side[1] < west_side[3] < -179.0)
+        self.assertEqual(len(geo.radius_bboxes(0.0, 0.0, 50)), 1)
+
+    def test_bbox(self):
+        resp = self.client.get(self.url, {'bbox': '49.0,14.0,55.0,24.0'})
+        titles = {ev['title'] for ev in resp.data['data']}
+        self.assertEqual(titles, {"Warsaw Centre", "Warsaw Praga", "Krakow"})
+
+    def test_missing_parameters(self):
+        resp = self.client.get(self.url, {'lat': 52.0})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EventClustersTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='clusterer', password='clusterpass')
+        self.url = reverse('event_clusters')
+        spots = [(52.23, 21.01, True), (52.24, 21.02, False), (52.25, 21.00, False),
+                 (50.06, 19.94, False), (50.07, 19.95, True)]
+        for i, (lat, lng, promoted) in enumerate(spots):
+            Event.objects.create(title=f"Spot {i}", description="D", location="L",
+                                 date="2025-06-15T14:00:00Z", creator=self.user,
+                                 latitude=lat, longitude=lng, is_promoted=promoted)
+
+    def test_clusters_for_country_view(self):
+        resp = self.client.get(self.url, {'bbox': '49.0,14.0,55.0,24.0', 'zoom': 6})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        clusters = sorted(resp.data['data']['clusters'], key=lambda c: -c['count'])
+        self.assertEqual([c['count'] for c in clusters], [3, 2])
+        self.assertEqual([c['promoted_count'] for c in clusters], [1, 1])
+        warsaw = clusters[0]
+        self.assertAlmostEqual(warsaw['latitude'], 52.24, places=4)
+        # promoted first, then soonest, then by id
+        spots = {event.title: event.pk for event in Event.objects.all()}
+        self.assertEqual(warsaw['sample_event_ids'], [spots['Spot 0'], spots['Spot 1'], spots['Spot 2']])
+        krakow = clusters[1]
+        self.assertEqual(krakow['sample_event_ids'], [spots['Spot 4'], spots['Spot 3']])
+
+    def test_zoom_required(self):
+        resp = self.client.get(self.url, {'bbox': '49.0,14.0,55.0,24.0'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EventSearchTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='searcher', password='searchpass')
+        self.url = reverse('create_event')
+
+        def make(title, description, location):
+            return Event.objects.create(title=title, description=description, location=location,
+                                        date="2025-06-15T14:00:00Z", creator=self.user)
+
+        self.in_title = make("Summer Concert", "Open air music", "Park")
+        self.in_description = make("Friday night", "A small concert in the basement", "Club")
+        self.in_location = make("Meetup", "Talks and pizza", "Concert Hall Gdańsk")
+        self.unrelated = make("Chess club", "Weekly games", "Library")
+
+    def _search(self, **params):
+        resp = self.client.get(self.url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        return resp
+
+    def test_matches_all_fields_ranked_by_relevance(self):
+        ids = [ev['id'] for ev in self._search(q='concert').data['data']]
+        self.assertEqual(ids[0], self.in_title.id)
+        self.assertEqual(set(ids), {self.in_title.id, self.in_description.id, self.in_location.id})
+
+    def test_index_follows_updates_and_deletes(self):
+        self.unrelated.description = "Chess and a concert afterwards"
+        self.unrelated.save()
+        self.in_title.delete()
+        ids = {ev['id'] for ev in self._search(q='concert').data['data']}
+        self.assertEqual(ids, {self.in_description.id, self.in_location.id, self.unrelated.id})
+
+    def test_prefix_and_diacritics(self):
+        ids = [ev['id'] for ev in self._search(q='gdansk').data['data']]
+        self.assertEqual(ids, [self.in_location.id])
+        ids = [ev['id'] for ev in self._search(q='basem').data['data']]
+        self.assertEqual(ids, [self.in_description.id])
+
+    def test_paginates_with_cursor(self):
+        first = self._search(q='concert', page_size=2)
+        self.assertEqual(len(first.data['data']), 2)
+        cursor = first.data['pagination']['next_cursor']
+        second = self._search(q='concert', page_size=2, cursor=cursor)
+        self.assertEqual(len(second.data['data']), 1)
+        self.assertIsNone(second.data['pagination']['next_cursor'])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self._search(q='(concert" -').data['data'][0]['id'], self.in_title.id)
+
+
+class UserSearchTestCase(APITestCase):
+    def setUp(self):
+        self.viewer = CustomUser.objects.create_user(username='anna', password='annapass')
+        for name in ['Annabelle', 'ann', 'annie', 'joanna', 'bob']:
+            CustomUser.objects.create_user(username=name, password='userpass')
+        self.client.force_authenticate(self.viewer)
+
+    def test_exact_then_prefix_matches(self):
+        resp = self.client.get(reverse('user-search'), {'q': 'ANN'})
+        names = [u['username'] for u in resp.data['results']]
+        # exact first, then by length; infix 'joanna' and the viewer are excluded
+        self.assertEqual(names, ['ann', 'annie', 'Annabelle'])
+
+    def test_ranked_before_the_limit(self):
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'annabelle{i}', username_lower=f'annabelle{i}') for i in range(10)
+        ] + [CustomUser(username='annz', username_lower='annz')])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.viewer).access_token}")
+        for url in (reverse('user-search'), reverse('async_user_search')):
+            names = [u['username'] for u in self.client.get(url, {'q': 'ann'}).json()['results']]
+            # 'annz' sorts after ten longer names but is the closest completion
+            self.assertEqual(names[:3], ['ann', 'annz', 'annie'], url)
+            self.assertEqual(len(names), 10)
+
+    def test_uses_username_index(self):
+        qs = CustomUser.objects.filter(search.prefix_filter('username_lower', 'ann'))
+        self.assertIn('user_username_lower_idx', qs.explain())
+
+    def test_non_ascii_prefix(self):
+        CustomUser.objects.create_user(username='Łukasz', password='userpass')
+        CustomUser.objects.create_user(username='łucja', password='userpass')
+        # the async view only takes a JWT
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.viewer).access_token}")
+        for url in (reverse('user-search'), reverse('async_user_search')):
+            for query in ('Łukasz', 'łuk', 'ŁU'):
+                resp = self.client.get(url, {'q': query})
+                names = {u['username'] for u in resp.json()['results']}
+                expected = {'Łukasz', 'łucja'} if query == 'ŁU' else {'Łukasz'}
+                self.assertEqual(names, expected, (url, query))
+
+    def test_prefix_bounds_edge_characters(self):
+        self.assertEqual(search.prefix_bounds('a\U0010ffff'), ('a\U0010ffff', 'b'))
+        self.assertEqual(search.prefix_bounds('\U0010ffff'), ('\U0010ffff', None))
+        self.assertEqual(search.prefix_bounds('\ud7ff'), ('\ud7ff', '\ue000'))
+        self.assertEqual(list(CustomUser.objects.filter(search.prefix_filter('username_lower', '\U0010ffff'))), [])
+
+
+class FriendshipStatusBatchTestCase(APITestCase):
+    def setUp(self):
+        self.viewer = CustomUser.objects.create_user(username='viewer', password='viewerpass')
+        self.friend = CustomUser.objects.create_user(username='vfriend', password='x')
+        self.sent_to = CustomUser.objects.create_user(username='vsent', password='x')
+        self.received_from = CustomUser.objects.create_user(username='vreceived', password='x')
+        self.stranger = CustomUser.objects.create_user(username='vstranger', password='x')
+        self.viewer.friends.add(self.friend)
+        self.sent_request = FriendRequest.objects.create(from_user=self.viewer, to_user=self.sent_to)
+        FriendRequest.objects.create(from_user=self.received_from, to_user=self.viewer)
+        self.client.force_authenticate(self.viewer)
+
+    def test_search_statuses_with_fixed_query_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse('user-search'), {'q': 'v'})
+        statuses = {u['username']: u['status'] for u in resp.data['results']}
+        self.assertEqual(statuses, {
+            'vfriend': 'friends', 'vsent': 'sent', 'vreceived': 'received', 'vstranger': 'none',
+        })
+        # search + friend ids + pending requests
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_friendship_view_uses_same_resolver(self):
+        resp = self.client.get(reverse('friendship-status', args=[self.sent_to.id]))
+        self.assertEqual(resp.data['status'], 'sent')
+        self.assertEqual(resp.data['request_id'], self.sent_request.id)
+
+    def test_own_profile_status_is_none(self):
+        resp = self.client.get(reverse('friendship-status', args=[self.viewer.id]))
+        self.assertEqual((resp.data['status'], resp.data['request_id']), ('none', None))
+
+
+class CompactProfileTestCase(APITestCase):
+    def setUp(self):
+        self.star = CustomUser.objects.create_user(username='star', password='starpass')
+        self.client.force_authenticate(self.star)
+
+    def _add_fans(self, start, n):
+        for i in range(start, start + n):
+            fan = CustomUser.objects.create_user(username=f'fan{i}', password='x')
+            if i % 2:
+                self.star.friends.add(fan)
+            else:
+                FriendRequest.objects.create(from_user=fan, to_user=self.star)
+
+    def _profile_queries(self, **params):
+        url = reverse('user-profile-api', args=[self.star.id])
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, params)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), resp.data
+
+    def test_query_count_is_bounded(self):
+        self._add_fans(0, 4)
+        small_full, _ = self._profile_queries()
+        small_compact, _ = self._profile_queries(compact='true')
+        self._add_fans(4, 20)
+        large_full, _ = self._profile_queries()
+        large_compact, data = self._profile_queries(compact='true')
+
+        self.assertEqual(small_full, large_full)
+        self.assertEqual(small_compact, large_compact)
+        self.assertEqual(data['friends']['count'], 12)
+        self.assertEqual(len(data['friends']['results']), 5)
+        self.assertEqual(data['incoming']['count'], 12)
+        self.assertIsNone(data['outgoing']['next_cursor'])
+
+    def test_page_through_friends(self):
+        self._add_fans(0, 14)
+        _, data = self._profile_queries(compact='1')
+        seen = [u['id'] for u in data['friends']['results']]
+        cursor = data['friends']['next_cursor']
+        url = reverse('user-connections', args=[self.star.id, 'friends'])
+        while cursor:
+            resp = self.client.get(url, {'cursor': cursor, 'page_size': 2})
+            seen += [u['id'] for u in resp.data['results']]
+            cursor = resp.data['next_cursor']
+        self.assertEqual(seen, sorted(self.star.friends.values_list('id', flat=True)))
+
+
+class CounterTestCase(APITestCase):
+    def setUp(self):
+        self.alice = CustomUser.objects.create_user(username='alice', password='alicepass')
+        self.bob = CustomUser.objects.create_user(username='bob', password='bobpass')
+        self.carol = CustomUser.objects.create_user(username='carol', password='carolpass')
+        self.event = Event.objects.create(title="Counted", description="D", location="L",
+                                          date="2025-06-15T14:00:00Z", creator=self.alice)
+
+    def _counts(self, user):
+        user.refresh_from_db()
+        return user.friends_count, user.events_count
+
+    def test_events_count(self):
+        self.assertEqual(self._counts(self.alice), (0, 1))
+        self.event.delete()
+        self.assertEqual(self._counts(self.alice), (0, 0))
+
+    def test_friend_accept_and_unfriend(self):
+        request = FriendRequest.objects.create(from_user=self.bob, to_user=self.alice)
+        self.client.force_authenticate(self.alice)
+        self.client.post(f'/api/friend-requests/{request.id}/accept/')
+        self.assertEqual(self._counts(self.alice)[0], 1)
+        self.assertEqual(self._counts(self.bob)[0], 1)
+
+        self.client.delete(reverse('unfriend', args=[self.bob.id]))
+        self.assertEqual(self._counts(self.alice)[0], 0)
+        self.assertEqual(self._counts(self.bob)[0], 0)
+
+    def test_attendees_count_from_both_sides(self):
+        self.event.attendees.add(self.bob, self.carol)
+        self.carol.attending_events.remove(self.event)
+        self.event.attendees.remove(self.carol)  # not attending any more: no-op
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendees_count, 1)
+
+        # a stale instance saved later must not clobber the counter
+        stale = Event.objects.get(pk=self.event.pk)
+        self.event.attendees.add(self.carol)
+        stale.title = "Renamed"
+        stale.save()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendees_count, 2)
+
+        self.bob.delete()
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendees_count, 1)
+
+    def test_repair_command(self):
+        from django.core.management import call_command
+        from io import StringIO
+        self.event.attendees.add(self.bob)
+        self.alice.friends.add(self.carol)
+        Event.objects.update(attendees_count=7)
+        CustomUser.objects.update(friends_count=0, events_count=3)
+
+        call_command('repair_counters', batch_size=2, stdout=StringIO())
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendees_count, 1)
+        self.assertEqual(self._counts(self.alice), (1, 1))
+        self.assertEqual(self._counts(self.carol), (1, 0))
+        self.assertEqual(self._counts(self.bob), (0, 0))
+
+
+class RSVPTestCase(APITestCase):
+    def setUp(self):
+        self.host = CustomUser.objects.create_user(username='host', password='hostpass',
+                                                   user_type='organization')
+        self.guest = CustomUser.objects.create_user(username='guest', password='guestpass')
+        self.event = Event.objects.create(title="Party", description="D", location="L",
+                                          date="2025-06-15T14:00:00Z", creator=self.host)
+        self.url = reverse('rsvp-event', args=[self.event.id])
+
+    def test_toggle_and_explicit_state(self):
+        self.client.force_authenticate(self.guest)
+        resp = self.client.post(self.url)
+        self.assertEqual(resp.data['data'], {'attendees_count': 1, 'is_attending': True, 'is_waitlisted': False})
+
+        # explicit "attending" is idempotent
+        resp = self.client.post(self.url, {'attending': True}, format='json')
+        self.assertEqual(resp.data['data'], {'attendees_count': 1, 'is_attending': True, 'is_waitlisted': False})
+
+        resp = self.client.post(self.url)
+        self.assertEqual(resp.data['data'], {'attendees_count': 0, 'is_attending': False, 'is_waitlisted': False})
+        self.assertFalse(self.event.attendees.exists())
+
+    def test_query_count_independent_of_attendees(self):
+        self.client.force_authenticate(self.guest)
+        with CaptureQueriesContext(connection) as before:
+            self.client.post(self.url, {'attending': False}, format='json')
+        crowd = [CustomUser.objects.create_user(username=f'crowd{i}', password='x') for i in range(30)]
+        self.event.attendees.add(*crowd)
+        with CaptureQueriesContext(connection) as after:
+            resp = self.client.post(self.url, {'attending': False}, format='json')
+        self.assertEqual(len(before.captured_queries), len(after.captured_queries))
+        self.assertEqual(resp.data['data']['attendees_count'], 30)
+
+    def test_organization_rejected_before_write(self):
+        self.client.force_authenticate(self.host)
+        resp = self.client.post(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(self.event.attendees.exists())
+
+
+class CapacityTestCase(APITestCase):
+    def setUp(self):
+        self.host = CustomUser.objects.create_user(username='caphost', password='x', user_type='organization')
+        self.event = Event.objects.create(title="Small room", description="D", location="L",
+                                          date="2025-06-15T14:00:00Z", creator=self.host, capacity=2)
+        self.guests = [CustomUser.objects.create_user(username=f'seat{i}', password='x') for i in range(4)]
+        self.url = reverse('rsvp-event', args=[self.event.id])
+
+    def _rsvp(self, user, **body):
+        self.client.force_authenticate(user)
+        return self.client.post(self.url, body, format='json').data['data']
+
+    def test_waitlist_and_fifo_promotion(self):
+        a, b, c, d = self.guests
+        self.assertTrue(self._rsvp(a)['is_attending'])
+        self.assertTrue(self._rsvp(b)['is_attending'])
+        waiting = self._rsvp(c)
+        self.assertTrue(waiting['is_waitlisted'])
+        self.assertEqual(waiting['waitlist_position'], 1)
+        self.assertEqual(self._rsvp(d)['waitlist_position'], 2)
+
+        left = self._rsvp(a, attending=False)
+        self.assertEqual(left['attendees_count'], 2)
+        self.assertEqual(set(self.event.attendees.values_list('id', flat=True)), {b.id, c.id})
+        self.assertEqual(list(self.event.waitlist.values_list('user_id', flat=True)), [d.id])
+
+        # toggling while waitlisted leaves the waitlist
+        self.assertFalse(self._rsvp(d)['is_waitlisted'])
+        self.assertFalse(self.event.waitlist.exists())
+
+    def test_capacity_increase_promotes(self):
+        for guest in self.guests:
+            self._rsvp(guest)
+        self.client.force_authenticate(self.host)
+        resp = self.client.patch(f'/api/events/{self.event.id}/edit/', {'capacity': 3})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.data)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendees_count, 3)
+        self.assertIn(self.guests[2].id, self.event.attendees.values_list('id', flat=True))
+
+    def test_capacity_below_attendees_rejected(self):
+        for guest in self.guests[:2]:
+            self._rsvp(guest)
+        self.client.force_authenticate(self.host)
+        resp = self.client.patch(f'/api/events/{self.event.id}/edit/', {'capacity': 1})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('capacity', resp.data['data'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.capacity, 2)
+
+    def _confirm_paid(self, user, payer=None, event_id=None):
+        payer = payer or user
+        session = mock.Mock(id='cs_test', payment_status='paid', payment_intent='pi_test',
+                            metadata={'user_id': str(payer.id), 'event_id': str(event_id or self.event.id)})
+        self.client.force_authenticate(user)
+        with mock.patch('stripe.checkout.Session.retrieve', return_value=session), \
+                mock.patch('stripe.Refund.create') as refund:
+            resp = self.client.post(f'/api/events/{self.event.id}/confirm-checkout/',
+                                    {'session_id': 'cs_test'}, format='json')
+        return resp, refund
+
+    def test_paid_checkout_takes_a_seat(self):
+        resp, refund = self._confirm_paid(self.guests[0])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.data['success'])
+        refund.assert_not_called()
+        self.assertEqual(Attendance.objects.get(user=self.guests[0]).source, Attendance.STRIPE)
+
+    def test_paid_checkout_on_sold_out_event_is_refunded(self):
+        for guest in self.guests[:2]:
+            self._rsvp(guest)
+        resp, refund = self._confirm_paid(self.guests[2])
+        self.assertEqual(resp.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(resp.data['success'])
+        refund.assert_called_once_with(payment_intent='pi_test', idempotency_key='sold-out-refund-cs_test')
+        self.assertFalse(self.event.waitlist.exists())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendees_count, 2)
+        self.assertEqual(StripeCheckout.objects.get().outcome, StripeCheckout.REFUNDED)
+
+    def test_paid_checkout_only_for_its_payer_and_event(self):
+        resp, refund = self._confirm_paid(self.guests[1], payer=self.guests[0])
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        other = Event.objects.create(title="Elsewhere", description="D", location="L",
+                                     date="2025-06-15T14:00:00Z", creator=self.host)
+        resp, _ = self._confirm_paid(self.guests[0], event_id=other.id)
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        refund.assert_not_called()
+        self.assertFalse(Attendance.objects.exists())
+        self.assertFalse(StripeCheckout.objects.exists())
+
+    def test_paid_checkout_is_claimed_once(self):
+        payer = self.guests[0]
+        self.assertEqual(self._confirm_paid(payer)[0].status_code, status.HTTP_200_OK)
+        self._rsvp(payer, attending=False)
+
+        # Confirming the same session again doesn't give the seat back
+        resp, refund = self._confirm_paid(payer)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        refund.assert_not_called()
+        self.assertFalse(Attendance.objects.filter(user=payer).exists())
+        self.assertEqual(StripeCheckout.objects.count(), 1)
+
+
+class AttendanceTestCase(APITestCase):
+    def setUp(self):
+        self.host = CustomUser.objects.create_user(username='athost', password='x', user_type='organization')
+        self.guest = CustomUser.objects.create_user(username='atguest', password='x')
+        self.event = Event.objects.create(title="Gig", description="D", location="L",
+                                          date="2025-06-15T14:00:00Z", creator=self.host, capacity=1)
+        self.event.refresh_from_db()
+
+    def test_rsvp_records_attendance(self):
+        self.client.force_authenticate(self.guest)
+        self.client.post(reverse('rsvp-event', args=[self.event.id]))
+        row = Attendance.objects.get(event=self.event, user=self.guest)
+        self.assertEqual(row.status, Attendance.CONFIRMED)
+        self.assertEqual(row.source, Attendance.FREE)
+        self.assertEqual(row.event_date, self.event.date)
+
+    def test_promoted_seat_is_marked(self):
+        other = CustomUser.objects.create_user(username='atother', password='x')
+        attendance.set_attendance(self.event, self.guest, True)
+        attendance.set_attendance(self.event, other, True)
+        attendance.set_attendance(self.event, self.guest, False)
+        self.assertEqual(Attendance.objects.get(user=other).status, Attendance.PROMOTED)
+
+    def test_event_date_follows_event(self):
+        self.event.attendees.add(self.guest)
+        self.assertEqual(Attendance.objects.get(user=self.guest).event_date, self.event.date)
+
+        self.event.date = timezone.now() + timedelta(days=3)
+        self.event.save()
+        self.assertEqual(Attendance.objects.get(user=self.guest).event_date, self.event.date)
+
+
+class MyEventsTestCase(APITestCase):
+    def setUp(self):
+        self.host = CustomUser.objects.create_user(username='calhost', password='x', user_type='organization')
+        self.user = CustomUser.objects.create_user(username='caluser', password='x')
+        now = timezone.now()
+        self.upcoming = []
+        for days in (1, 2, 3, 40):
+            event = Event.objects.create(title=f"In {days}", description="D", location="L",
+                                         date=now + timedelta(days=days), creator=self.host)
+            event.attendees.add(self.user)
+            self.upcoming.append(event)
+        self.past = Event.objects.create(title="Last week", description="D", location="L",
+                                         date=now - timedelta(days=7), creator=self.host)
+        self.past.attendees.add(self.user)
+        # not attending: must never show up
+        Event.objects.create(title="Other", description="D", location="L",
+                             date=now + timedelta(days=1), creator=self.host)
+        self.url = reverse('my_events')
+        self.client.force_authenticate(self.user)
+
+    def test_upcoming_pages_in_date_order(self):
+        first = self.client.get(self.url, {'page_size': 3}).data
+        self.assertEqual([e['id'] for e in first['data']], [e.id for e in self.upcoming[:3]])
+        self.assertTrue(all(e['is_attending'] for e in first['data']))
+        rest = self.client.get(self.url, {'page_size': 3, 'cursor': first['pagination']['next_cursor']}).data
+        self.assertEqual([e['id'] for e in rest['data']], [self.upcoming[3].id])
+        self.assertIsNone(rest['pagination']['next_cursor'])
+
+    def test_past_and_date_window(self):
+        past = self.client.get(self.url, {'when': 'past'}).data['data']
+        self.assertEqual([e['id'] for e in past], [self.past.id])
+
+        window_end = (timezone.now() + timedelta(days=30)).date().isoformat()
+        windowed = self.client.get(self.url, {'to': window_end}).data['data']
+        self.assertEqual([e['id'] for e in windowed], [e.id for e in self.upcoming[:3]])
+
+        self.assertEqual(self.client.get(self.url, {'from': 'soon'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_is_constant(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+
+
+class CalendarFeedTestCase(APITestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='icsuser', password='x', user_type='organization')
+        self.other = CustomUser.objects.create_user(username='icsother', password='x', user_type='organization')
+        soon = timezone.now() + timedelta(days=2)
+        self.own = Event.objects.create(title="My meetup", description="Line one\nLine two " + "é" * 80,
+                                        location="Hall, 2",
+                                        date=soon, creator=self.user)
+        self.joined = Event.objects.create(title="Their gig", description="D", location="L",
+                                           date=soon, creator=self.other)
+        self.joined.attendees.add(self.user)
+        self.unrelated = Event.objects.create(title="Unrelated", description="D", location="L",
+                                              date=soon, creator=self.other)
+        self.client.force_authenticate(self.user)
+        self.url = self.client.get(reverse('calendar_feed_link')).data['data']['url']
+        self.client.force_authenticate(None)
+
+    def _feed(self, **headers):
+        resp = self.client.get(self.url, **headers)
+        body = b''.join(resp.streaming_content).decode() if resp.status_code == 200 else ''
+        return resp, body
+
+    def test_feed_lists_created_and_attended_events(self):
+        resp, body = self._feed()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp['Content-Type'].startswith('text/calendar'))
+        self.assertIn(f'UID:event-{self.own.id}@gatherspot', body)
+        self.assertIn(f'UID:event-{self.joined.id}@gatherspot', body)
+        self.assertNotIn(f'UID:event-{self.unrelated.id}@gatherspot', body)
+        self.assertIn('DESCRIPTION:Line one\\nLine two', body)
+        self.assertIn('LOCATION:Hall\\, 2', body)
+        # long lines are folded at 75 octets without splitting characters
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split('\r\n')))
+        self.assertIn("é" * 80, body.replace('\r\n ', ''))
+
+    def test_unchanged_feed_is_304_in_one_query(self):
+        resp, _ = self._feed()
+        with CaptureQueriesContext(connection) as ctx:
+            again, _ = self._feed(HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+        # token lookup + validators
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_changes_invalidate_etag(self):
+        etag = self._feed()[0]['ETag']
+        self.joined.attendees.remove(self.user)
+        after_leave = self._feed(HTTP_IF_NONE_MATCH=etag)[0]
+        self.assertEqual(after_leave.status_code, status.HTTP_200_OK)
+
+        etag = after_leave['ETag']
+        self.own.title = "Renamed meetup"
+        self.own.save()
+        resp, body = self._feed(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn('SUMMARY:Renamed meetup', body)
+
+    def test_bad_token(self):
+        self.assertEqual(self.client.get(reverse('calendar_feed', args=['1:forged'])).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        self.host = CustomUser.objects.create_user(username='etaghost', password='x', user_type='organization')
+        self.viewer = CustomUser.objects.create_user(username='etagviewer', password='x')
+        self.fan = CustomUser.objects.create_user(username='etagfan', password='x')
+        self.events = [
+            Event.objects.create(title=f"E{i}", description="D", location="L",
+                                 date="2025-06-15T14:00:00Z", creator=self.host)
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.viewer)
+
+    def _get(self, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, **headers)
+
+    def test_list_returns_304_until_something_changes(self):
+        url = reverse('create_event')
+        etag = self._get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self._get(url, etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('Authorization', resp['Vary'])
+
+        # someone else's RSVP changes attendees_count on the page
+        self.events[0].attendees.add(self.fan)
+        resp = self._get(url, etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['data'][0]['attendees_count'], 1)
+
+    def test_etag_is_per_viewer(self):
+        url = reverse('create_event')
+        etag = self._get(url)['ETag']
+        self.events[1].attendees.add(self.viewer)
+        self.assertEqual(self._get(url, etag).status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(self.host)
+        self.assertNotEqual(self._get(url)['ETag'], etag)
+
+    def test_detail(self):
+        url = reverse('delete_event', args=[self.events[0].id])
+        first = self._get(url)
+        self.assertIn('Last-Modified', first)
+        self.assertEqual(self._get(url, first['ETag']).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.events[0].title = "Changed"
+        self.events[0].save()
+        resp = self._get(url, first['ETag'])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['data']['title'], "Changed")
+
+    def test_reviews(self):
+        url = reverse('list_reviews', args=[self.events[0].id])
+        review = Review.objects.create(event=self.events[0], reviewer=self.fan, rating=5, comment="Great")
+        Review.objects.create(event=self.events[0], reviewer=self.host, rating=4, comment="Good")
+        etag = self._get(url)['ETag']
+        self.assertEqual(self._get(url, etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        review.delete()
+        resp = self._get(url, etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(resp.data), 1)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class EventSyncTestCase(APITestCase):
+    def setUp(self):
+        self.host = CustomUser.objects.create_user(username='synchost', password='x', user_type='organization')
+        self.events = [
+            Event.objects.create(title=f"S{i}", description="D", location="L",
+                                 date="2025-06-15T14:00:00Z", creator=self.host)
+            for i in range(5)
+        ]
+        self.url = reverse('event_sync')
+
+    def _sync(self, cursor=None, **params):
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get(self.url, params)
+
+    def _full_sync(self):
+        seen, cursor = [], None
+        while True:
+            body = self._sync(cursor, page_size=2).data
+            seen += [e['id'] for e in body['data']['updated']]
+            cursor = body['pagination']['next_cursor']
+            if not body['pagination']['has_more']:
+                return seen, cursor
+
+    def test_initial_then_delta(self):
+        seen, cursor = self._full_sync()
+        self.assertEqual(sorted(seen), sorted(e.id for e in self.events))
+
+        quiet = self._sync(cursor).data
+        self.assertEqual(quiet['data'], {'updated': [], 'deleted': []})
+
+        edited, removed = self.events[1], self.events[3]
+        edited.title = "Edited"
+        edited.save()
+        removed_id = removed.id
+        self.client.force_authenticate(self.host)
+        self.client.delete(reverse('delete_event', args=[removed_id]))
+        self.assertEqual(list(EventTombstone.objects.values_list('event_id', flat=True)), [removed_id])
+        added = Event.objects.create(title="New", description="D", location="L",
+                                     date="2025-06-15T14:00:00Z", creator=self.host)
+
+        delta = self._sync(cursor).data
+        self.assertEqual([e['id'] for e in delta['data']['updated']], [edited.id, added.id])
+        self.assertEqual(delta['data']['deleted'], [removed_id])
+        self.assertFalse(delta['pagination']['has_more'])
+
+    def test_settle_window_holds_back_fresh_changes(self):
+        with self.settings(SYNC_SETTLE_SECONDS=60):
+            self.assertEqual(self._sync().data['data']['updated'], [])
+
+    def test_expired_and_bad_cursors(self):
+        _, cursor = self._full_sync()
+        with self.settings(SYNC_TOMBSTONE_RETENTION_DAYS=0):
+            self.assertEqual(self._sync(cursor).status_code, status.HTTP_410_GONE)
+        self.assertEqual(self._sync('garbage').status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_regular_syncs_of_quiet_catalogue_never_expire(self):
+        _, cursor = self._full_sync()
+        self.assertFalse(EventTombstone.objects.exists())  # the cursor can't ride on a tombstone
+        start = timezone.now()
+        # a sync every 20 days for 100 days, with 30 days of retention and no deletions
+        for days in range(20, 120, 20):
+            with mock.patch('django.utils.timezone.now', return_value=start + timedelta(days=days)):
+                resp = self._sync(cursor)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, days)
+            self.assertEqual(resp.data['data'], {'updated': [], 'deleted': []})
+            cursor = resp.data['pagination']['next_cursor']
+
+        # ...while a client that stopped syncing for longer still has to resync
+        with mock.patch('django.utils.timezone.now', return_value=start + timedelta(days=200)):
+            self.assertEqual(self._sync(cursor).status_code, status.HTTP_410_GONE)
+
+
+class PublicCacheTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = CustomUser.objects.create_user(username='cachehost', password='x', user_type='organization')
+        self.fan = CustomUser.objects.create_user(username='cachefan', password='x')
+        self.event = Event.objects.create(title="Cached", description="D", location="L",
+                                          date="2025-06-15T14:00:00Z", creator=self.host)
+        self.url = reverse('create_event')
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        return len(ctx.captured_queries), resp.data
+
+    def test_anonymous_hit_needs_no_queries(self):
+        self._queries(self.url)
+        queries, data = self._queries(self.url)
+        self.assertEqual(queries, 0)
+        self.assertEqual([e['id'] for e in data['data']], [self.event.id])
+
+    def test_viewer_fields_are_overlaid(self):
+        self.event.attendees.add(self.fan)
+        self._queries(self.url)  # anonymous fills the cache
+
+        self.client.force_authenticate(self.fan)
+        queries, data = self._queries(self.url)
+        self.assertEqual(queries, 1)
+        self.assertTrue(data['data'][0]['is_attending'])
+        self.assertFalse(data['data'][0]['is_owner'])
+
+        self.client.force_authenticate(self.host)
+        _, data = self._queries(self.url)
+        self.assertFalse(data['data'][0]['is_attending'])
+        self.assertTrue(data['data'][0]['is_owner'])
+
+    def test_writes_invalidate(self):
+        self._queries(self.url)
+        self.client.force_authenticate(self.fan)
+        self.client.post(reverse('rsvp-event', args=[self.event.id]))
+        self.client.force_authenticate(None)
+        _, data = self._queries(self.url)
+        self.assertEqual(data['data'][0]['attendees_count'], 1)
+
+        reviews_url = reverse('list_reviews', args=[self.event.id])
+        self._queries(reviews_url)
+        self.assertEqual(self._queries(reviews_url), (0, []))
+        Review.objects.create(event=self.event, reviewer=self.fan, rating=5, comment="Nice")
+        self.assertEqual(len(self._queries(reviews_url)[1]), 1)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_STICKY_SECONDS=30)
+class ReplicaRoutingTestCase(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = routing.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def _route(self, method, auth='Bearer one', status_code=200):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Event))
+            return HttpResponse(status=status_code)
+
+        request = getattr(self.factory, method)('/api/events/', HTTP_AUTHORIZATION=auth)
+        routing.PrimaryPinMiddleware(view)(request)
+        return seen[0]
+
+    def test_reads_go_to_replica_writes_to_primary(self):
+        self.assertEqual(self.router.db_for_read(Event), 'replica')
+        self.assertEqual(self.router.db_for_write(Event), 'default')
+        with routing.use_primary():
+            self.assertEqual(self.router.db_for_read(Event), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'PerfectSpot'))
+
+    def test_read_your_writes(self):
+        self.assertEqual(self._route('get'), 'replica')
+        self.assertEqual(self._route('post', status_code=400), 'default')
+        self.assertEqual(self._route('get'), 'replica')  # failed writes don't pin
+
+        self.assertEqual(self._route('patch'), 'default')
+        self.assertEqual(self._route('get'), 'default')
+        self.assertEqual(self._route('get', auth='Bearer two'), 'replica')
+
+    def test_public_cache_builds_from_the_primary(self):
+        def build():
+            return self.router.db_for_read(Event)
+
+        self.assertEqual(public_cache.get_or_build('routing', [1], build), 'default')
+        self.assertEqual(build(), 'replica')
+
+    async def test_async_public_cache_builds_from_the_primary(self):
+        async def abuild():
+            return self.router.db_for_read(Event)
+
+        self.assertEqual(await public_cache.aget_or_build('routing', [1], abuild), 'default')
+        self.assertEqual(await abuild(), 'replica')
+
+
+class SQLiteTuningTestCase(APITestCase):
+    def test_pragmas_applied_on_connect(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+    def test_pragma_statements_are_validated(self):
+        self.assertEqual(
+            list(sqlite_tuning.pragma_statements({'busy_timeout': 100, 'journal_mode': 'wal'})),
+            ['PRAGMA journal_mode = wal', 'PRAGMA busy_timeout = 100'],
+        )
+        with self.assertRaises(ValueError):
+            list(sqlite_tuning.pragma_statements({'journal_mode': 'wal; DROP TABLE x'}))
+
+
+class AsyncViewsTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.host = CustomUser.objects.create_user(username='asynchost', password='x', user_type='organization')
+        self.fan = CustomUser.objects.create_user(username='asyncfan', password='x')
+        self.event = Event.objects.create(title="Async jazz night", description="Live jazz", location="Riga",
+                                          date="2025-06-15T14:00:00Z", creator=self.host)
+        Event.objects.create(title="Chess club", description="D", location="L",
+                             date="2025-06-16T14:00:00Z", creator=self.fan)
+        attendance.set_attendance(self.event, self.fan, True)
+        Review.objects.create(event=self.event, reviewer=self.fan, rating=5, comment="Great")
+        self.fan.friends.add(self.host)
+        self.host.friends.add(self.fan)
+        token = RefreshToken.for_user(self.fan).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def assertSameResponse(self, sync_url, async_url):
+        sync_resp = self.client.get(sync_url)
+        async_resp = self.client.get(async_url)
+        self.assertEqual(sync_resp.status_code, 200)
+        self.assertEqual(async_resp.status_code, 200)
+        self.assertEqual(async_resp.json(), sync_resp.json())
+        return async_resp
+
+    def test_event_list_matches_sync(self):
+        resp = self.assertSameResponse(reverse('create_event'), reverse('async_event_list'))
+        self.assertTrue(resp.json()['data'][0]['is_attending'])
+        self.assertSameResponse(reverse('create_event') + '?q=jazz', reverse('async_event_list') + '?q=jazz')
+
+        self.client.credentials()
+        self.assertSameResponse(reverse('create_event') + '?title=chess', reverse('async_event_list') + '?title=chess')
+
+    def test_event_detail_and_reviews_match_sync(self):
+        resp = self.assertSameResponse(reverse('delete_event', args=[self.event.id]),
+                                       reverse('async_event_detail', args=[self.event.id]))
+        again = self.client.get(reverse('async_event_detail', args=[self.event.id]),
+                                HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.client.get(reverse('async_event_detail', args=[999999])).status_code, 404)
+
+        self.assertSameResponse(reverse('list_reviews', args=[self.event.id]),
+                                reverse('async_review_list', args=[self.event.id]))
+
+    def test_user_search_and_profile_match_sync(self):
+        self.assertSameResponse(reverse('user-search') + '?q=async', reverse('async_user_search') + '?q=async')
+        for query in ('', '?compact=1'):
+            self.assertSameResponse(reverse('user-profile-api', args=[self.host.id]) + query,
+                                    reverse('async_user_profile', args=[self.host.id]) + query)
+
+    def test_authentication(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(self.client.get(reverse('async_event_list')).status_code, 401)
+        self.client.credentials()
+        self.assertEqual(self.client.get(reverse('async_event_list')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('async_user_search') + '?q=a').status_code, 401)
+        self.assertEqual(self.client.post(reverse('async_event_list')).status_code, 405)
+
+    async def test_served_by_asgi_handler(self):
+        resp = await self.async_client.get(reverse('async_event_list'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['data']), 2)
+
+
+class LoadTestCommandTestCase(LiveServerTestCase):
+    databases = '__all__'
+
+    def test_reports_both_targets(self):
+        out = StringIO()
+        url = self.live_server_url + reverse('create_event')
+        call_command('loadtest', wsgi_url=url, asgi_url=self.live_server_url + reverse('async_event_list'),
+                     concurrency='1,4', requests=8, stdout=out)
+        rows = [line.split() for line in out.getvalue().splitlines() if line.startswith(('wsgi', 'asgi'))]
+        self.assertEqual([(row[0], row[1]) for row in rows],
+                         [('wsgi', '1'), ('asgi', '1'), ('wsgi', '4'), ('asgi', '4')])
+        self.assertTrue(all(row[-1] == '0' for row in rows))
+
+    def test_percentile(self):
+        self.assertEqual(stats.percentile([3, 1, 2, 4], 50), 2)
+        self.assertEqual(stats.percentile(list(range(1, 101)), 95), 95)
+
+
+class EventCsvImportTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reports = tempfile.TemporaryDirectory()
+        self.addCleanup(reports.cleanup)
+        override = override_settings(IMPORT_REPORT_DIR=reports.name, JOB_FILES_DIR=reports.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.admin = CustomUser.objects.create_superuser(username='importadmin', password='x', email='a@x.com')
+        self.host = CustomUser.objects.create_user(username='importhost', password='x', user_type='organization')
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:event_import_csv')
+
+    def _upload(self, text, name='events.csv'):
+        upload = SimpleUploadedFile(name, text.encode('utf-8'), content_type='text/csv')
+        return self.client.post(self.url, {'csv_file': upload}, follow=True)
+
+    def test_imports_in_chunks_and_reports_bad_rows(self):
+        rows = ['title,description,location,date,creator,is_promoted,latitude,longitude']
+        rows += [f'Show {i},D,Riga,2030-01-{1 + i:02d} 18:00,importhost,{i % 2},56.95,24.1' for i in range(5)]
+        rows += ['Ghost,D,L,2030-02-01 18:00,nobody,0,,',
+                 'Bad date,D,L,01/02/2030,importhost,0,,',
+                 ',D,L,2030-02-01 18:00,importhost,0,,']
+
+        self.client.get(reverse('create_event'))  # fill the public listing cache
+        with CaptureQueriesContext(connection) as ctx:
+            imported, report = importers.import_events(BytesIO('\n'.join(rows).encode()), chunk_size=2)
+        self.assertEqual((imported, report.count), (5, 3))
+        # Per chunk: one creator lookup, one insert, one counter update (+ savepoints)
+        self.assertLessEqual(len(ctx.captured_queries), 4 * 7)
+
+        events = Event.objects.filter(title__startswith='Show')
+        self.assertEqual(events.count(), 5)
+        self.assertTrue(all(e.geohash for e in events))
+        self.host.refresh_from_db()
+        self.assertEqual(self.host.events_count, 5)
+        listing = self.client.get(reverse('create_event'))
+        self.assertEqual(len(listing.json()['data']), 5)
+
+        resp = self.client.get(reverse('admin:event_import_report', args=[report.report_id]))
+        body = b''.join(resp.streaming_content).decode()
+        lines = list(csv.DictReader(StringIO(body)))
+        self.assertEqual([line['title'] for line in lines], ['Ghost', 'Bad date', ''])
+        self.assertIn("User 'nobody' does not exist", lines[0]['error'])
+        self.assertIn("title", lines[2]['error'])
+
+    def test_admin_upload_queues_a_job(self):
+        resp = self._upload('title,description,location,date,creator,is_promoted\n'
+                            'One,D,L,2030-01-01 18:00,importhost,true\n'
+                            'Two,D,L,2030-01-01 18:00,nobody,true\n')
+        self.assertEqual(resp.status_code, 200)
+        job = Job.objects.get()
+        self.assertIn(f'Import queued as job #{job.pk}', resp.content.decode())
+        self.assertFalse(Event.objects.exists())
+
+        call_command('run_jobs', once=True, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual((job.rows_processed, job.rows_succeeded, job.error_count), (2, 1, 1))
+        self.assertTrue(Event.objects.filter(title='One', is_promoted=True).exists())
+
+        changelist = self.client.get(reverse('admin:PerfectSpot_job_changelist')).content.decode()
+        self.assertIn(reverse('admin:event_import_report', args=[job.report_id]), changelist)
+        status = self.client.get(reverse('admin:job_status') + f'?ids={job.pk}').json()
+        self.assertEqual(status[str(job.pk)]['status'], Job.SUCCEEDED)
+
+    def test_missing_columns(self):
+        resp = self._upload('title,date\nOne,2030-01-01 18:00\n')
+        self.assertIn('Missing columns: description, location, creator, is_promoted', resp.content.decode())
+        self.assertFalse(Event.objects.exists())
+
+
+@override_settings(JOB_STALE_SECONDS=60, JOB_MAX_ATTEMPTS=2)
+class JobQueueTestCase(APITestCase):
+    def setUp(self):
+        files = tempfile.TemporaryDirectory()
+        self.addCleanup(files.cleanup)
+        override = override_settings(IMPORT_REPORT_DIR=files.name, JOB_FILES_DIR=files.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.host = CustomUser.objects.create_user(username='jobhost', password='x')
+
+    def _enqueue(self, titles, chunk_size=2):
+        rows = ['title,description,location,date,creator,is_promoted']
+        rows += [f'{title},D,L,2030-01-01 18:00,jobhost,0' for title in titles]
+        upload = SimpleUploadedFile('events.csv', '\n'.join(rows).encode())
+        return jobs.enqueue(Job.IMPORT_EVENTS, params={'chunk_size': chunk_size}, input_file=upload)
+
+    def _go_stale(self, job):
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(minutes=5))
+
+    def test_claim_is_exclusive_until_stale(self):
+        job = self._enqueue(['A'])
+        self.assertEqual(jobs.claim_next('w1'), job)
+        self.assertIsNone(jobs.claim_next('w2'))
+
+        self._go_stale(job)
+        claimed = jobs.claim_next('w2')
+        self.assertEqual((claimed.worker, claimed.attempts), ('w2', 2))
+
+        self._go_stale(job)
+        jobs.run(jobs.claim_next('w3'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertFalse(Event.objects.exists())
+
+    def test_crashed_job_resumes_after_last_committed_chunk(self):
+        job = self._enqueue(['A', 'B', 'C', 'D', 'E'])
+        # A worker died after committing the first chunk (A, B)
+        Event.objects.create(title='A', description='D', location='L', date='2030-01-01T18:00Z', creator=self.host)
+        Event.objects.create(title='B', description='D', location='L', date='2030-01-01T18:00Z', creator=self.host)
+        Job.objects.filter(pk=job.pk).update(status=Job.RUNNING, attempts=1, rows_processed=2, rows_succeeded=2,
+                                             checkpoint={'rows': 2, 'report_offset': 0})
+        self._go_stale(job)
+
+        call_command('run_jobs', once=True, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual((job.rows_processed, job.rows_succeeded), (5, 5))
+        self.assertEqual(sorted(Event.objects.values_list('title', flat=True)), ['A', 'B', 'C', 'D', 'E'])
+        self.host.refresh_from_db()
+        self.assertEqual(self.host.events_count, 5)
+
+    def test_finished_job_deletes_its_upload(self):
+        job = self._enqueue(['A'])
+        storage, name = job.input_file.storage, job.input_file.name
+        self.assertTrue(storage.exists(name))
+
+        jobs.run(jobs.claim_next('w1'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertFalse(job.input_file)
+        self.assertFalse(storage.exists(name))
+
+    def test_export_job_writes_a_downloadable_file(self):
+        event = Event.objects.create(title='Gala', description='D', location='L', date='2030-01-01T18:00Z',
+                                     creator=self.host)
+        Event.objects.create(title='Other', description='D', location='L', date='2030-01-02T18:00Z',
+                             creator=self.host)
+        admin = CustomUser.objects.create_superuser(username='jobadmin', password='x', email='a@x.com')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:PerfectSpot_event_changelist'), {
+            'action': 'queue_export_events_csv', '_selected_action': [event.pk],
+        })
+        job = Job.objects.get(kind=Job.EXPORT)
+        self.assertEqual(job.params['selection'], {'ids': [event.pk]})
+
+        call_command('run_jobs', once=True, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_processed), (Job.SUCCEEDED, 1))
+        self.assertTrue(job.output_file.path.startswith(os.path.realpath(settings.JOB_FILES_DIR)))
+
+        resp = self.client.get(reverse('admin:job_output', args=[job.pk]))
+        self.assertIn('attachment;', resp['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(b''.join(resp.streaming_content).decode())))
+        self.assertEqual([row['title'] for row in rows], ['Gala'])
+
+    def test_export_of_all_rows_stores_the_filters_not_the_ids(self):
+        for title, promoted in [('Gala', True), ('Gala dinner', False), ('Other', True)]:
+            Event.objects.create(title=title, description='D', location='L', date='2030-01-01T18:00Z',
+                                 creator=self.host, is_promoted=promoted)
+        admin = CustomUser.objects.create_superuser(username='jobadmin', password='x', email='a@x.com')
+        self.client.force_login(admin)
+        url = reverse('admin:PerfectSpot_event_changelist') + '?is_promoted__exact=1&q=gala&o=1'
+        self.client.post(url, {
+            'action': 'queue_export_events_csv', 'select_across': '1',
+            '_selected_action': list(Event.objects.values_list('pk', flat=True)),
+        })
+        job = Job.objects.get(kind=Job.EXPORT)
+        self.assertEqual(job.params['selection'],
+                         {'all': True, 'filters': {'is_promoted__exact': '1'}, 'search': 'gala'})
+
+        call_command('run_jobs', once=True, stdout=StringIO())
+        job.refresh_from_db()
+        with job.output_file.open('r') as f:
+            self.assertEqual([row['title'] for row in csv.DictReader(f)], ['Gala'])
+
+
+class ExportTestCase(APITestCase):
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(username='exportadmin', password='x', email='a@x.com')
+        self.host = CustomUser.objects.create_user(username='exporthost', password='x')
+        self.fan = CustomUser.objects.create_user(username='exportfan', password='x', email='fan@x.com')
+        self.event = Event.objects.create(title='Gala, "annual"', description='Line one\nline two', location='L',
+                                          date='2030-01-01T18:00Z', creator=self.host)
+        self.other = Event.objects.create(title='Other', description='D', location='L',
+                                          date='2030-01-02T18:00Z', creator=self.host)
+        attendance.set_attendance(self.event, self.fan, True)
+        Review.objects.create(event=self.event, reviewer=self.fan, rating=4, comment='Good')
+        self.client.force_login(self.admin)
+
+    def _action(self, action, model='event', pks=None):
+        resp = self.client.post(reverse(f'admin:PerfectSpot_{model}_changelist'), {
+            'action': action, '_selected_action': pks or [self.event.pk],
+        })
+        self.assertEqual(resp.status_code, 200)
+        return resp, b''.join(resp.streaming_content).decode()
+
+    def test_events_csv_action(self):
+        resp, body = self._action('export_events_csv')
+        self.assertEqual(resp['Content-Type'], 'text/csv')
+        self.assertIn('attachment;', resp['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Gala, "annual"')
+        self.assertEqual(rows[0]['description'], 'Line one\nline two')
+        self.assertEqual((rows[0]['creator'], rows[0]['attendees_count']), ('exporthost', '1'))
+
+    def test_csv_neutralises_formulas(self):
+        Event.objects.filter(pk=self.event.pk).update(title='=HYPERLINK("http://x")', location='-1+2',
+                                                      description='\tcmd')
+        _, body = self._action('export_events_csv')
+        row = next(csv.DictReader(StringIO(body)))
+        self.assertEqual((row['title'], row['location']), ('\'=HYPERLINK("http://x")', "'-1+2"))
+        self.assertEqual(row['description'], "'\tcmd")
+        self.assertEqual(row['attendees_count'], '1')
+
+        _, body = self._action('export_events_ndjson')
+        self.assertEqual(json.loads(body)['title'], '=HYPERLINK("http://x")')
+
+    def test_attendees_and_reviews_ndjson_actions(self):
+        _, body = self._action('export_attendees_ndjson', pks=[self.event.pk, self.other.pk])
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([(a['event_id'], a['username'], a['email']) for a in lines],
+                         [(self.event.pk, 'exportfan', 'fan@x.com')])
+
+        review = Review.objects.get()
+        _, body = self._action('export_reviews_ndjson', model='review', pks=[review.pk])
+        self.assertEqual(json.loads(body)['comment'], 'Good')
+
+    def test_command_streams_in_chunks(self):
+        out = StringIO()
+        call_command('export_data', 'events', format='ndjson', chunk_size=1, stdout=out)
+        self.assertEqual([json.loads(line)['title'] for line in out.getvalue().splitlines()],
+                         ['Gala, "annual"', 'Other'])
+
+        out = StringIO()
+        call_command('export_data', 'attendees', events=[self.other.pk], stdout=out)
+        self.assertEqual(out.getvalue().splitlines(), [
+            'event_id,event_title,user_id,username,email,status,source,joined_at'
+        ])
+
+
+class SeedDataTestCase(APITestCase):
+    OPTIONS = dict(users=30, events=20, attendances=100, friendships=40, friend_requests=20, reviews=50,
+                   seed=7, chunk_size=8)
+
+    def _seed(self, out=None):
+        call_command('seed_data', stdout=out or StringIO(), **self.OPTIONS)
+        return list(Event.objects.order_by('id').values_list('title', 'date', 'latitude', 'capacity'))
+
+    def test_friend_requests_only_between_strangers(self):
+        out = StringIO()
+        self._seed(out)
+        requests = list(FriendRequest.objects.values_list('from_user_id', 'to_user_id'))
+        pairs = {frozenset(pair) for pair in requests}
+        self.assertEqual(len(pairs), len(requests))  # never both A→B and B→A
+        friendships = set(CustomUser.friends.through.objects.values_list('from_customuser_id',
+                                                                       'to_customuser_id'))
+        self.assertFalse([pair for pair in requests if pair in friendships])
+
+        # The report counts rows inserted, not pairs drawn
+        self.assertIn(f"Created {len(friendships) // 2} friendships", out.getvalue())
+        self.assertIn(f"Created {len(requests)} friend requests", out.getvalue())
+
+    def test_bulk_seed_is_consistent(self):
+        self._seed()
+        self.assertEqual(CustomUser.objects.count(), 30)
+        self.assertEqual(Event.objects.count(), 20)
+        self.assertEqual(Review.objects.count(), 50)
+        self.assertTrue(Attendance.objects.exists())
+        self.assertTrue(FriendRequest.objects.exists())
+
+        # Counters match the rows, as if every insert had gone through the signals
+        for user in CustomUser.objects.all():
+            self.assertEqual(user.events_count, user.events.count())
+            self.assertEqual(user.friends_count, user.friends.count())
+        for event in Event.objects.all():
+            self.assertEqual(event.attendees_count, event.attendances.count())
+            if event.capacity is not None:
+                self.assertLessEqual(event.attendees_count, event.capacity)
+            self.assertTrue(event.geohash)
+        self.assertFalse(Attendance.objects.exclude(event_date=F('event__date')).exists())
+        self.assertFalse(Attendance.objects.filter(user=F('event__creator')).exists())
+
+        user = CustomUser.objects.first()
+        self.assertTrue(user.check_password('password123'))
+        self.assertEqual(user.password, CustomUser.objects.last().password)  # hashed once
+
+    def test_same_seed_same_data(self):
+        first = self._seed()
+        Event.objects.all().delete()
+        CustomUser.objects.all().delete()
+        self.assertEqual(self._seed(), first)
+
+
+class BenchmarkTestCase(APITestCase):
+    """
+    The query budgets in PerfectSpot/benchmarks.py, on a small seeded
+    dataset. Latency thresholds are left to `manage.py benchmark_api`: a few
+    wall-clock samples per endpoint are too noisy to assert on.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_data', users=60, events=80, attendances=400, friendships=150,
+                     friend_requests=60, reviews=200, stdout=StringIO())
+
+    def test_every_route_is_benchmarked(self):
+        self.assertEqual(benchmarks.uncovered_routes(), [])
+
+    def test_endpoints_stay_within_budget(self):
+        report = benchmarks.run(iterations=3, latency_factor=None)
+        over = {name: result['violations'] for name, result in report['endpoints'].items()
+                if result['violations']}
+        self.assertEqual(over, {})
+        self.assertEqual(len(report['endpoints']), len(benchmarks.ENDPOINTS))
+        json.dumps(report)  # written as the JSON report
+
+    def test_over_budget_is_reported(self):
+        fixtures = benchmarks.prepare()
+        endpoint = benchmarks.Endpoint('profile', 'user-profile-api', 1, 0.001,
+                                       args=lambda f: [f['other'].pk])
+        result = benchmarks.measure(endpoint, fixtures, iterations=2)
+
+        self.assertGreater(result['queries'], 1)
+        self.assertGreater(result['bytes'], 0)
+        problems = benchmarks.violations(endpoint, result)
+        self.assertEqual(len(problems), 2)
+        self.assertIn("(budget 1)", problems[0])
+        self.assertIn("p95", problems[1])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], REPLICA_STICKY_SECONDS=30)
+class ReplicaDatabasesTestCase(TransactionTestCase):
+    """
+    Routing against two real SQLite files: "replica" is a snapshot of the
+    primary taken in setUp and never updated, i.e. a replica lagging behind.
+    """
+
+    def setUp(self):
+        cache.clear()
+        host = CustomUser.objects.create_user(username='replicahost', password='x')
+        self.fan = CustomUser.objects.create_user(username='replicafan', password='x')
+        self.event = Event.objects.create(title="Replicated", description="D", location="L",
+                                          date=timezone.now() + timedelta(days=1), creator=host)
+
+        files = tempfile.TemporaryDirectory()
+        self.addCleanup(files.cleanup)
+        path = os.path.join(files.name, 'replica.sqlite3')
+        primary = db_connections['default']
+        primary.ensure_connection()
+        replica = sqlite3.connect(path)
+        primary.connection.backup(replica)
+        replica.close()
+        db_connections.settings['replica'] = {**primary.settings_dict, 'NAME': path}
+        self.addCleanup(self._drop_replica)
+
+    def _drop_replica(self):
+        db_connections['replica'].close()
+        del db_connections['replica']
+        del db_connections.settings['replica']
+
+    def _client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def _my_event_ids(self, client):
+        resp = client.get(reverse('my_events'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return [event['id'] for event in resp.data['data']]
+
+    def test_reads_after_a_write_see_it(self):
+        writer, other = self._client(self.fan), self._client(self.fan)
+        self.assertEqual(self._my_event_ids(writer), [])  # served by the replica
+
+        resp = writer.post(reverse('rsvp-event', args=[self.event.pk]))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(Attendance.objects.using('default').filter(user=self.fan).exists())
+        self.assertFalse(Attendance.objects.using('replica').exists())
+
+        # The writer's next reads are pinned to the primary...
+        self.assertEqual(self._my_event_ids(writer), [self.event.pk])
+        self.assertEqual(self._my_event_ids(writer), [self.event.pk])
+        # ...while a client without a pin still reads the lagging replica.
+        self.assertEqual(self._my_event_ids(other), [])
+
+
+class JobWorkerRoutingTestCase(TransactionTestCase):
+    """
+    The worker outside a test transaction, where the router would otherwise
+    send its reads to a replica.
+    """
+
+    def setUp(self):
+        files = tempfile.TemporaryDirectory()
+        self.addCleanup(files.cleanup)
+        override = override_settings(IMPORT_REPORT_DIR=files.name, JOB_FILES_DIR=files.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        CustomUser.objects.create_user(username='jobhost', password='x')
+
+    def test_worker_reads_only_from_the_primary(self):
+        rows = ['title,description,location,date,creator,is_promoted']
+        rows += [f'{title},D,L,2030-01-01 18:00,jobhost,0' for title in 'ABC']
+        job = jobs.enqueue(Job.IMPORT_EVENTS, params={'chunk_size': 2},
+                           input_file=SimpleUploadedFile('events.csv', '\n'.join(rows).encode()))
+        # Any read routed to the replica fails: the alias doesn't exist.
+        with override_settings(DATABASE_REPLICAS=['missing-replica']):
+            call_command('run_jobs', once=True, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED, job.message)
+        self.assertEqual(job.message, "Imported 3 events, 0 rows rejected.")
+
+
+class CapacityConcurrencyTestCase(TransactionTestCase):
+    """Fires simultaneous RSVPs from many threads at one small event."""
+    # reads may be routed to a (mirrored) replica when one is configured
+    databases = '__all__'
+    GUESTS = 200
+    CAPACITY = 25
+
+    def test_no_overselling_under_concurrency(self):
+        host = CustomUser.objects.create_user(username='rushhost', password='x')
+        event = Event.objects.create(title="Hot ticket", description="D", location="L",
+                                     date="2025-06-15T14:00:00Z", creator=host, capacity=self.CAPACITY)
+        guests = CustomUser.objects.bulk_create(
+            [CustomUser(username=f'rush{i}') for i in range(self.GUESTS)]
+        )
+        start = threading.Barrier(self.GUESTS)
+        outcomes = []
+
+        def rsvp(guest):
+            try:
+                start.wait()
+                state, _ = attendance.set_attendance(Event.objects.get(pk=event.pk), guest, True)
+                outcomes.append(state)
+            finally:
+                db_connections.close_all()
+
+        threads = [threading.Thread(target=rsvp, args=(g,)) for g in guests]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        event.refresh_from_db()
+        self.assertEqual(len(outcomes), self.GUESTS)
+        self.assertEqual(outcomes.count(attendance.ATTENDING), self.CAPACITY)
+        self.assertEqual(event.attendees_count, self.CAPACITY)
+        self.assertEqual(event.attendees.count(), self.CAPACITY)
+        self.assertEqual(event.waitlist.count(), self.GUESTS - self.CAPACITY)
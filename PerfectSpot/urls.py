@@ -6,13 +6,16 @@ from django.conf.urls.static import static
 from PerfectSpot.views.auth import RegisterView, LoginView, GoogleLoginView
 from PerfectSpot.views.events import (
     CreateEventView, DeleteEventView, RSVPEventView, EditEventView, PromoteEventView,
+    NearbyEventsView, EventClustersView, EventSyncView, MyEventsView,
     ReviewCreateView, ReviewUpdateView, ReviewDestroyView, ReviewListView,
     CreateStripeCheckoutSession, ConfirmCheckoutView  
 )
 from PerfectSpot.views.friends import (
-    FriendshipStatusView, UserProfileAPIView, my_friends, unfriend, FriendRequestViewSet
+    FriendshipStatusView, UserProfileAPIView, UserConnectionsView, my_friends, unfriend, FriendRequestViewSet
 )
 from PerfectSpot.views.user_search import UserSearchView
+from PerfectSpot.views.calendar import CalendarFeedView, CalendarFeedLinkView
+from PerfectSpot.views import async_views
 
 router = DefaultRouter()
 router.register(r"friend-requests", FriendRequestViewSet, basename="friend-request")
@@ -21,6 +24,12 @@ urlpatterns = [
     path('signup/', RegisterView.as_view(), name='signup'),
     path('signin/', LoginView.as_view(), name='signin'),
     path('events/', CreateEventView.as_view(), name='create_event'),
+    path('events/nearby/', NearbyEventsView.as_view(), name='nearby_events'),
+    path('events/clusters/', EventClustersView.as_view(), name='event_clusters'),
+    path('events/sync/', EventSyncView.as_view(), name='event_sync'),
+    path('me/events/', MyEventsView.as_view(), name='my_events'),
+    path('me/calendar/', CalendarFeedLinkView.as_view(), name='calendar_feed_link'),
+    path('calendar/<str:token>.ics', CalendarFeedView.as_view(), name='calendar_feed'),
 
     path('events/<int:pk>/create-checkout-session/', CreateStripeCheckoutSession.as_view()),
     path('events/<int:pk>/confirm-checkout/', ConfirmCheckoutView.as_view()),
@@ -40,6 +49,14 @@ urlpatterns = [
     path('me/friends/', my_friends, name='my-friends'),
     path('users/search/', UserSearchView.as_view(), name='user-search'),
     path('users/<int:user_id>/profile/', UserProfileAPIView.as_view(), name='user-profile-api'),
+    path('users/<int:user_id>/connections/<str:kind>/', UserConnectionsView.as_view(), name='user-connections'),
+
+    # Async (ASGI) variants of the read-heavy endpoints above
+    path('async/events/', async_views.event_list, name='async_event_list'),
+    path('async/events/<int:pk>/', async_views.event_detail, name='async_event_detail'),
+    path('async/events/<int:pk>/reviews/', async_views.review_list, name='async_review_list'),
+    path('async/users/search/', async_views.user_search, name='async_user_search'),
+    path('async/users/<int:user_id>/profile/', async_views.user_profile, name='async_user_profile'),
 
     path('', include(router.urls)),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
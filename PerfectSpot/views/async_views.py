@@ -0,0 +1,261 @@
+"""
+Async variants of the read-heavy endpoints, mounted under /api/async/.
+
+Served by an ASGI server (PerfectSpotProject/asgi.py) these don't hold a
+worker thread while a request waits on the database or cache, so one
+process can keep many more slow reads in flight than the WSGI views can.
+Responses match their WSGI counterparts field for field, and the event
+listing and reviews share their public_cache entries with them.
+
+They are plain Django views rather than DRF ones (DRF views are sync
+only), so JWT authentication is done by `api_view` below.
+
+Django 4.2's async ORM still runs each query in a worker thread; the win
+here is that waiting on it doesn't block the event loop. Full-text search
+is raw SQL with no async API and goes through sync_to_async directly.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Q
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from PerfectSpot import public_cache, search
+from PerfectSpot.conditional import make_etag, not_modified, set_validators
+from PerfectSpot.friendship import aresolve_friendship_statuses
+from PerfectSpot.models import Attendance, Event, Review
+from PerfectSpot.pagination import InvalidCursor, KeysetPaginator
+from PerfectSpot.serializers import (
+    EventSerializer, FriendDataResponseSerializer, ReviewSerializer, SearchResultUserSerializer,
+)
+from PerfectSpot.views.events import (
+    LISTING_ORDERING, listing_cache_parts, listing_etag, listing_payload, listing_queryset,
+    personalize_listing, reviews_payload,
+)
+from PerfectSpot.views.friends import CONNECTION_LISTS, PROFILE_PREVIEW_SIZE, profile_queryset
+from PerfectSpot.views.user_search import UserSearchView
+
+User = get_user_model()
+
+
+def _error(message, status):
+    return JsonResponse({"success": False, "message": message, "data": None}, status=status)
+
+
+async def authenticate(request):
+    """The user behind the request's JWT, or AnonymousUser if it has none."""
+    backend = JWTAuthentication()
+    header = backend.get_header(request)
+    raw_token = backend.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return AnonymousUser()
+    validated_token = backend.get_validated_token(raw_token)
+    return await sync_to_async(backend.get_user)(validated_token)
+
+
+def api_view(login_required=False):
+    """
+    GET/HEAD-only async view with JWT authentication, answering the way the
+    DRF views do: 401 {"detail": ...} for a bad or missing token.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                response = JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+                response["Allow"] = "GET, HEAD"
+                return response
+            try:
+                request.user = await authenticate(request)
+            except AuthenticationFailed as e:
+                return JsonResponse({"detail": e.detail}, status=401)
+            if login_required and not request.user.is_authenticated:
+                return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@api_view()
+async def event_list(request):
+    """Async twin of CreateEventView.get."""
+    if request.GET.get("q"):
+        return await _event_search(request)
+
+    async def build():
+        qs = listing_queryset(request.GET)
+        events, next_cursor = await KeysetPaginator(ordering=LISTING_ORDERING).apaginate(qs, request)
+        return listing_payload(
+            events, next_cursor, EventSerializer(events, many=True, context={"request": request}).data
+        )
+
+    try:
+        page = await public_cache.aget_or_build(public_cache.EVENTS, listing_cache_parts(request), build)
+    except InvalidCursor as e:
+        return _error(str(e), 400)
+
+    user = request.user
+    attending = set()
+    if user.is_authenticated and page["ids"]:
+        attending = {
+            event_id async for event_id in
+            Attendance.objects.filter(user=user, event_id__in=page["ids"]).values_list("event_id", flat=True)
+        }
+
+    etag = listing_etag(page, user, attending)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return set_validators(cached, etag, vary=('Authorization',))
+
+    data = personalize_listing(page, user, attending)
+    response = JsonResponse({
+        "success": True,
+        "message": "Events retrieved successfully.",
+        "data": data,
+        "pagination": {
+            "next_cursor": page["next_cursor"],
+            "count": len(data),
+        }
+    })
+    return set_validators(response, etag, vary=('Authorization',))
+
+
+async def _event_search(request):
+    text = request.GET["q"]
+    paginator = KeysetPaginator()
+    promoted_str = request.GET.get("promoted")
+    promoted = None if promoted_str is None else promoted_str.lower() in ("1", "true", "yes")
+    qs = Event.objects.with_viewer_state(request.user)
+
+    try:
+        if search.fts_available():
+            ids, next_cursor = await sync_to_async(search.search_event_ids)(
+                text, paginator.get_page_size(request),
+                cursor=request.GET.get("cursor"), promoted=promoted,
+            )
+            by_id = await qs.ain_bulk(ids)
+            events = [by_id[i] for i in ids if i in by_id]
+        else:
+            qs = qs.filter(
+                Q(title__icontains=text) | Q(description__icontains=text) | Q(location__icontains=text)
+            )
+            if promoted is not None:
+                qs = qs.filter(is_promoted=promoted)
+            events, next_cursor = await paginator.apaginate(qs, request)
+    except InvalidCursor as e:
+        return _error(str(e), 400)
+
+    data = EventSerializer(events, many=True, context={"request": request}).data
+    return JsonResponse({
+        "success": True,
+        "message": "Events retrieved successfully.",
+        "data": data,
+        "pagination": {
+            "next_cursor": next_cursor,
+            "count": len(events),
+        }
+    })
+
+
+@api_view(login_required=True)
+async def event_detail(request, pk):
+    """Async twin of DeleteEventView.get."""
+    qs = Event.objects.with_viewer_state(request.user)
+    version = await qs.values('updated_at', 'creator_id', 'viewer_attending').filter(pk=pk).afirst()
+    if version is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    last_modified = version['updated_at']
+    etag = make_etag(
+        pk, last_modified, request.user.pk,
+        version['creator_id'] == request.user.pk, version['viewer_attending'],
+    )
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return set_validators(cached, etag, last_modified, vary=('Authorization',))
+
+    event = await qs.filter(pk=pk).afirst()
+    if event is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    response = JsonResponse({
+        "success": True,
+        "message": "Event retrieved successfully.",
+        "data": EventSerializer(event, context={"request": request}).data,
+    })
+    return set_validators(response, etag, last_modified, vary=('Authorization',))
+
+
+@api_view()
+async def review_list(request, pk):
+    """Async twin of ReviewListView."""
+    async def build():
+        reviews = [r async for r in Review.objects.filter(event_id=pk).select_related('reviewer')]
+        return reviews_payload(pk, reviews, ReviewSerializer(reviews, many=True).data)
+
+    page = await public_cache.aget_or_build(
+        public_cache.reviews_namespace(pk), [request.scheme, request.get_host()], build
+    )
+    cached = not_modified(request, page['etag'])
+    if cached is not None:
+        return set_validators(cached, page['etag'])
+    return set_validators(JsonResponse(page['data'], safe=False), page['etag'])
+
+
+@api_view(login_required=True)
+async def user_search(request):
+    """Async twin of UserSearchView."""
+    query = request.GET.get("q", "").strip()
+    if not query:
+        return JsonResponse({"results": []})
+
+    users = [
+        user async for user in
+        User.objects.filter(search.prefix_filter('username_lower', query))
+        .exclude(id=request.user.id)
+        .order_by(*search.prefix_ranking('username_lower', query))[:UserSearchView.RESULT_LIMIT]
+    ]
+
+    statuses = await aresolve_friendship_statuses(request.user, [u.id for u in users])
+    serializer = SearchResultUserSerializer(
+        users, many=True, context={"request": request, "friendship_statuses": statuses}
+    )
+    return JsonResponse({"results": serializer.data})
+
+
+@api_view(login_required=True)
+async def user_profile(request, user_id):
+    """Async twin of UserProfileAPIView."""
+    if request.GET.get("compact", "").lower() in ("1", "true", "yes"):
+        user = await User.objects.filter(id=user_id).afirst()
+        if user is None:
+            return JsonResponse({"detail": "Not found."}, status=404)
+        return JsonResponse(await _compact_profile(user, request))
+
+    user = await profile_queryset().filter(id=user_id).afirst()
+    if user is None:
+        return JsonResponse({"detail": "Not found."}, status=404)
+    return JsonResponse(FriendDataResponseSerializer(user).data)
+
+
+async def _compact_profile(user, request):
+    """friends.compact_profile() on the async ORM."""
+    data = {
+        "id": user.id,
+        "username": user.username,
+        "login": user.username,
+        "interests": [name async for name in user.interests.values_list("name", flat=True)],
+        "events_count": user.events_count,
+    }
+    for kind, (source, serializer_class) in CONNECTION_LISTS.items():
+        items, next_cursor = await KeysetPaginator(ordering=("id",)).apaginate(
+            source(user), request, cursor="", size=PROFILE_PREVIEW_SIZE
+        )
+        data[kind] = {
+            "count": user.friends_count if kind == "friends" else await source(user).acount(),
+            "results": serializer_class(items, many=True).data,
+            "next_cursor": next_cursor,
+        }
+    return data
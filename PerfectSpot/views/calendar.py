@@ -0,0 +1,109 @@
+from django.conf import settings
+from django.core import signing
+from django.db.models import Count, Max, Q, Subquery, Sum
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
+from django.views import View
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from PerfectSpot import ical
+from PerfectSpot.conditional import make_etag, not_modified, set_validators
+from PerfectSpot.models import Attendance, CustomUser, Event
+
+FEED_SALT = 'PerfectSpot.calendar-feed'
+
+
+def feed_token(user):
+    """Stable, unguessable token naming a user's feed (calendar apps can't send a JWT)."""
+    return signing.Signer(salt=FEED_SALT).sign(str(user.pk))
+
+
+def user_for_token(token):
+    try:
+        user_id = signing.Signer(salt=FEED_SALT).unsign(token)
+    except signing.BadSignature:
+        return None
+    return CustomUser.objects.filter(pk=user_id, is_active=True).only('id', 'username').first()
+
+
+def feed_events(user):
+    """Events the user created or attends."""
+    attending = Attendance.objects.filter(user_id=user.pk).values('event_id')
+    return Event.objects.filter(Q(creator_id=user.pk) | Q(pk__in=attending))
+
+
+def feed_validators(user):
+    """
+    (etag, last_modified) for the user's feed, from a single aggregate query.
+
+    Last-Modified is the newest event edit or RSVP. Leaving an event or
+    deleting one doesn't leave a timestamp behind, so the ETag also covers
+    the number of events and the sum of their ids.
+    """
+    latest_rsvp = (
+        Attendance.objects.filter(user_id=user.pk)
+        .order_by('-updated_at').values('updated_at')[:1]
+    )
+    stats = feed_events(user).aggregate(
+        count=Count('id'),
+        id_sum=Sum('id'),
+        last_edit=Max('updated_at'),
+        last_rsvp=Max(Subquery(latest_rsvp)),
+    )
+    stamps = [t for t in (stats['last_edit'], stats['last_rsvp']) if t is not None]
+    last_modified = max(stamps) if stamps else None
+    etag = make_etag(user.pk, stats['count'], stats['id_sum'], last_modified)
+    return etag, last_modified
+
+
+class CalendarFeedView(View):
+    """
+    GET /calendar/{token}.ics
+    iCalendar feed of a user's events for calendar apps to subscribe to.
+    Supports If-None-Match / If-Modified-Since, so a poll of an unchanged
+    feed costs one aggregate query and returns 304.
+    """
+
+    def get(self, request, token):
+        user = user_for_token(token)
+        if user is None:
+            raise Http404("Unknown calendar feed")
+
+        etag, last_modified = feed_validators(user)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return set_validators(response, etag, last_modified)
+
+        events = (
+            feed_events(user)
+            .only('id', 'title', 'description', 'location', 'date', 'latitude', 'longitude', 'updated_at')
+            .order_by('date', 'id')
+            .iterator(chunk_size=500)
+        )
+        frontend = (settings.FRONTEND_URL or '').rstrip('/')
+        url_for = (lambda event: f"{frontend}/events/{event.pk}") if frontend else None
+        response = StreamingHttpResponse(
+            ical.render_calendar(events, f"GatherSpot – {user.username}", url_for),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response.headers['Content-Disposition'] = 'inline; filename="gatherspot.ics"'
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return set_validators(response, etag, last_modified)
+
+
+class CalendarFeedLinkView(APIView):
+    """GET /me/calendar/ - the subscription URL for the signed-in user's feed."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        token = feed_token(request.user)
+        return Response({
+            "success": True,
+            "message": "Calendar feed link retrieved successfully.",
+            "data": {
+                "url": request.build_absolute_uri(reverse('calendar_feed', args=[token])),
+            }
+        }, status=status.HTTP_200_OK)
@@ -2,21 +2,90 @@ from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import generics, status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from PerfectSpot.serializers import EventSerializer, ReviewSerializer
-from PerfectSpot.models import Event, Review
+from PerfectSpot.pagination import KeysetPaginator, InvalidCursor, decode_cursor, encode_cursor
+from django.db.models import Avg, Count, F, Q, Window
+from django.db.models.functions import RowNumber, Substr
+from PerfectSpot import attendance, geo, public_cache, search
+from PerfectSpot.conditional import make_etag, not_modified, set_validators
+from PerfectSpot.serializers import EventSerializer, NearbyEventSerializer, ReviewSerializer
+from PerfectSpot.models import Attendance, Event, EventTombstone, Review, StripeCheckout
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from rest_framework_simplejwt.tokens import RefreshToken
 import stripe
+from datetime import datetime, time, timedelta
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
+# The home-screen listing. These pieces are shared by CreateEventView and
+# the async list in views/async_views.py, which read through the same cache.
+LISTING_ORDERING = ('date', 'id')
+
+
+def listing_cache_parts(request):
+    params = request.GET
+    return [
+        request.scheme, request.get_host(), params.get("title"), params.get("promoted"),
+        params.get("cursor"), params.get("page_size"),
+    ]
+
+
+def listing_queryset(params):
+    """Listing rows filtered by ?title= and ?promoted=, with no viewer state."""
+    qs = Event.objects.with_viewer_state(None)
+
+    # Title-prefix filter (case-insensitive). Expressed as a range on
+    # title_lower so it can use its index instead of a LIKE scan.
+    title_prefix = params.get("title")
+    if title_prefix:
+        qs = qs.filter(search.prefix_filter('title_lower', title_prefix))
+
+    promoted_str = params.get("promoted")
+    if promoted_str is not None:
+        promoted = promoted_str.lower() in ("1", "true", "yes")
+        qs = qs.filter(is_promoted=promoted)
+    return qs
+
+
+def listing_payload(events, next_cursor, data):
+    """One page of the listing, serialized without viewer-specific fields."""
+    return {
+        "data": [dict(item) for item in data],
+        "ids": [e.id for e in events],
+        "creator_ids": [e.creator_id for e in events],
+        "next_cursor": next_cursor,
+        # identifies this exact page content, for the ETag
+        "fingerprint": [next_cursor, [(e.id, e.updated_at) for e in events]],
+    }
+
+
+def listing_etag(page, user, attending):
+    # No Last-Modified: an event dropping out of the page leaves no
+    # timestamp behind, so only the ETag can notice.
+    return make_etag(page["fingerprint"], user.pk, sorted(attending))
+
+
+def personalize_listing(page, user, attending):
+    """Overlays is_owner / is_attending for `user` on a cached page."""
+    return [
+        {
+            **item,
+            "is_owner": user.is_authenticated and creator_id == user.pk,
+            "is_attending": item["id"] in attending,
+        }
+        for item, creator_id in zip(page["data"], page["creator_ids"])
+    ]
+
+
 class CreateEventView(generics.GenericAPIView):
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated]  # Must be logged in to create an event
@@ -30,33 +99,107 @@ class CreateEventView(generics.GenericAPIView):
         return [perm() for perm in self.permission_classes]
 
     @swagger_auto_schema(
-        operation_description="List all events for the home screen.",
+        operation_description="List events for the home screen, ordered by date. "
+                              "Paginated by cursor: pass the returned next_cursor "
+                              "back as ?cursor= to fetch the following page.",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Full-text search over title, description and location; "
+                                          "results are ordered by relevance instead of date"),
+            openapi.Parameter('title', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Case-insensitive title prefix"),
+            openapi.Parameter('promoted', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
         responses={200: EventSerializer(many=True)}
     )
     def get(self, request, *args, **kwargs):
-        # 1) Base queryset
-        qs = Event.objects.all()
+        if request.query_params.get("q"):
+            return self._search(request)
+
+        # The page is the same for every viewer apart from is_owner and
+        # is_attending, so it is cached without them (public_cache.py) and
+        # they are filled in per request.
+        try:
+            page = public_cache.get_or_build(
+                public_cache.EVENTS, listing_cache_parts(request), lambda: self._build_page(request)
+            )
+        except InvalidCursor as e:
+            return Response({
+                "success": False,
+                "message": str(e),
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 2) Title-prefix filter (case-insensitive)
-        title_prefix = request.query_params.get("title")
-        if title_prefix:
-            qs = qs.filter(title__istartswith=title_prefix)
+        user = request.user
+        attending = set()
+        if user.is_authenticated and page["ids"]:
+            attending = set(
+                Attendance.objects.filter(user=user, event_id__in=page["ids"])
+                .values_list("event_id", flat=True)
+            )
+
+        etag = listing_etag(page, user, attending)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return set_validators(cached, etag, vary=('Authorization',))
+
+        data = personalize_listing(page, user, attending)
+        response = Response({
+            "success": True,
+            "message": "Events retrieved successfully.",
+            "data": data,
+            "pagination": {
+                "next_cursor": page["next_cursor"],
+                "count": len(data),
+            }
+        }, status=status.HTTP_200_OK)
+        return set_validators(response, etag, vary=('Authorization',))
 
-        # 3) Promoted filter
+    def _build_page(self, request):
+        qs = listing_queryset(request.query_params)
+        events, next_cursor = KeysetPaginator(ordering=LISTING_ORDERING).paginate(qs, request)
+        return listing_payload(events, next_cursor, self.get_serializer(events, many=True).data)
+
+    def _search(self, request):
+        text = request.query_params["q"]
+        paginator = KeysetPaginator()
         promoted_str = request.query_params.get("promoted")
-        if promoted_str is not None:
-            promoted = promoted_str.lower() in ("1", "true", "yes")
-            qs = qs.filter(is_promoted=promoted)
+        promoted = None if promoted_str is None else promoted_str.lower() in ("1", "true", "yes")
+        qs = Event.objects.with_viewer_state(request.user)
 
-        # 4) Apply your existing ordering
-        events = qs.order_by('date')
+        try:
+            if search.fts_available():
+                ids, next_cursor = search.search_event_ids(
+                    text, paginator.get_page_size(request),
+                    cursor=request.query_params.get("cursor"), promoted=promoted,
+                )
+                by_id = qs.in_bulk(ids)
+                events = [by_id[i] for i in ids if i in by_id]
+            else:
+                qs = qs.filter(
+                    Q(title__icontains=text) | Q(description__icontains=text) | Q(location__icontains=text)
+                )
+                if promoted is not None:
+                    qs = qs.filter(is_promoted=promoted)
+                events, next_cursor = paginator.paginate(qs, request)
+        except InvalidCursor as e:
+            return Response({
+                "success": False,
+                "message": str(e),
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 5) Serialize & return
         serializer = self.get_serializer(events, many=True)
         return Response({
             "success": True,
             "message": "Events retrieved successfully.",
-            "data": serializer.data
+            "data": serializer.data,
+            "pagination": {
+                "next_cursor": next_cursor,
+                "count": len(events),
+            }
         }, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
@@ -111,13 +254,28 @@ class DeleteEventView(generics.GenericAPIView):
         }
     )
     def get(self, request, pk):
-        event = get_object_or_404(self.queryset, pk=pk)
+        qs = Event.objects.with_viewer_state(request.user)
+        # is_owner and is_attending are per viewer, so both go into the ETag.
+        # RSVPs also move the event's updated_at (attendees_count changes),
+        # which keeps Last-Modified honest for the viewer's own RSVP too.
+        version = get_object_or_404(qs.values('updated_at', 'creator_id', 'viewer_attending'), pk=pk)
+        last_modified = version['updated_at']
+        etag = make_etag(
+            pk, last_modified, request.user.pk,
+            version['creator_id'] == request.user.pk, version['viewer_attending'],
+        )
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return set_validators(cached, etag, last_modified, vary=('Authorization',))
+
+        event = get_object_or_404(qs, pk=pk)
         data = self.get_serializer(event).data
-        return Response({
+        response = Response({
             "success": True,
             "message": "Event retrieved successfully.",
             "data": data
         }, status=status.HTTP_200_OK)
+        return set_validators(response, etag, last_modified, vary=('Authorization',))
 
     @swagger_auto_schema(
         operation_description="Delete an event by ID. Only the creator or staff can delete.",
@@ -178,7 +336,7 @@ class EditEventView(generics.GenericAPIView):
     )
     def patch(self, request, pk):
         # 1) Load the event or 404
-        event = get_object_or_404(self.queryset, pk=pk)
+        event = get_object_or_404(Event.objects.with_viewer_state(request.user), pk=pk)
 
         # 2) Permission: only creator or staff
         if event.creator != request.user and not request.user.is_staff:
@@ -194,6 +352,10 @@ class EditEventView(generics.GenericAPIView):
         )
         if serializer.is_valid():
             serializer.save()  # writes changes to the model
+            if 'capacity' in serializer.validated_data:
+                # a larger (or removed) limit frees seats for the waitlist
+                attendance.promote_waitlist(event)
+                event.refresh_from_db(fields=['attendees_count'])
             return Response({
                 "success": True,
                 "message": "Event updated successfully.",
@@ -233,39 +395,453 @@ class PromoteEventView(APIView):
 
 
 
-class RSVPEventView(APIView):
+def parse_bbox(raw):
+    """'min_lat,min_lng,max_lat,max_lng' → tuple of floats, or ValueError."""
+    parts = [float(p) for p in raw.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox needs four comma-separated numbers.")
+    min_lat, min_lng, max_lat, max_lng = parts
+    if not (-90 <= min_lat <= max_lat <= 90) or not (-180 <= min_lng <= max_lng <= 180):
+        raise ValueError("bbox must be min_lat,min_lng,max_lat,max_lng within valid ranges.")
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def geohash_filter(bbox, max_cells=32):
+    """
+    Index-friendly filter for events inside bbox: a few range scans over the
+    geohash column, then an exact coordinate check on the surviving rows.
+    """
+    precision = geo.choose_precision(*bbox, max_cells=max_cells)
+    condition = Q()
+    for lo, hi in geo.prefix_ranges(geo.covering_cells(*bbox, precision)):
+        condition |= Q(geohash__gte=lo, geohash__lt=hi)
+    min_lat, min_lng, max_lat, max_lng = bbox
+    return condition & Q(
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lng, longitude__lte=max_lng,
+    )
+
+
+class NearbyEventsView(generics.GenericAPIView):
+    """
+    GET /events/nearby/?lat=&lng=&radius_km=   → events within a circle
+    GET /events/nearby/?bbox=s,w,n,e[&lat=&lng=] → events inside a box
+    Results are sorted by great-circle distance from lat/lng (or the box
+    centre when no point is given).
+    """
+    serializer_class = NearbyEventSerializer
+    permission_classes = []
+    MAX_RADIUS_KM = 500
+
+    def _error(self, message):
+        return Response({
+            "success": False,
+            "message": message,
+            "data": None
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    @swagger_auto_schema(
+        operation_description="List events near a point or inside a bounding box, nearest first.",
+        manual_parameters=[
+            openapi.Parameter('lat', openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter('lng', openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter('radius_km', openapi.IN_QUERY, type=openapi.TYPE_NUMBER),
+            openapi.Parameter('bbox', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="min_lat,min_lng,max_lat,max_lng"),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: NearbyEventSerializer(many=True), 400: "Invalid location parameters"}
+    )
+    def get(self, request):
+        params = request.query_params
+        try:
+            lat = float(params['lat']) if 'lat' in params else None
+            lng = float(params['lng']) if 'lng' in params else None
+            radius_km = float(params['radius_km']) if 'radius_km' in params else None
+            bbox = parse_bbox(params['bbox']) if 'bbox' in params else None
+            limit = int(params.get('limit', settings.API_PAGE_SIZE))
+        except ValueError as e:
+            return self._error(f"Invalid location parameters: {e}")
+
+        if (lat is None) != (lng is None):
+            return self._error("lat and lng must be given together.")
+        if lat is not None and not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return self._error("lat/lng out of range.")
+
+        if bbox is None:
+            if lat is None or radius_km is None:
+                return self._error("Provide either bbox, or lat, lng and radius_km.")
+            if not 0 < radius_km <= self.MAX_RADIUS_KM:
+                return self._error(f"radius_km must be between 0 and {self.MAX_RADIUS_KM}.")
+            boxes = geo.radius_bboxes(lat, lng, radius_km)
+        else:
+            boxes = [bbox]
+            if lat is None:
+                lat = (bbox[0] + bbox[2]) / 2
+                lng = (bbox[1] + bbox[3]) / 2
+
+        in_boxes = Q()
+        for box in boxes:
+            in_boxes |= geohash_filter(box)
+
+        limit = max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+        qs = (
+            Event.objects.with_viewer_state(request.user)
+            .filter(in_boxes)
+            .annotate(distance_km=geo.haversine_expression(lat, lng))
+        )
+        if radius_km is not None:
+            qs = qs.filter(distance_km__lte=radius_km)
+        events = qs.order_by('distance_km', 'id')[:limit]
+
+        serializer = self.get_serializer(events, many=True)
+        return Response({
+            "success": True,
+            "message": "Nearby events retrieved successfully.",
+            "data": serializer.data
+        }, status=status.HTTP_200_OK)
+
+
+class EventClustersView(APIView):
+    """
+    GET /events/clusters/?bbox=s,w,n,e&zoom=N
+    Aggregates events inside the box into geohash cells sized for the zoom
+    level, so the payload grows with screen area rather than event count.
+    """
+    permission_classes = []
+    MAX_ZOOM = 21
+    SAMPLE_SIZE = 3
+
+    @swagger_auto_schema(
+        operation_description="Cluster events inside a bounding box for a map zoom level.",
+        manual_parameters=[
+            openapi.Parameter('bbox', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                              description="min_lat,min_lng,max_lat,max_lng"),
+            openapi.Parameter('zoom', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=True),
+        ],
+        responses={200: "Clusters retrieved", 400: "Invalid bbox or zoom"}
+    )
+    def get(self, request):
+        try:
+            bbox = parse_bbox(request.query_params['bbox'])
+            zoom = int(request.query_params['zoom'])
+            if not 0 <= zoom <= self.MAX_ZOOM:
+                raise ValueError(f"zoom must be between 0 and {self.MAX_ZOOM}.")
+        except (KeyError, ValueError) as e:
+            return Response({
+                "success": False,
+                "message": f"Invalid cluster parameters: {e}",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        precision = geo.precision_for_zoom(zoom)
+        in_view = Event.objects.filter(geohash_filter(bbox)).annotate(
+            cell=Substr('geohash', 1, precision)
+        )
+
+        # One grouped query for the cluster aggregates...
+        clusters = list(
+            in_view.values('cell').annotate(
+                count=Count('id'),
+                promoted_count=Count('id', filter=Q(is_promoted=True)),
+                latitude=Avg('latitude'),
+                longitude=Avg('longitude'),
+            ).order_by('cell')
+        )
+
+        # ...and one windowed query for a few representative ids per cell,
+        # promoted and soonest events first.
+        samples = in_view.annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F('cell')],
+                order_by=[F('is_promoted').desc(), F('date').asc(), F('id').asc()],
+            )
+        ).filter(rank__lte=self.SAMPLE_SIZE).order_by('cell', 'rank').values_list('cell', 'id')
+
+        sample_ids = {}
+        for cell, event_id in samples:
+            sample_ids.setdefault(cell, []).append(event_id)
+
+        return Response({
+            "success": True,
+            "message": "Clusters retrieved successfully.",
+            "data": {
+                "precision": precision,
+                "clusters": [
+                    {
+                        "geohash": c['cell'],
+                        "latitude": c['latitude'],
+                        "longitude": c['longitude'],
+                        "count": c['count'],
+                        "promoted_count": c['promoted_count'],
+                        "sample_event_ids": sample_ids.get(c['cell'], []),
+                    }
+                    for c in clusters
+                ],
+            }
+        }, status=status.HTTP_200_OK)
+
+
+class CursorExpired(Exception):
+    pass
+
+
+class EventSyncView(APIView):
+    """
+    GET /events/sync/?cursor=&page_size=
+    Incremental sync for clients that keep a local copy of the catalogue.
+
+    Without a cursor the whole catalogue is sent (in pages); afterwards each
+    call returns only events created or updated since the cursor, plus the
+    ids of events deleted since then. Updates and deletions are two keyset
+    streams, on (updated_at, id) and on the tombstones' (deleted_at, id), and
+    the cursor holds the position in both. Unlike the list endpoints,
+    next_cursor is always returned: store it and send it on the next sync.
+    has_more says whether to call again straight away.
+    """
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_description="Events created, updated or deleted since ?cursor=. "
+                              "Returns 410 when the cursor is too old; resync without one.",
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+    )
+    def get(self, request):
+        now = timezone.now()
+        horizon = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        updates = KeysetPaginator(ordering=('updated_at', 'id'))
+        deletions = KeysetPaginator(ordering=('deleted_at', 'id'))
+        size = updates.get_page_size(request)
+
+        try:
+            updated_pos, deleted_pos = self._positions(request, horizon)
+            events, more_events = updates.paginate(
+                Event.objects.with_viewer_state(request.user).filter(updated_at__lte=horizon),
+                request, cursor=updated_pos, size=size,
+            )
+            tombstones, more_tombstones = deletions.paginate(
+                EventTombstone.objects.filter(deleted_at__lte=horizon).only('id', 'event_id', 'deleted_at'),
+                request, cursor=deleted_pos, size=size,
+            )
+        except InvalidCursor as e:
+            return Response({
+                "success": False,
+                "message": str(e),
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+        except CursorExpired as e:
+            return Response({
+                "success": False,
+                "message": str(e),
+                "data": None
+            }, status=status.HTTP_410_GONE)
+
+        if more_tombstones or (tombstones and tombstones[-1].deleted_at == horizon):
+            deleted_next = deletions.cursor_for(tombstones[-1])
+        else:
+            # Every deletion up to the horizon has been sent, so move there.
+            # Otherwise a client of a catalogue with no deletions would keep
+            # an old position and hit the expiry check however often it syncs.
+            deleted_next = encode_cursor([horizon.isoformat(), 0])
+        next_cursor = encode_cursor([
+            updates.cursor_for(events[-1]) if events else updated_pos,
+            deleted_next,
+        ])
+        serializer = EventSerializer(events, many=True, context={'request': request})
+        return Response({
+            "success": True,
+            "message": "Changes retrieved successfully.",
+            "data": {
+                "updated": serializer.data,
+                "deleted": [t.event_id for t in tombstones],
+            },
+            "pagination": {
+                "next_cursor": next_cursor,
+                "has_more": bool(more_events or more_tombstones),
+            }
+        }, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def _positions(request, horizon):
+        cursor = request.query_params.get("cursor")
+        if not cursor:
+            # A fresh client gets every event, so only deletions from here
+            # on matter to it.
+            return None, encode_cursor([horizon.isoformat(), 0])
+
+        positions = decode_cursor(cursor)
+        if len(positions) != 2 or not isinstance(positions[1], str):
+            raise InvalidCursor("Cursor does not match this listing.")
+        updated_pos, deleted_pos = positions
+        try:
+            since = parse_datetime(decode_cursor(deleted_pos)[0])
+        except (IndexError, TypeError, ValueError):
+            since = None
+        if since is None:
+            raise InvalidCursor("Malformed cursor.")
+        if since < timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            raise CursorExpired("Cursor has expired; sync again without a cursor.")
+        return updated_pos, deleted_pos
+
+
+def parse_when(value):
+    """ISO date or datetime from a query parameter; a bare date means midnight."""
+    when = parse_datetime(value)
+    if when is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value!r}")
+        when = datetime.combine(day, time.min)
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    return when
+
+
+class MyEventsView(APIView):
+    """
+    GET /me/events/?when=upcoming|past&from=&to=&cursor=&page_size=
+    The signed-in user's calendar. Reads the user's own Attendance rows
+    through the (user, event_date) index, so the cost depends on how many
+    events they attend rather than on the size of the event table.
+    """
     permission_classes = [IsAuthenticated]
-    def post(self, request, pk):
-        event = get_object_or_404(Event, pk=pk)
 
-        if request.user in event.attendees.all():
-            event.attendees.remove(request.user)
-            is_attending = False
-            message = "You are no longer attending."
+    @swagger_auto_schema(
+        operation_description="Events the current user is attending. Upcoming events "
+                              "come soonest first, past events most recent first.",
+        manual_parameters=[
+            openapi.Parameter('when', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=['upcoming', 'past'], default='upcoming'),
+            openapi.Parameter('from', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Only events at or after this ISO date/datetime"),
+            openapi.Parameter('to', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              description="Only events before this ISO date/datetime"),
+            openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: EventSerializer(many=True)}
+    )
+    def get(self, request):
+        when = request.query_params.get("when", "upcoming")
+        if when not in ("upcoming", "past"):
+            return Response({
+                "success": False,
+                "message": "when must be 'upcoming' or 'past'.",
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = Attendance.objects.filter(user=request.user).select_related('event')
+        now = timezone.now()
+        if when == "upcoming":
+            qs = qs.filter(event_date__gte=now)
+            ordering = ('event_date', 'id')
         else:
-            event.attendees.add(request.user)
-            is_attending = True
-            message = "You are now attending!"
-            
+            qs = qs.filter(event_date__lt=now)
+            ordering = ('-event_date', '-id')
+
+        try:
+            if request.query_params.get("from"):
+                qs = qs.filter(event_date__gte=parse_when(request.query_params["from"]))
+            if request.query_params.get("to"):
+                qs = qs.filter(event_date__lt=parse_when(request.query_params["to"]))
+            rows, next_cursor = KeysetPaginator(ordering=ordering).paginate(qs, request)
+        except (ValueError, InvalidCursor) as e:
+            return Response({
+                "success": False,
+                "message": str(e),
+                "data": None
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        events = []
+        for row in rows:
+            row.event.viewer_attending = True
+            events.append(row.event)
+        serializer = EventSerializer(events, many=True, context={'request': request})
+        return Response({
+            "success": True,
+            "message": "Events retrieved successfully.",
+            "data": serializer.data,
+            "pagination": {
+                "next_cursor": next_cursor,
+                "count": len(events),
+            }
+        }, status=status.HTTP_200_OK)
+
+
+class RSVPEventView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Toggle attendance, or set it explicitly with "
+                              "{\"attending\": true|false} (idempotent, safe to retry).",
+        responses={200: "Attendance updated", 403: "Not an individual user", 404: "Event not found"}
+    )
+    def post(self, request, pk):
         if request.user.user_type != 'individual':
             return Response({
               "success": False,
               "message": "Only individual users can RSVP to events."}, status=403)
 
+        event = get_object_or_404(Event.objects.only('id', 'date', 'attendees_count', 'capacity'), pk=pk)
+
+        desired = request.data.get("attending")
+        if isinstance(desired, str):
+            desired = desired.lower() in ("1", "true", "yes")
+        state, attendees_count = attendance.set_attendance(event, request.user, desired)
+
+        messages = {
+            attendance.ATTENDING: "You are now attending!",
+            attendance.WAITLISTED: "The event is full. You are on the waitlist.",
+            attendance.NOT_ATTENDING: "You are no longer attending.",
+        }
+        data = {
+            "attendees_count": attendees_count,
+            "is_attending": state == attendance.ATTENDING,
+            "is_waitlisted": state == attendance.WAITLISTED,
+        }
+        if state == attendance.WAITLISTED:
+            data["waitlist_position"] = attendance.waitlist_position(event, request.user)
         return Response({
             "success": True,
-            "message": message,
-            "data": {
-                "attendees_count": event.attendees.count(),
-                "is_attending": is_attending,
-            }
+            "message": messages[state],
+            "data": data
         }, status=200)
 
 class ReviewListView(generics.ListAPIView):
     serializer_class = ReviewSerializer
 
     def get_queryset(self):
-        return Review.objects.filter(event_id=self.kwargs['pk'])
+        return Review.objects.filter(event_id=self.kwargs['pk']).select_related('reviewer')
+
+    def list(self, request, *args, **kwargs):
+        # Reviews are public: the serialized list is cached until a review
+        # of this event changes, so a hit costs no queries at all.
+        page = public_cache.get_or_build(
+            public_cache.reviews_namespace(self.kwargs['pk']),
+            [request.scheme, request.get_host()],
+            self._build_list,
+        )
+        cached = not_modified(request, page['etag'])
+        if cached is not None:
+            return set_validators(cached, page['etag'])
+        return set_validators(Response(page['data']), page['etag'])
+
+    def _build_list(self):
+        reviews = list(self.get_queryset())
+        return reviews_payload(self.kwargs['pk'], reviews, self.get_serializer(reviews, many=True).data)
+
+
+def reviews_payload(event_id, reviews, data):
+    # The full (id, updated_at) list also catches deletions, which
+    # max(updated_at) can't, so this gets an ETag but no Last-Modified.
+    return {
+        'data': [dict(item) for item in data],
+        'etag': make_etag(event_id, [(r.id, r.updated_at) for r in reviews]),
+    }
 
 
 # — Add a new review to an event —
@@ -310,8 +886,10 @@ class CreateStripeCheckoutSession(APIView):
         event = get_object_or_404(Event, pk=pk)
         user = request.user
 
-        if user in event.attendees.all():
+        if attendance.is_attending(event, user):
             return Response({"success": False, "message": "Already attending."}, status=400)
+        if attendance.is_full(event):
+            return Response({"success": False, "message": "Event is full."}, status=400)
 
         session = stripe.checkout.Session.create(
             payment_method_types=["card"],
@@ -326,7 +904,7 @@ class CreateStripeCheckoutSession(APIView):
     }],
     success_url = f"{settings.FRONTEND_URL}/event-success/{event.id}?session_id={{CHECKOUT_SESSION_ID}}",
     cancel_url=f"{settings.FRONTEND_URL}/events/{event.id}",
-    metadata={"user_id": user.id},
+    metadata={"user_id": user.id, "event_id": event.id},
 )
 
         return Response({"id": session.id})
@@ -344,9 +922,40 @@ class ConfirmCheckoutView(APIView):
             if session.payment_status != "paid":
                 return Response({"success": False, "message": "Payment not completed"}, status=400)
 
-            event = get_object_or_404(Event, pk=pk)
-            event.attendees.add(request.user)
+            # Session ids end up in URLs; only the payer can confirm their
+            # own session, and only for the event it was paid for.
+            metadata = session.metadata or {}
+            if (str(metadata.get("user_id")) != str(request.user.id)
+                    or str(metadata.get("event_id")) != str(pk)):
+                return Response({
+                    "success": False,
+                    "message": "This checkout session does not belong to you or this event."
+                }, status=403)
 
+            event = get_object_or_404(Event, pk=pk)
+            with transaction.atomic():
+                checkout, created = StripeCheckout.objects.get_or_create(
+                    session_id=session.id, defaults={"event": event, "user": request.user},
+                )
+                # A confirmed session is never claimed again (e.g. after
+                # leaving the event); a retried confirm reports its outcome.
+                if created and not attendance.claim_paid_seat(event, request.user):
+                    # Sold out between checkout and confirmation: a paid ticket
+                    # can't become a waitlist place, so give the money back.
+                    # The idempotency key makes a retried refund a no-op, and
+                    # a failed one rolls the checkout back so it can be retried.
+                    stripe.Refund.create(
+                        payment_intent=session.payment_intent,
+                        idempotency_key=f"sold-out-refund-{session.id}",
+                    )
+                    checkout.outcome = StripeCheckout.REFUNDED
+                    checkout.save(update_fields=["outcome"])
+
+            if checkout.outcome == StripeCheckout.REFUNDED:
+                return Response({
+                    "success": False,
+                    "message": "The event sold out; your payment has been refunded."
+                }, status=409)
             return Response({"success": True, "message": "You are now attending!"})
         except Exception as e:
             return Response({"success": False, "error": str(e)}, status=400)
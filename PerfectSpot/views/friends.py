@@ -5,14 +5,76 @@ from rest_framework.response import Response
 from PerfectSpot.models import CustomUser
 from PerfectSpot.serializers import FriendDataResponseSerializer, FriendshipStatusSerializer, UserSummarySerializer
 from PerfectSpot.models import FriendRequest
+from PerfectSpot import friendship
+from PerfectSpot.friendship import resolve_friendship_statuses
 from PerfectSpot.serializers import FriendRequestSerializer
+from PerfectSpot.pagination import KeysetPaginator, InvalidCursor
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
 User = get_user_model()
 
+# How many friends / requests a compact profile embeds before the client
+# has to page through /users/<id>/connections/<kind>/.
+PROFILE_PREVIEW_SIZE = 5
+
+CONNECTION_LISTS = {
+    "friends": (lambda user: user.friends.all(), UserSummarySerializer),
+    "incoming": (lambda user: FriendRequest.objects.filter(to_user=user).select_related("from_user"),
+                 FriendRequestSerializer),
+    "outgoing": (lambda user: FriendRequest.objects.filter(from_user=user).select_related("from_user"),
+                 FriendRequestSerializer),
+}
+
+
+def profile_queryset():
+    """Users with everything FriendDataResponseSerializer nests prefetched."""
+    requests_with_sender = FriendRequest.objects.select_related("from_user")
+    return CustomUser.objects.prefetch_related(
+        "interests",
+        "friends",
+        Prefetch("received_requests", queryset=requests_with_sender),
+        Prefetch("sent_requests", queryset=requests_with_sender),
+    )
+
+
+def wants_compact(request):
+    return request.query_params.get("compact", "").lower() in ("1", "true", "yes")
+
+
+def connection_page(user, kind, request, cursor=None, size=None):
+    source, serializer_class = CONNECTION_LISTS[kind]
+    items, next_cursor = KeysetPaginator(ordering=("id",)).paginate(
+        source(user), request, cursor=cursor, size=size
+    )
+    return serializer_class(items, many=True).data, next_cursor
+
+
+def compact_profile(user, request):
+    """
+    Counts plus the first few friends / requests, each with a cursor for
+    the rest. A fixed number of queries regardless of how popular the user is.
+    """
+    data = {
+        "id": user.id,
+        "username": user.username,
+        "login": user.username,
+        "interests": list(user.interests.values_list("name", flat=True)),
+        "events_count": user.events_count,
+    }
+    for kind, (source, _) in CONNECTION_LISTS.items():
+        results, next_cursor = connection_page(user, kind, request, cursor="", size=PROFILE_PREVIEW_SIZE)
+        data[kind] = {
+            "count": user.friends_count if kind == "friends" else source(user).count(),
+            "results": results,
+            "next_cursor": next_cursor,
+        }
+    return data
+
+
 class FriendRequestViewSet(viewsets.ModelViewSet):
     queryset = FriendRequest.objects.all()
     serializer_class = FriendRequestSerializer
@@ -65,32 +127,20 @@ class FriendshipStatusView(APIView):
 
     def get(self, request, user_id):
         current_user = request.user
-        target_user = get_object_or_404(CustomUser, id=user_id)
-
-        # List of friends for the profile being viewed
-        friends = target_user.friends.all()
-
-        # Check request relationship between current and target
-        sent = FriendRequest.objects.filter(from_user=current_user, to_user=target_user).first()
-        received = FriendRequest.objects.filter(from_user=target_user, to_user=current_user).first()
-        # incoming = FriendRequest.objects.filter(to_user=current_user)
-
-        # Determine relationship status
-        if target_user in current_user.friends.all():
-            status = "friends"
-            request_id = None
-        elif sent:
-            status = "sent"
-            request_id = sent.id
-        elif received:
-            status = "received"
-            request_id = received.id
+        target_user = get_object_or_404(
+            CustomUser if wants_compact(request) else profile_queryset(), id=user_id
+        )
+
+        status, request_id = resolve_friendship_statuses(current_user, [target_user.id])[target_user.id]
+        if status == friendship.SELF:
+            # The resolver's "self" isn't one of this endpoint's statuses
+            # (FriendshipStatusSerializer); your own profile has always been "none".
+            status = friendship.NONE
+
+        if wants_compact(request):
+            data = compact_profile(target_user, request)
         else:
-            status = "none"
-            request_id = None
-
-        serializer = FriendDataResponseSerializer(target_user)
-        data = serializer.data
+            data = FriendDataResponseSerializer(target_user).data
         # data = {
         #     "username": target_user.get_full_name() or target_user.username,
         #     "login": target_user.username,
@@ -134,6 +184,27 @@ class UserProfileAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, user_id):
-        user = get_object_or_404(CustomUser, id=user_id)
+        if wants_compact(request):
+            user = get_object_or_404(CustomUser, id=user_id)
+            return Response(compact_profile(user, request))
+        user = get_object_or_404(profile_queryset(), id=user_id)
         serializer = FriendDataResponseSerializer(user)
         return Response(serializer.data)
+
+
+class UserConnectionsView(APIView):
+    """
+    GET /users/{id}/connections/{friends|incoming|outgoing}/?cursor=&page_size=
+    Pages through the lists a compact profile only previews.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, user_id, kind):
+        if kind not in CONNECTION_LISTS:
+            return Response({"detail": "Unknown connection list"}, status=status.HTTP_404_NOT_FOUND)
+        user = get_object_or_404(CustomUser, id=user_id)
+        try:
+            results, next_cursor = connection_page(user, kind, request)
+        except InvalidCursor as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": results, "next_cursor": next_cursor})
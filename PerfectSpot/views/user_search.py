@@ -2,23 +2,32 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
-from django.db.models import Q
 
+from PerfectSpot import search
+from PerfectSpot.friendship import resolve_friendship_statuses
 from PerfectSpot.serializers import SearchResultUserSerializer, UserSummarySerializer
 
 User = get_user_model()
 
 class UserSearchView(APIView):
     permission_classes = [IsAuthenticated]
+    RESULT_LIMIT = 10
 
     def get(self, request):
-        query = request.GET.get("q", "")
+        query = request.GET.get("q", "").strip()
         if not query:
             return Response({"results": []})
 
-        users = User.objects.filter(
-            Q(username__icontains=query)
-        ).exclude(id=request.user.id)[:10]
+        # Prefix matches only (a range on the username_lower index), exact
+        # match first, then shorter (closer) completions.
+        users = list(
+            User.objects.filter(search.prefix_filter('username_lower', query))
+            .exclude(id=request.user.id)
+            .order_by(*search.prefix_ranking('username_lower', query))[:self.RESULT_LIMIT]
+        )
 
-        serializer = SearchResultUserSerializer(users, many=True, context={"request": request})
-        return Response({"results": serializer.data})
\ No newline at end of file
+        statuses = resolve_friendship_statuses(request.user, [u.id for u in users])
+        serializer = SearchResultUserSerializer(
+            users, many=True, context={"request": request, "friendship_statuses": statuses}
+        )
+        return Response({"results": serializer.data})
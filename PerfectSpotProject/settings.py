@@ -14,6 +14,7 @@ from datetime import timedelta
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from PerfectSpotProject.database_url import parse_database_url
 load_dotenv()  # load from .env file at project root
 
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
@@ -38,6 +39,17 @@ APPEND_SLASH = True
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Error reports from the admin's event CSV import. Kept outside MEDIA_ROOT:
+# they are only served to staff, through the admin.
+IMPORT_REPORT_DIR = Path(os.getenv("IMPORT_REPORT_DIR", BASE_DIR / "import_reports"))
+
+# Background jobs (`manage.py run_jobs`): uploaded inputs live here; a running
+# job whose worker hasn't reported progress for JOB_STALE_SECONDS is taken
+# to have crashed and is resumed, up to JOB_MAX_ATTEMPTS times.
+JOB_FILES_DIR = Path(os.getenv("JOB_FILES_DIR", BASE_DIR / "job_files"))
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 300))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -63,6 +75,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'PerfectSpot.routing.PrimaryPinMiddleware',
 
 ]
 
@@ -93,10 +106,59 @@ WSGI_APPLICATION = 'PerfectSpotProject.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        **parse_database_url(os.getenv("DATABASE_URL", "sqlite:///db.sqlite3"), base_dir=BASE_DIR),
+        # Reuse connections across requests; health checks drop dead ones
+        # before a request gets them.
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+if DATABASES['default']['ENGINE'].endswith('sqlite3'):
+    # A file rather than the default shared in-memory database, so tests
+    # that hit it from several threads get real SQLite locking semantics.
+    DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test_db.sqlite3'}
+
+# Applied to every new SQLite connection (PerfectSpot/sqlite_tuning.py).
+# WAL lets readers run alongside the writer; busy_timeout (ms) makes a
+# blocked writer wait rather than fail with "database is locked";
+# synchronous=NORMAL is durable across app crashes in WAL mode and only
+# risks the last commits on power loss; negative cache_size is in KiB.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv("SQLITE_JOURNAL_MODE", 'wal'),
+    'synchronous': os.getenv("SQLITE_SYNCHRONOUS", 'normal'),
+    'busy_timeout': int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 20000)),
+    'cache_size': int(os.getenv("SQLITE_CACHE_SIZE", -20000)),
+    'mmap_size': int(os.getenv("SQLITE_MMAP_SIZE", 128 * 1024 * 1024)),
+}
+
+# Optional read replica; PerfectSpot.routing sends reads there. Tests mirror
+# it onto the test primary, so e.g. two SQLite files work locally.
+DATABASE_REPLICAS = []
+if os.getenv("DATABASE_REPLICA_URL"):
+    DATABASES['replica'] = {
+        **parse_database_url(os.getenv("DATABASE_REPLICA_URL"), base_dir=BASE_DIR),
+        'CONN_MAX_AGE': DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['PerfectSpot.routing.ReplicaRouter']
+# How long a client's reads stay on the primary after it writes something
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+
+# Per-process memory by default. Point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend (e.g. django.core.cache.backends.redis.RedisCache and a
+# redis:// URL, or FileBasedCache and a directory) when running several
+# workers, otherwise each keeps its own copy and invalidations stay local.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv("CACHE_LOCATION", 'gatherspot'),
     }
 }
+# Seconds a cached public payload may live; invalidation normally retires
+# it much sooner.
+PUBLIC_CACHE_TIMEOUT = int(os.getenv("PUBLIC_CACHE_TIMEOUT", 300))
 
 # Setting jwt tokens as default authentication
 REST_FRAMEWORK = {
@@ -106,6 +168,16 @@ REST_FRAMEWORK = {
 }
 GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID")
 
+# Cursor-paginated list endpoints (?page_size= is clamped to the max)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", 50))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", 200))
+
+# /api/events/sync/: changes younger than the settle window are held back so
+# a slow transaction can't commit "behind" a cursor a client already has;
+# cursors older than the tombstone retention must resync from scratch.
+SYNC_SETTLE_SECONDS = float(os.getenv("SYNC_SETTLE_SECONDS", 2))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", 30))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators